@@ -0,0 +1,89 @@
+import time
+import numpy as np
+import torch
+import torch.nn as nn
+
+from nugi_rl.environment.custom.cartpole_discrete import CartPoleEnv
+from nugi_rl.environment.custom.vector_cartpole_discrete import VectorCartPoleEnv
+from nugi_rl.memory.policy.standard import PolicyMemory
+from nugi_rl.memory.policy.ring import RingPolicyMemory
+
+############## Hyperparameters ##############
+
+n_steps                 = 20000
+n_envs                  = 16
+
+device                  = torch.device('cpu')
+
+#####################################################################################################################################################
+
+policy = nn.Sequential(nn.Linear(4, 64), nn.ReLU(), nn.Linear(64, 2), nn.Softmax(-1)).to(device)
+
+def list_act(state):
+    state   = torch.FloatTensor(state).unsqueeze(0).float().to(device)
+    action  = torch.distributions.Categorical(policy(state)).sample()
+
+    return action.squeeze().detach().tolist()
+
+def array_act(state):
+    state   = torch.as_tensor(state, dtype = torch.float32, device = device).unsqueeze(0)
+    action  = torch.distributions.Categorical(policy(state)).sample()
+
+    return action.squeeze().detach().cpu().numpy()
+
+def array_act_batch(states):
+    states  = torch.as_tensor(states, dtype = torch.float32, device = device)
+    actions = torch.distributions.Categorical(policy(states)).sample()
+
+    return actions.cpu().numpy()
+
+def run_list_path():
+    env, memory = CartPoleEnv(), PolicyMemory(n_steps)
+    states      = env.reset()
+
+    for _ in range(n_steps):
+        action = list_act(states.tolist())
+        next_state, reward, done, _ = env.step(action)
+
+        memory.save_obs(states.tolist(), action, reward, float(done), next_state.tolist())
+        states = env.reset() if done else next_state
+
+    return n_steps
+
+def run_array_path():
+    env, memory = CartPoleEnv(), RingPolicyMemory(n_steps)
+    states      = env.reset()
+
+    for _ in range(n_steps):
+        action = array_act(states)
+        next_state, reward, done, _ = env.step(action)
+
+        memory.save_obs(states, action, reward, float(done), next_state)
+        states = env.reset() if done else next_state
+
+    return n_steps
+
+def run_vector_path():
+    env, memory = VectorCartPoleEnv(n_envs), RingPolicyMemory(n_steps)
+    states      = env.reset()
+
+    for _ in range(n_steps // n_envs):
+        actions = array_act_batch(states)
+        next_states, rewards, dones, infos = env.step(actions)
+
+        terminal_states = next_states.copy()
+        for i, info in enumerate(infos):
+            if 'terminal_observation' in info:
+                terminal_states[i] = info['terminal_observation']
+
+        memory.save_all(states, actions, rewards, dones, terminal_states)
+        states = next_states
+
+    return (n_steps // n_envs) * n_envs
+
+with torch.no_grad():
+    for name, function in (('list round-trips', run_list_path), ('numpy arrays', run_array_path), ('vectorized x{}'.format(n_envs), run_vector_path)):
+        start   = time.time()
+        steps   = function()
+
+        print('{:<20} \t {:.0f} steps/sec'.format(name, steps / (time.time() - start)))
@@ -0,0 +1,55 @@
+import time
+import torch
+
+from nugi_rl.policy_function.advantage_function.generalized_advantage_estimation import GeneralizedAdvantageEstimation
+
+############## Hyperparameters ##############
+
+gamma                   = 0.99
+lamda                   = 0.95
+n_envs                  = 1
+n_repeat                = 5
+timesteps               = [1024, 4096, 16384]
+
+device                  = torch.device('cuda:0') if torch.cuda.is_available() else torch.device('cpu')
+
+#####################################################################################################################################################
+
+def loop_advantages(rewards, values, next_values, dones):
+    gae     = 0
+    adv     = []
+
+    delta   = rewards + (1.0 - dones) * gamma * next_values - values
+    for step in reversed(range(len(rewards))):
+        gae = delta[step] + (1.0 - dones[step]) * gamma * lamda * gae
+        adv.insert(0, gae)
+
+    return torch.stack(adv)
+
+def measure(function, *datas):
+    function(*datas)
+    if device.type == 'cuda':
+        torch.cuda.synchronize()
+
+    start = time.time()
+    for _ in range(n_repeat):
+        result = function(*datas)
+
+    if device.type == 'cuda':
+        torch.cuda.synchronize()
+
+    return (time.time() - start) / n_repeat, result
+
+advantage_function  = GeneralizedAdvantageEstimation(gamma, lamda)
+
+for T in timesteps:
+    rewards     = torch.randn(T, n_envs, device = device)
+    values      = torch.randn(T, n_envs, device = device)
+    next_values = torch.randn(T, n_envs, device = device)
+    dones       = (torch.rand(T, n_envs, device = device) < 0.01).float()
+
+    loop_time, loop_result          = measure(loop_advantages, rewards, values, next_values, dones)
+    vector_time, vector_result      = measure(advantage_function.compute_advantages, rewards, values, next_values, dones)
+
+    print('T = {} \t loop: {:.5f}s \t vectorized: {:.5f}s \t speedup: {:.1f}x \t max abs diff: {:.2e}'.format(
+        T, loop_time, vector_time, loop_time / vector_time, (loop_result - vector_result).abs().max().item()))
@@ -3,10 +3,12 @@ from copy import deepcopy
 import torch
 from torch.utils.data import DataLoader
 
+from helpers.precision import Precision
+
 class AgentGoalPPG():  
     def __init__(self, policy, value, distribution, ppo_loss, aux_ppg_loss, ppo_memory, aux_ppg_memory, 
                 ppo_optimizer, aux_ppg_optimizer, ppo_epochs = 10, aux_ppg_epochs = 10, n_aux_update = 10, is_training_mode = True, 
-                batch_size = 32,  folder = 'model', device = torch.device('cuda:0')):   
+                batch_size = 32,  folder = 'model', device = torch.device('cuda:0'), precision = None):   
 
         self.batch_size         = batch_size  
         self.ppo_epochs         = ppo_epochs
@@ -29,6 +31,7 @@ class AgentGoalPPG():
         self.auxLoss            = aux_ppg_loss      
 
         self.device             = device
+        self.precision          = precision if precision is not None else Precision('fp32', self.device)
         self.i_update           = 0
 
         self.ppo_optimizer      = ppo_optimizer
@@ -46,30 +49,30 @@ class AgentGoalPPG():
         return self.ppo_memory
 
     def _training_ppo(self, states, goals, actions, rewards, dones, next_states): 
-        action_datas, _     = self.policy(states, goals)
-        values              = self.value(states, goals)
+        with self.precision.autocast():
+            action_datas, _     = self.policy(states, goals)
+            values              = self.value(states, goals)
 
-        old_action_datas, _ = self.policy_old(states, goals, True)
-        old_values          = self.value_old(states, goals, True)
-        next_values         = self.value(next_states, goals, True)
+            old_action_datas, _ = self.policy_old(states, goals, True)
+            old_values          = self.value_old(states, goals, True)
+            next_values         = self.value(next_states, goals, True)
 
-        loss = self.ppoLoss.compute_loss(action_datas, old_action_datas, values, old_values, next_values, actions, rewards, dones)
+            loss = self.ppoLoss.compute_loss(action_datas, old_action_datas, values, old_values, next_values, actions, rewards, dones)
 
         self.ppo_optimizer.zero_grad()
-        loss.backward()
-        self.ppo_optimizer.step()
+        self.precision.step(loss, self.ppo_optimizer, 'ppo')
 
     def _training_aux_ppg(self, states, goals):  
-        action_datas, values    = self.policy(states, goals)
+        with self.precision.autocast():
+            action_datas, values    = self.policy(states, goals)
 
-        returns                 = self.value(states, goals, True)
-        old_action_datas, _     = self.policy_old(states, goals, True)
+            returns                 = self.value(states, goals, True)
+            old_action_datas, _     = self.policy_old(states, goals, True)
 
-        loss = self.auxLoss.compute_loss(action_datas, old_action_datas, values, returns)
+            loss = self.auxLoss.compute_loss(action_datas, old_action_datas, values, returns)
 
         self.aux_ppg_optimizer.zero_grad()
-        loss.backward()
-        self.aux_ppg_optimizer.step()
+        self.precision.step(loss, self.aux_ppg_optimizer, 'aux_ppg')
 
     def _update_ppo(self):
         self.policy_old.load_state_dict(self.policy.state_dict())
@@ -104,6 +107,7 @@ class AgentGoalPPG():
             self._update_aux_ppg()
             self.i_update = 0    
 
+    @torch.inference_mode()
     def act(self, state, goal):
         state           = torch.FloatTensor(state).unsqueeze(0).to(self.device)
         goal            = torch.FloatTensor(goal).unsqueeze(0).to(self.device)
@@ -117,6 +121,7 @@ class AgentGoalPPG():
               
         return action.squeeze().detach().tolist()
 
+    @torch.inference_mode()
     def logprobs(self, state, goal, action):
         state           = torch.FloatTensor(state).unsqueeze(0).to(self.device)
         goal            = torch.FloatTensor(goal).unsqueeze(0).to(self.device)
@@ -136,6 +141,7 @@ class AgentGoalPPG():
             'value_state_dict': self.value.state_dict(),
             'ppo_optimizer_state_dict': self.ppo_optimizer.state_dict(),
             'aux_ppg_optimizer_state_dict': self.aux_ppg_optimizer.state_dict(),
+            'precision_state_dict': self.precision.state_dict(),
         }, self.folder + '/ppg.tar')
         
     def load_weights(self, folder = None, device = None):
@@ -150,6 +156,8 @@ class AgentGoalPPG():
         self.value.load_state_dict(model_checkpoint['value_state_dict'])
         self.ppo_optimizer.load_state_dict(model_checkpoint['ppo_optimizer_state_dict'])        
         self.aux_ppg_optimizer.load_state_dict(model_checkpoint['aux_ppg_optimizer_state_dict'])
+        if 'precision_state_dict' in model_checkpoint:
+            self.precision.load_state_dict(model_checkpoint['precision_state_dict'])
 
         if self.is_training_mode:
             self.policy.train()
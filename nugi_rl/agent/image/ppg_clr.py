@@ -4,11 +4,12 @@ import torch
 from torch.utils.data import DataLoader
 
 from helpers.pytorch_utils import set_device, to_list
+from helpers.precision import Precision
 
 class AgentPPGClr():  
     def __init__(self, projector, cnn, policy, value, state_dim, action_dim, distribution, ppo_loss, aux_ppg_loss, aux_clr_loss, ppo_memory, aux_ppg_memory, aux_clr_memory,
             ppo_optimizer, aux_ppg_optimizer, aux_clr_optimizer, ppo_epochs = 10, aux_ppg_epochs = 10, aux_clr_epochs = 10, n_aux_update = 10, is_training_mode = True, policy_kl_range = 0.03, 
-            policy_params = 5, value_clip = 1.0, entropy_coef = 0.0, vf_loss_coef = 1.0, batch_size = 32,  folder = 'model', use_gpu = True):   
+            policy_params = 5, value_clip = 1.0, entropy_coef = 0.0, vf_loss_coef = 1.0, batch_size = 32,  folder = 'model', use_gpu = True, precision = None):   
 
         self.policy_kl_range    = policy_kl_range 
         self.policy_params      = policy_params
@@ -45,6 +46,10 @@ class AgentPPGClr():
         self.ppo_memory         = ppo_memory
         self.aux_ppg_memory     = aux_ppg_memory
         self.aux_clr_memory     = aux_clr_memory
+
+        # states are stored as raw [height, width, channel] images, the memory turns minibatches into normalized [batch, channel, height, width] ones
+        if not hasattr(self.ppo_memory, 'normalize'):
+            raise Exception('ppo_memory must provide normalize(images), e.g. ImagePolicyMemory or FramePolicyMemory')
         
         self.ppoLoss            = ppo_loss
         self.aux_ppg_loss       = aux_ppg_loss
@@ -54,9 +59,8 @@ class AgentPPGClr():
         self.aux_ppg_optimizer  = aux_ppg_optimizer
         self.aux_clr_optimizer  = aux_clr_optimizer
 
-        self.ppo_scaler         = torch.cuda.amp.GradScaler()
-        self.aux_ppg_scaler     = torch.cuda.amp.GradScaler()
-        self.aux_clr_scaler     = torch.cuda.amp.GradScaler()
+        self.precision          = precision if precision is not None else Precision('fp16', self.device)
+        self.precision.prepare(self.cnn, self.cnn_old)
 
         if is_training_mode:
             self.policy.train()
@@ -75,7 +79,7 @@ class AgentPPGClr():
 
     def _training_ppo(self, states, actions, rewards, dones, next_states):
         self.ppo_optimizer.zero_grad()
-        with torch.cuda.amp.autocast():
+        with self.precision.autocast():
             res                 = self.cnn(states)
 
             action_datas, _     = self.policy(res)
@@ -91,13 +95,11 @@ class AgentPPGClr():
 
             loss = self.ppoLoss.compute_loss(action_datas, old_action_datas, values, old_values, next_values, actions, rewards, dones)
         
-        self.ppo_scaler.scale(loss).backward()
-        self.ppo_scaler.step(self.ppo_optimizer)
-        self.ppo_scaler.update()
+        self.precision.step(loss, self.ppo_optimizer, 'ppo')
 
     def _training_aux_ppg(self, states):
         self.aux_ppg_optimizer.zero_grad()        
-        with torch.cuda.amp.autocast():
+        with self.precision.autocast():
             res                     = self.cnn(states, True)
 
             returns                 = self.value(res, True)
@@ -105,15 +107,13 @@ class AgentPPGClr():
 
             action_datas, values    = self.policy(res)                        
 
-            loss = self.auxLoss.compute_loss(action_datas, old_action_datas, values, returns)
+            loss = self.aux_ppg_loss.compute_loss(action_datas, old_action_datas, values, returns)
 
-        self.aux_ppg_scaler.scale(loss).backward()
-        self.aux_ppg_scaler.step(self.aux_ppg_optimizer)
-        self.aux_ppg_scaler.update()
+        self.precision.step(loss, self.aux_ppg_optimizer, 'aux_ppg')
 
     def _training_aux_clr(self, input_images, target_images):
         self.aux_clr_optimizer.zero_grad()
-        with torch.cuda.amp.autocast():
+        with self.precision.autocast():
             res_anchor        = self.cnn(input_images)
             encoded_anchor    = self.projector(res_anchor)
 
@@ -122,9 +122,7 @@ class AgentPPGClr():
 
             loss = self.aux_clrLoss.compute_loss(encoded_anchor, encoded_target)
 
-        self.aux_clr_scaler.scale(loss).backward()
-        self.aux_clr_scaler.step(self.aux_clr_optimizer)
-        self.aux_clr_scaler.update()
+        self.precision.step(loss, self.aux_clr_optimizer, 'aux_clr')
 
     def _update_ppo(self):
         self.policy_old.load_state_dict(self.policy.state_dict())
@@ -132,9 +130,10 @@ class AgentPPGClr():
         self.cnn_old.load_state_dict(self.cnn.state_dict()) 
 
         for _ in range(self.ppo_epochs): 
-            dataloader = DataLoader(self.ppo_memory, self.batch_size, shuffle = False, num_workers = 8)
-            for states, actions, rewards, dones, next_states in dataloader:
-                self._training_ppo(states.float().to(self.device), actions.float().to(self.device), rewards.float().to(self.device), dones.float().to(self.device), next_states.float().to(self.device))
+            for states, actions, rewards, dones, next_states in self.ppo_memory.iter_minibatches(self.batch_size):
+                states, next_states = self.ppo_memory.normalize(states.to(self.device)), self.ppo_memory.normalize(next_states.to(self.device))
+                states, next_states = self.precision.memory_format(states), self.precision.memory_format(next_states)
+                self._training_ppo(states, actions.float().to(self.device), rewards.float().to(self.device), dones.float().to(self.device), next_states)
 
         states, _, _, _, _ = self.ppo_memory.get_all_items()
         self.aux_ppg_memory.save_all(states)
@@ -146,7 +145,9 @@ class AgentPPGClr():
         for _ in range(self.aux_ppg_epochs):
             dataloader  = DataLoader(self.aux_ppg_memory, self.batch_size, shuffle = False, num_workers = 8)       
             for states in dataloader:
-                self._training_aux_ppg(states.float().to(self.device))
+                # the aux memory keeps the raw frames, so they get the same normalization and layout as in the ppo phase
+                states = self.ppo_memory.normalize(states.to(self.device))
+                self._training_aux_ppg(self.precision.memory_format(states))
 
         self.aux_ppg_memory.clear_memory()
 
@@ -157,7 +158,7 @@ class AgentPPGClr():
         for _ in range(self.aux_clr_epochs):
             dataloader  = DataLoader(self.aux_clr_memory, self.batch_size, shuffle = True, num_workers = 8)
             for input_images, target_images in dataloader:
-                self._training_aux_clr(input_images.to(self.device), target_images.to(self.device))            
+                self._training_aux_clr(self.precision.memory_format(input_images.to(self.device)), self.precision.memory_format(target_images.to(self.device)))            
 
         self.aux_clr_memory.clear_memory()
 
@@ -174,6 +175,7 @@ class AgentPPGClr():
         states, actions, rewards, dones, next_states = ppo_memory.get_all_items()
         self.ppo_memory.save_all(states, actions, rewards, dones, next_states)
 
+    @torch.inference_mode()
     def act(self, state):
         state           = self.ppo_memory.transform(state).unsqueeze(0).to(self.device)
 
@@ -187,6 +189,7 @@ class AgentPPGClr():
               
         return to_list(action.squeeze(), self.use_gpu)
 
+    @torch.inference_mode()
     def logprobs(self, state, action):
         state           = self.ppo_memory.transform(state).unsqueeze(0).to(self.device)
         action          = torch.FloatTensor(action).unsqueeze(0).float().to(self.device)
@@ -209,9 +212,7 @@ class AgentPPGClr():
             'ppo_optimizer_state_dict': self.ppo_optimizer.state_dict(),
             'aux_ppg_optimizer_state_dict': self.aux_ppg_optimizer.state_dict(),
             'aux_clr_optimizer_state_dict': self.aux_clr_optimizer.state_dict(),
-            'ppo_scaler_state_dict': self.ppo_scaler.state_dict(),
-            'aux_ppg_scaler_state_dict': self.aux_ppg_scaler.state_dict(),
-            'aux_clr_scaler_state_dict': self.aux_clr_scaler.state_dict(),
+            'precision_state_dict': self.precision.state_dict(),
         }, self.folder + '/ppg_clr.tar')
         
     def load_weights(self, folder = None, device = None):
@@ -229,9 +230,8 @@ class AgentPPGClr():
         self.ppo_optimizer.load_state_dict(model_checkpoint['ppo_optimizer_state_dict'])        
         self.aux_ppg_optimizer.load_state_dict(model_checkpoint['aux_ppg_optimizer_state_dict'])   
         self.aux_clr_optimizer.load_state_dict(model_checkpoint['aux_clr_optimizer_state_dict'])
-        self.ppo_scaler.load_state_dict(model_checkpoint['ppo_scaler_state_dict'])        
-        self.aux_ppg_scaler.load_state_dict(model_checkpoint['aux_ppg_scaler_state_dict'])  
-        self.aux_clr_scaler.load_state_dict(model_checkpoint['aux_clr_scaler_state_dict'])
+        if 'precision_state_dict' in model_checkpoint:
+            self.precision.load_state_dict(model_checkpoint['precision_state_dict'])
 
         if self.is_training_mode:
             self.policy.train()
@@ -3,18 +3,23 @@ import torchvision.transforms as transforms
 from torch.optim import Adam
 from torch.utils.data import DataLoader
 
+from helpers.precision import Precision
 from agent.standard.deterministic_sac_cql import AgentCQL
 
 class AgentImageStateCql(AgentCQL):
     def __init__(self, cnn, soft_q, value, policy, state_dim, action_dim, distribution, q_loss, v_loss, policy_loss, memory, 
         soft_q_optimizer, value_optimizer, policy_optimizer, is_training_mode = True, batch_size = 32, epochs = 1, 
-        soft_tau = 0.95, folder = 'model', use_gpu = True):
+        soft_tau = 0.95, folder = 'model', use_gpu = True, precision = None):
 
         super().__init__(soft_q, value, policy, state_dim, action_dim, distribution, q_loss, v_loss, policy_loss, memory, 
-        soft_q_optimizer, value_optimizer, policy_optimizer, is_training_mode, batch_size, epochs, soft_tau, folder, use_gpu)
+        soft_q_optimizer, value_optimizer, policy_optimizer, is_training_mode, batch_size, epochs, soft_tau, folder, use_gpu, precision = precision)
 
         self.cnn = cnn
 
+        if precision is None:
+            self.precision = Precision('fp16', self.device)
+        self.precision.prepare(self.cnn)
+
         self.trans  = transforms.Compose([
             transforms.ToTensor(),
             transforms.Normalize((0.5, 0.5, 0.5), (0.5, 0.5, 0.5))
@@ -22,7 +27,7 @@ class AgentImageStateCql(AgentCQL):
 
     def _training_q(self, images, states, actions, rewards, dones, next_images, next_states):
         self.soft_q_optimizer.zero_grad()
-        with torch.cuda.amp.autocast():
+        with self.precision.autocast():
             res                         = self.cnn(images)
             next_res                    = self.cnn(next_images, True)
 
@@ -34,13 +39,11 @@ class AgentImageStateCql(AgentCQL):
 
             loss = self.qLoss.compute_loss(naive_predicted_q_value, predicted_q_value, rewards, dones, next_value)        
         
-        self.soft_q_scaler.scale(loss).backward()
-        self.soft_q_scaler.step(self.soft_q_optimizer)
-        self.soft_q_scaler.update()       
+        self.precision.step(loss, self.soft_q_optimizer, 'soft_q')
 
     def _training_values(self, images, states):
         self.value_optimizer.zero_grad()
-        with torch.cuda.amp.autocast():
+        with self.precision.autocast():
             res                 = self.cnn(images, True)
 
             predicted_actions   = self.policy(res, states, True)
@@ -50,13 +53,11 @@ class AgentImageStateCql(AgentCQL):
 
             loss = self.vLoss.compute_loss(predicted_value, q_value)
 
-        self.value_scaler.scale(loss).backward()
-        self.value_scaler.step(self.value_optimizer)
-        self.value_scaler.update()
+        self.precision.step(loss, self.value_optimizer, 'value')
 
     def _training_policy(self, images, states):
         self.policy_optimizer.zero_grad()
-        with torch.cuda.amp.autocast():
+        with self.precision.autocast():
             res                 = self.cnn(images, True)
 
             predicted_actions   = self.policy(res, states)
@@ -64,9 +65,7 @@ class AgentImageStateCql(AgentCQL):
 
             loss = self.policyLoss.compute_loss(q_value)
 
-        self.policy_scaler.scale(loss).backward()
-        self.policy_scaler.step(self.policy_optimizer)
-        self.policy_scaler.update()
+        self.precision.step(loss, self.policy_optimizer, 'policy')
 
     def _update_offpolicy(self):
         dataloader  = DataLoader(self.policy_memory, self.batch_size, shuffle = True, num_workers = 4)
@@ -85,6 +84,7 @@ class AgentImageStateCql(AgentCQL):
         images, states, actions, rewards, dones, next_images, next_states = policy_memory.get_all_items()
         self.memory.save_all(images, states, actions, rewards, dones, next_images, next_states)
         
+    @torch.inference_mode()
     def act(self, image, state):
         image, state        = self.trans(image).unsqueeze(0).to(self.device), torch.FloatTensor(state).unsqueeze(0).to(self.device)
 
@@ -105,9 +105,7 @@ class AgentImageStateCql(AgentCQL):
             'policy_optimizer_state_dict': self.policy_optimizer.state_dict(),
             'value_optimizer_state_dict': self.value_optimizer.state_dict(),
             'soft_q_optimizer_state_dict': self.soft_q_optimizer.state_dict(),
-            'policy_scaler_state_dict': self.policy_scaler.state_dict(),
-            'value_scaler_state_dict': self.value_scaler.state_dict(),
-            'soft_q_scaler_state_dict': self.soft_q_scaler.state_dict(),
+            'precision_state_dict': self.precision.state_dict(),
         }, self.folder + '/cql.tar')
         
     def load_weights(self, device = None):
@@ -123,9 +121,8 @@ class AgentImageStateCql(AgentCQL):
         self.policy_optimizer.load_state_dict(model_checkpoint['policy_optimizer_state_dict'])
         self.value_optimizer.load_state_dict(model_checkpoint['value_optimizer_state_dict'])
         self.soft_q_optimizer.load_state_dict(model_checkpoint['soft_q_optimizer_state_dict'])
-        self.policy_scaler.load_state_dict(model_checkpoint['policy_scaler_state_dict'])        
-        self.value_scaler.load_state_dict(model_checkpoint['value_scaler_state_dict'])
-        self.soft_q_scaler.load_state_dict(model_checkpoint['soft_q_scaler_state_dict'])
+        if 'precision_state_dict' in model_checkpoint:
+            self.precision.load_state_dict(model_checkpoint['precision_state_dict'])
 
         if self.is_training_mode:
             self.policy.train()
@@ -10,14 +10,15 @@ from agent.standard.ppg import AgentPPG
 class AgentImageStatePPG(AgentPPG):
     def __init__(self, cnn, policy, value, state_dim, action_dim, distribution, ppo_loss, aux_ppg_loss, ppo_memory, aux_ppg_memory, 
             ppo_optimizer, aux_ppg_optimizer, PPO_epochs = 10, Aux_epochs = 10, n_aux_update = 10, is_training_mode = True, policy_kl_range = 0.03, 
-            policy_params = 5, value_clip = 1.0, entropy_coef = 0.0, vf_loss_coef = 1.0, batch_size = 32,  folder = 'model', use_gpu = True):
+            policy_params = 5, value_clip = 1.0, entropy_coef = 0.0, vf_loss_coef = 1.0, batch_size = 32,  folder = 'model', use_gpu = True, precision = None):
 
         super().__init__(policy, value, state_dim, action_dim, distribution, ppo_loss, aux_ppg_loss, ppo_memory, aux_ppg_memory, 
             ppo_optimizer, aux_ppg_optimizer, PPO_epochs, Aux_epochs, n_aux_update, is_training_mode, policy_kl_range, 
-            policy_params, value_clip, entropy_coef, vf_loss_coef, batch_size,  folder, use_gpu)
+            policy_params, value_clip, entropy_coef, vf_loss_coef, batch_size,  folder, use_gpu, precision = precision)
 
         self.cnn        = cnn
         self.cnn_old    = copy.deepcopy(self.cnn)
+        self.precision.prepare(self.cnn, self.cnn_old)
 
         if self.is_training_mode:
             self.cnn.train()
@@ -25,38 +26,38 @@ class AgentImageStatePPG(AgentPPG):
             self.cnn.eval()
 
     def _training_ppo(self, images, states, actions, rewards, dones, next_images, next_states):
-        res                 = self.cnn(images)
+        with self.precision.autocast():
+            res                 = self.cnn(images)
 
-        action_datas, _     = self.policy(res, states)
-        values              = self.value(res, states)
+            action_datas, _     = self.policy(res, states)
+            values              = self.value(res, states)
         
-        res_old             = self.cnn_old(images, True)
+            res_old             = self.cnn_old(images, True)
 
-        old_action_datas, _ = self.policy_old(res_old, states, True)
-        old_values          = self.value_old(res_old, states, True)
+            old_action_datas, _ = self.policy_old(res_old, states, True)
+            old_values          = self.value_old(res_old, states, True)
 
-        next_res            = self.cnn(next_images, True)
-        next_values         = self.value(next_res, next_states, True)
+            next_res            = self.cnn(next_images, True)
+            next_values         = self.value(next_res, next_states, True)
 
-        loss = self.ppoLoss.compute_loss(action_datas, old_action_datas, values, old_values, next_values, actions, rewards, dones)
+            loss = self.ppoLoss.compute_loss(action_datas, old_action_datas, values, old_values, next_values, actions, rewards, dones)
         
         self.ppo_optimizer.zero_grad()
-        loss.backward()
-        self.ppo_optimizer.step()
+        self.precision.step(loss, self.ppo_optimizer, 'ppo')
 
     def _training_aux_ppg(self, images, states):
-        res                     = self.cnn(images, True)
+        with self.precision.autocast():
+            res                     = self.cnn(images, True)
 
-        returns                 = self.value(res, states, True)
-        old_action_datas, _     = self.policy_old(res, states, True)
+            returns                 = self.value(res, states, True)
+            old_action_datas, _     = self.policy_old(res, states, True)
         
-        action_datas, values    = self.policy(res, states)            
+            action_datas, values    = self.policy(res, states)            
 
-        loss = self.auxLoss.compute_loss(action_datas, old_action_datas, values, returns)
+            loss = self.auxLoss.compute_loss(action_datas, old_action_datas, values, returns)
 
         self.aux_ppg_optimizer.zero_grad()
-        loss.backward()
-        self.aux_ppg_optimizer.step()
+        self.precision.step(loss, self.aux_ppg_optimizer, 'aux_ppg')
 
     def _update_ppo(self):
         self.policy_old.load_state_dict(self.policy.state_dict())
@@ -86,6 +87,7 @@ class AgentImageStatePPG(AgentPPG):
         images, states, actions, rewards, dones, next_images, next_states = policy_memory.get_all_items()
         self.ppo_memory.save_all(images, states, actions, rewards, dones, next_images, next_states)
 
+    @torch.inference_mode()
     def act(self, image, state):
         image, state        = self.ppo_memory.transform(image).unsqueeze(0).to(self.device), torch.FloatTensor(state).unsqueeze(0).to(self.device)
         
@@ -99,6 +101,7 @@ class AgentImageStatePPG(AgentPPG):
               
         return action.squeeze().detach().tolist()
 
+    @torch.inference_mode()
     def logprobs(self, image, state, action):
         image, state    = self.ppo_memory.transform(image).unsqueeze(0).to(self.device), torch.FloatTensor(state).unsqueeze(0).to(self.device)
         action          = torch.FloatTensor(action).unsqueeze(0).float().to(self.device)
@@ -116,6 +119,7 @@ class AgentImageStatePPG(AgentPPG):
             'cnn_state_dict': self.cnn.state_dict(),
             'ppo_optimizer_state_dict': self.ppo_optimizer.state_dict(),
             'aux_ppg_optimizer_state_dict': self.aux_ppg_optimizer.state_dict(),
+            'precision_state_dict': self.precision.state_dict(),
         }, self.folder + '/ppg.tar')
         
     def load_weights(self, device = None):
@@ -128,6 +132,8 @@ class AgentImageStatePPG(AgentPPG):
         self.cnn.load_state_dict(model_checkpoint['cnn_state_dict'])
         self.ppo_optimizer.load_state_dict(model_checkpoint['ppo_optimizer_state_dict'])        
         self.aux_ppg_optimizer.load_state_dict(model_checkpoint['aux_ppg_optimizer_state_dict'])
+        if 'precision_state_dict' in model_checkpoint:
+            self.precision.load_state_dict(model_checkpoint['precision_state_dict'])
 
         if self.is_training_mode:
             self.policy.train()
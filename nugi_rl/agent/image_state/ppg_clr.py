@@ -10,11 +10,11 @@ from agent.standard.ppg import AgentPPG
 class AgentImageStatePPGClr(AgentPPG):
     def __init__(self, projector, cnn, policy, value, state_dim, action_dim, distribution, ppo_loss, aux_ppg_loss, aux_clr_loss, ppo_memory, aux_ppg_memory, aux_clr_memory,
             ppo_optimizer, aux_ppg_optimizer, aux_clr_optimizer, PPO_epochs = 10, aux_ppg_epochs = 10, aux_clr_epochs = 10, n_aux_update = 10, is_training_mode = True, policy_kl_range = 0.03, 
-            policy_params = 5, value_clip = 1.0, entropy_coef = 0.0, vf_loss_coef = 1.0, batch_size = 32,  folder = 'model', use_gpu = True):
+            policy_params = 5, value_clip = 1.0, entropy_coef = 0.0, vf_loss_coef = 1.0, batch_size = 32,  folder = 'model', use_gpu = True, precision = None):
 
         super().__init__(policy, value, state_dim, action_dim, distribution, ppo_loss, aux_ppg_loss, ppo_memory, aux_ppg_memory, 
             ppo_optimizer, aux_ppg_optimizer, PPO_epochs, aux_ppg_epochs, n_aux_update, is_training_mode, policy_kl_range, 
-            policy_params, value_clip, entropy_coef, vf_loss_coef, batch_size,  folder, use_gpu)
+            policy_params, value_clip, entropy_coef, vf_loss_coef, batch_size,  folder, use_gpu, precision = precision)
 
         self.cnn                = cnn
         self.projector          = projector
@@ -22,6 +22,8 @@ class AgentImageStatePPGClr(AgentPPG):
         self.cnn_old            = copy.deepcopy(self.cnn)
         self.projector_old      = copy.deepcopy(self.projector)
 
+        self.precision.prepare(self.cnn, self.cnn_old)
+
         self.aux_clrLoss        = aux_clr_loss
         self.aux_clr_memory     = aux_clr_memory
         self.aux_clr_optimizer  = aux_clr_optimizer
@@ -35,51 +37,51 @@ class AgentImageStatePPGClr(AgentPPG):
             self.projector.eval()
 
     def _training_ppo(self, images, states, actions, rewards, dones, next_images, next_states):
-        res                 = self.cnn(images)
+        with self.precision.autocast():
+            res                 = self.cnn(images)
 
-        action_datas, _     = self.policy(res, states)
-        values              = self.value(res, states)
+            action_datas, _     = self.policy(res, states)
+            values              = self.value(res, states)
         
-        res_old             = self.cnn_old(images, True)
+            res_old             = self.cnn_old(images, True)
 
-        old_action_datas, _ = self.policy_old(res_old, states, True)
-        old_values          = self.value_old(res_old, states, True)
+            old_action_datas, _ = self.policy_old(res_old, states, True)
+            old_values          = self.value_old(res_old, states, True)
 
-        next_res            = self.cnn(next_images, True)
-        next_values         = self.value(next_res, next_states, True)
+            next_res            = self.cnn(next_images, True)
+            next_values         = self.value(next_res, next_states, True)
 
-        loss = self.ppoLoss.compute_loss(action_datas, old_action_datas, values, old_values, next_values, actions, rewards, dones)
+            loss = self.ppoLoss.compute_loss(action_datas, old_action_datas, values, old_values, next_values, actions, rewards, dones)
 
         self.ppo_optimizer.zero_grad()
-        loss.backward()
-        self.ppo_optimizer.step()
+        self.precision.step(loss, self.ppo_optimizer, 'ppo')
 
     def _training_aux_ppg(self, images, states):
-        res                     = self.cnn(images, True)
+        with self.precision.autocast():
+            res                     = self.cnn(images, True)
 
-        returns                 = self.value(res, states, True)
-        old_action_datas, _     = self.policy_old(res, states, True)
+            returns                 = self.value(res, states, True)
+            old_action_datas, _     = self.policy_old(res, states, True)
 
-        action_datas, values    = self.policy(res, states)                        
+            action_datas, values    = self.policy(res, states)                        
 
-        loss = self.auxLoss.compute_loss(action_datas, old_action_datas, values, returns)
+            loss = self.auxLoss.compute_loss(action_datas, old_action_datas, values, returns)
 
         self.aux_ppg_optimizer.zero_grad()
-        loss.backward()
-        self.aux_ppg_optimizer.step()
+        self.precision.step(loss, self.aux_ppg_optimizer, 'aux_ppg')
 
     def _training_aux_clr(self, input_images, target_images):
-        res_anchor        = self.cnn(input_images)
-        encoded_anchor    = self.projector(res_anchor)
+        with self.precision.autocast():
+            res_anchor        = self.cnn(input_images)
+            encoded_anchor    = self.projector(res_anchor)
 
-        res_target        = self.cnn_old(target_images, True)
-        encoded_target    = self.projector_old(res_target, True)
+            res_target        = self.cnn_old(target_images, True)
+            encoded_target    = self.projector_old(res_target, True)
 
-        loss = self.aux_clrLoss.compute_loss(encoded_anchor, encoded_target)
+            loss = self.aux_clrLoss.compute_loss(encoded_anchor, encoded_target)
 
         self.aux_clr_optimizer.zero_grad()
-        loss.backward()
-        self.aux_clr_optimizer.step()
+        self.precision.step(loss, self.aux_clr_optimizer, 'aux_clr')
 
     def _update_ppo(self):
         self.policy_old.load_state_dict(self.policy.state_dict())
@@ -132,6 +134,7 @@ class AgentImageStatePPGClr(AgentPPG):
         images, states, actions, rewards, dones, next_images, next_states = policy_memory.get_all_items()
         self.ppo_memory.save_all(images, states, actions, rewards, dones, next_images, next_states)
 
+    @torch.inference_mode()
     def act(self, image, state):
         image, state        = self.ppo_memory.transform(image).unsqueeze(0).to(self.device), torch.FloatTensor(state).unsqueeze(0).to(self.device)
         
@@ -145,6 +148,7 @@ class AgentImageStatePPGClr(AgentPPG):
               
         return action.squeeze().detach().tolist()
 
+    @torch.inference_mode()
     def logprobs(self, image, state, action):
         image, state    = self.ppo_memory.transform(image).unsqueeze(0).to(self.device), torch.FloatTensor(state).unsqueeze(0).to(self.device)
         action          = torch.FloatTensor(action).unsqueeze(0).float().to(self.device)
@@ -164,9 +168,7 @@ class AgentImageStatePPGClr(AgentPPG):
             'ppo_optimizer_state_dict': self.ppo_optimizer.state_dict(),
             'aux_ppg_optimizer_state_dict': self.aux_ppg_optimizer.state_dict(),
             'aux_clr_optimizer_state_dict': self.aux_clr_optimizer.state_dict(),
-            'ppo_scaler_state_dict': self.ppo_scaler.state_dict(),
-            'aux_ppg_scaler_state_dict': self.aux_ppg_scaler.state_dict(),
-            'aux_clr_scaler_state_dict': self.aux_clr_scaler.state_dict(),
+            'precision_state_dict': self.precision.state_dict(),
         }, self.folder + '/ppg.tar')
         
     def load_weights(self, device = None):
@@ -181,9 +183,8 @@ class AgentImageStatePPGClr(AgentPPG):
         self.ppo_optimizer.load_state_dict(model_checkpoint['ppo_optimizer_state_dict'])        
         self.aux_ppg_optimizer.load_state_dict(model_checkpoint['aux_ppg_optimizer_state_dict'])   
         self.aux_clr_optimizer.load_state_dict(model_checkpoint['aux_clr_optimizer_state_dict'])
-        self.ppo_scaler.load_state_dict(model_checkpoint['ppo_scaler_state_dict'])        
-        self.aux_ppg_scaler.load_state_dict(model_checkpoint['aux_ppg_scaler_state_dict'])  
-        self.aux_clr_scaler.load_state_dict(model_checkpoint['aux_clr_scaler_state_dict'])
+        if 'precision_state_dict' in model_checkpoint:
+            self.precision.load_state_dict(model_checkpoint['precision_state_dict'])
 
         if self.is_training_mode:
             self.policy.train()
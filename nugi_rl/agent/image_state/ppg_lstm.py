@@ -9,14 +9,15 @@ from agent.standard.ppg import AgentPPG
 class AgentImageStatePpgLstm(AgentPPG):
     def __init__(self, cnn, policy, value, state_dim, action_dim, distribution, ppo_loss, aux_ppg_loss, ppo_memory, aux_ppg_memory, ppo_optimizer, 
             aux_ppg_optimizer, PPO_epochs = 10, aux_ppg_epochs = 10, n_aux_update = 10, is_training_mode = True, policy_kl_range = 0.03, 
-            policy_params = 5, value_clip = 1.0, entropy_coef = 0.0, vf_loss_coef = 1.0, batch_size = 32,  folder = 'model', use_gpu = True):
+            policy_params = 5, value_clip = 1.0, entropy_coef = 0.0, vf_loss_coef = 1.0, batch_size = 32,  folder = 'model', use_gpu = True, precision = None):
 
         super().__init__(policy, value, state_dim, action_dim, distribution, ppo_loss, aux_ppg_loss, ppo_memory, aux_ppg_memory, 
             ppo_optimizer, aux_ppg_optimizer, PPO_epochs, aux_ppg_epochs, n_aux_update, is_training_mode, policy_kl_range, 
-            policy_params, value_clip, entropy_coef, vf_loss_coef, batch_size,  folder, use_gpu)
+            policy_params, value_clip, entropy_coef, vf_loss_coef, batch_size,  folder, use_gpu, precision = precision)
 
         self.cnn                = cnn
         self.cnn_old            = copy.deepcopy(self.cnn)
+        self.precision.prepare(self.cnn, self.cnn_old)
 
         if self.is_training_mode:
             self.cnn.train()
@@ -24,35 +25,35 @@ class AgentImageStatePpgLstm(AgentPPG):
             self.cnn.eval()
 
     def _training_ppo(self, images, states, actions, rewards, dones, next_images, next_states):
-        batch_size, timesteps, C, H, W  = images.shape
-        images              = images.reshape(timesteps * batch_size, C, H, W)
-        next_images         = next_images.reshape(timesteps * batch_size, C, H, W)
+        with self.precision.autocast():
+            batch_size, timesteps, C, H, W  = images.shape
+            images              = images.reshape(timesteps * batch_size, C, H, W)
+            next_images         = next_images.reshape(timesteps * batch_size, C, H, W)
 
-        res                 = self.cnn(images)
-        res                 = res.reshape(timesteps, batch_size, res.shape[-1])
+            res                 = self.cnn(images)
+            res                 = res.reshape(timesteps, batch_size, res.shape[-1])
 
-        action_datas, _     = self.policy(res, states)
-        values              = self.value(res, states)
+            action_datas, _     = self.policy(res, states)
+            values              = self.value(res, states)
         
-        res_old             = self.cnn_old(images, True)
-        res_old             = res_old.reshape(timesteps, batch_size, res_old.shape[-1])
+            res_old             = self.cnn_old(images, True)
+            res_old             = res_old.reshape(timesteps, batch_size, res_old.shape[-1])
 
-        old_action_datas, _ = self.policy_old(res_old, states, True)
-        old_values          = self.value_old(res_old, states, True)
+            old_action_datas, _ = self.policy_old(res_old, states, True)
+            old_values          = self.value_old(res_old, states, True)
 
-        next_res            = self.cnn(next_images, True)
-        next_res            = next_res.reshape(timesteps, batch_size, next_res.shape[-1])
+            next_res            = self.cnn(next_images, True)
+            next_res            = next_res.reshape(timesteps, batch_size, next_res.shape[-1])
 
-        next_values         = self.value(next_res, next_states, True)
+            next_values         = self.value(next_res, next_states, True)
 
-        loss = self.ppoLoss.compute_loss(action_datas, old_action_datas, values, old_values, next_values, actions, rewards, dones)
+            loss = self.ppoLoss.compute_loss(action_datas, old_action_datas, values, old_values, next_values, actions, rewards, dones)
 
         self.ppo_optimizer.zero_grad()
-        loss.backward()
-        self.ppo_optimizer.step()
+        self.precision.step(loss, self.ppo_optimizer, 'ppo')
 
     def _training_aux_ppg(self, images, states):                
-        with torch.cuda.amp.autocast():
+        with self.precision.autocast():
             batch_size, timesteps, C, H, W  = images.shape
             images                  = images.reshape(timesteps * batch_size, C, H, W)
 
@@ -67,8 +68,7 @@ class AgentImageStatePpgLstm(AgentPPG):
             loss = self.auxLoss.compute_loss(action_datas, old_action_datas, values, returns)
 
         self.aux_ppg_optimizer.zero_grad()
-        loss.backward()
-        self.aux_ppg_optimizer.step()
+        self.precision.step(loss, self.aux_ppg_optimizer, 'aux_ppg')
 
     def _update_ppo(self):
         self.policy_old.load_state_dict(self.policy.state_dict())
@@ -107,6 +107,7 @@ class AgentImageStatePpgLstm(AgentPPG):
         images, states, actions, rewards, dones, next_images, next_states = policy_memory.get_all_items()
         self.ppo_memory.save_all(images, states, actions, rewards, dones, next_images, next_states)
 
+    @torch.inference_mode()
     def act(self, images, state):
         images, state       = self.ppo_memory.transform(images).unsqueeze(0).to(self.device), torch.FloatTensor(state).unsqueeze(0).to(self.device)
 
@@ -125,6 +126,7 @@ class AgentImageStatePpgLstm(AgentPPG):
               
         return action.squeeze().detach().tolist()
 
+    @torch.inference_mode()
     def logprobs(self, images, state, action):
         images, state   = self.ppo_memory.transform(images).unsqueeze(0).to(self.device), torch.FloatTensor(state).unsqueeze(0).to(self.device)
         action          = torch.FloatTensor(action).unsqueeze(0).float().to(self.device)
@@ -147,8 +149,7 @@ class AgentImageStatePpgLstm(AgentPPG):
             'cnn_state_dict': self.cnn.state_dict(),
             'ppo_optimizer_state_dict': self.ppo_optimizer.state_dict(),
             'aux_ppg_optimizer_state_dict': self.aux_ppg_optimizer.state_dict(),
-            'ppo_scaler_state_dict': self.ppo_scaler.state_dict(),
-            'aux_ppg_scaler_state_dict': self.aux_ppg_scaler.state_dict(),
+            'precision_state_dict': self.precision.state_dict(),
         }, self.folder + '/ppg.tar')
         
     def load_weights(self, device = None):
@@ -161,8 +162,8 @@ class AgentImageStatePpgLstm(AgentPPG):
         self.cnn.load_state_dict(model_checkpoint['cnn_state_dict'])
         self.ppo_optimizer.load_state_dict(model_checkpoint['ppo_optimizer_state_dict'])        
         self.aux_ppg_optimizer.load_state_dict(model_checkpoint['aux_ppg_optimizer_state_dict'])   
-        self.ppo_scaler.load_state_dict(model_checkpoint['ppo_scaler_state_dict'])        
-        self.aux_ppg_scaler.load_state_dict(model_checkpoint['aux_ppg_scaler_state_dict'])
+        if 'precision_state_dict' in model_checkpoint:
+            self.precision.load_state_dict(model_checkpoint['precision_state_dict'])
 
         if self.is_training_mode:
             self.policy.train()
@@ -1,14 +1,18 @@
 import torch
-from torch.utils.data import DataLoader, SubsetRandomSampler
 from copy import deepcopy
 
-from helpers.pytorch_utils import set_device, copy_parameters, to_list
+from helpers.pytorch_utils import set_device, to_list
+from helpers.inference import InferencePolicy
+from helpers.precision import Precision
+from helpers.target_network import TargetNetworks
+from helpers.utd_scheduler import UTDScheduler
 
 class AgentDDPG():
     def __init__(self, soft_q, policy, state_dim, action_dim, q_loss, policy_loss, memory, 
         soft_q_optimizer, policy_optimizer, is_training_mode = True, batch_size = 32, epochs = 1, 
         soft_tau = 0.95, folder = 'model', device = torch.device('cuda:0'), 
-        target_policy = None, target_soft_q = None):
+        target_policy = None, target_soft_q = None, compile_policy = None, precision = None, target_update_every = 1, 
+        utd_ratio = None, env_steps_per_update = 1, compile_update = None):
 
         self.batch_size         = batch_size
         self.is_training_mode   = is_training_mode
@@ -27,8 +31,10 @@ class AgentDDPG():
         self.qLoss              = q_loss
         self.policyLoss         = policy_loss
 
-        self.memory             = memory
+        self.agent_memory       = memory
         self.device             = device
+        self.acting_policy      = InferencePolicy(self.policy, self.device, compile_policy)
+        self.precision          = precision if precision is not None else Precision('fp16', self.device)
         self.q_update           = 1
         
         self.soft_q_optimizer   = soft_q_optimizer
@@ -40,74 +46,82 @@ class AgentDDPG():
         if self.target_soft_q is None:
             self.target_soft_q  = deepcopy(self.soft_q)
 
+        self.target_networks    = TargetNetworks([(self.soft_q, self.target_soft_q), (self.policy, self.target_policy)], self.soft_tau, target_update_every)
+
+        # without a utd_ratio every update call takes `epochs` gradient steps, like before
+        self.update_scheduler   = UTDScheduler(self.agent_memory, self.batch_size, utd_ratio if utd_ratio is not None else epochs, 
+            env_steps_per_update, self.device)
+        self._training_step     = UTDScheduler.compile(self._training_step, compile_update)
+
     @property
     def memory(self):
-        return self.memory
+        return self.agent_memory
 
-    def _training_q(self, states, actions, rewards, dones, next_states):
+    def _training_q(self, states, actions, rewards, dones, next_states, indices = None, weights = None):
         self.soft_q_optimizer.zero_grad()
-        with torch.cuda.amp.autocast():            
+        with self.precision.autocast():            
             predicted_next_actions      = self.target_policy(next_states, True)
             target_next_q               = self.target_soft_q(next_states, predicted_next_actions, True)
 
             predicted_q_value           = self.soft_q(states, actions)
 
-            loss    = self.qLoss.compute_loss(predicted_q_value, target_next_q, rewards, dones)
+            loss    = self.qLoss.compute_loss(predicted_q_value, target_next_q, rewards, dones, weights)
         
-        self.soft_q_scaler.scale(loss).backward()
-        self.soft_q_scaler.step(self.soft_q_optimizer)
-        self.soft_q_scaler.update()
+        self.precision.step(loss, self.soft_q_optimizer, 'soft_q')
+
+        if weights is not None:
+            td_errors = self.qLoss.compute_td_error(predicted_q_value, target_next_q, rewards, dones)
+            self.agent_memory.update_priorities(indices, td_errors.float().cpu().numpy())
 
     def _training_policy(self, states):
         self.policy_optimizer.zero_grad()
-        with torch.cuda.amp.autocast():
+        with self.precision.autocast():
             predicted_actions   = self.policy(states)
             predicted_q_value   = self.soft_q(states, predicted_actions)
 
             loss    = self.policyLoss.compute_loss(predicted_q_value)
 
-        self.policy_scaler.scale(loss).backward()
-        self.policy_scaler.step(self.policy_optimizer)
-        self.policy_scaler.update()
+        self.precision.step(loss, self.policy_optimizer, 'policy')
 
-    def _update_offpolicy(self):
-        if len(self.memory) > self.batch_size:
-            for _ in range(self.epochs):
-                indices     = torch.randperm(len(self.memory))[:self.batch_size]
-                indices     = len(self.memory) - indices - 1
+    def _training_step(self, states, actions, rewards, dones, next_states, indices = None, weights = None):
+        self._training_q(states, actions, rewards, dones, next_states, indices, weights)
+        self._training_policy(states)
 
-                dataloader  = DataLoader(self.memory, self.batch_size, sampler = SubsetRandomSampler(indices), num_workers = 8)                
-                for states, actions, rewards, dones, next_states in dataloader:
-                    self._training_q(states.to(self.device), actions.to(self.device), rewards.to(self.device), dones.to(self.device), next_states.to(self.device))
-                    self._training_policy(states.to(self.device))
+        self.target_networks.update()
 
-                    self.target_soft_q = copy_parameters(self.soft_q, self.target_soft_q, self.soft_tau)
-                    self.target_policy = copy_parameters(self.policy, self.target_policy, self.soft_tau)
+    def _update_offpolicy(self):
+        if len(self.memory) > self.batch_size:
+            for states, actions, rewards, dones, next_states, indices, weights in self.update_scheduler:
+                self._training_step(states, actions, rewards, dones, next_states, indices, weights)
 
     def save_memory(self, policy_memory):
         states, actions, rewards, dones, next_states = policy_memory.get_all_items()
         self.memory.save_all(states, actions, rewards, dones, next_states)
         
+    @torch.inference_mode()
     def act(self, state):
-        state   = torch.FloatTensor(state).unsqueeze(0).to(self.device)
-        action  = self.policy(state)
+        action  = self.acting_policy(state, unsqueeze = True)
                       
-        return to_list(action.squeeze(), self.use_gpu)
+        return action.squeeze().detach().cpu().numpy()
+
+    @torch.inference_mode()
+    def act_batch(self, states):
+        actions = self.acting_policy(states)
+
+        return actions.cpu().numpy()
 
     def update(self):
         self._update_offpolicy()
-        
+
+        self.acting_policy.refresh()
+
     def save_weights(self):
         torch.save({
             'policy_state_dict': self.policy.state_dict(),
-            'value_state_dict': self.value.state_dict(),
             'soft_q_state_dict': self.soft_q.state_dict(),
             'policy_optimizer_state_dict': self.policy_optimizer.state_dict(),
-            'value_optimizer_state_dict': self.value_optimizer.state_dict(),
             'soft_q_optimizer_state_dict': self.soft_q_optimizer.state_dict(),
-            'policy_scaler_state_dict': self.policy_scaler.state_dict(),
-            'value_scaler_state_dict': self.value_scaler.state_dict(),
-            'soft_q_scaler_state_dict': self.soft_q_scaler.state_dict(),
+            'precision_state_dict': self.precision.state_dict(),
         }, self.folder + '/cql.tar')
         
     def load_weights(self, device = None):
@@ -120,15 +134,17 @@ class AgentDDPG():
         self.soft_q.load_state_dict(model_checkpoint['soft_q_state_dict'])
         self.policy_optimizer.load_state_dict(model_checkpoint['policy_optimizer_state_dict'])
         self.soft_q_optimizer.load_state_dict(model_checkpoint['soft_q_optimizer_state_dict'])
-        self.policy_scaler.load_state_dict(model_checkpoint['policy_scaler_state_dict']) 
-        self.soft_q_scaler.load_state_dict(model_checkpoint['soft_q_scaler_state_dict'])
+        if 'precision_state_dict' in model_checkpoint:
+            self.precision.load_state_dict(model_checkpoint['precision_state_dict'])
 
         if self.is_training_mode:
             self.policy.train()
-            self.value.train()
+            self.soft_q.train()
             print('Model is training...')
 
         else:
             self.policy.eval()
-            self.value.eval()
-            print('Model is evaluating...')
\ No newline at end of file
+            self.soft_q.eval()
+            print('Model is evaluating...')
+
+        self.acting_policy.refresh()
\ No newline at end of file
@@ -1,13 +1,16 @@
 import torch
-from torch.utils.data import DataLoader, SubsetRandomSampler
 from copy import deepcopy
 
-from helpers.pytorch_utils import set_device, to_list, copy_parameters
+from helpers.pytorch_utils import set_device, to_list
+from helpers.inference import InferencePolicy
+from helpers.precision import Precision
+from helpers.target_network import TargetNetworks
+from helpers.critic import Critics
 
 class AgentCQL():
     def __init__(self, soft_q1, soft_q2, policy, value, state_dim, action_dim, q_loss, policy_loss, value_loss, memory, 
         soft_q_optimizer, policy_optimizer, value_optimizer, is_training_mode = True, batch_size = 32, epochs = 1, 
-        soft_tau = 0.95, folder = 'model', device = torch.device('cuda:0'), target_value = None):
+        soft_tau = 0.95, folder = 'model', device = torch.device('cuda:0'), target_value = None, compile_policy = None, precision = None, target_update_every = 1):
 
         self.batch_size         = batch_size
         self.is_training_mode   = is_training_mode
@@ -20,6 +23,7 @@ class AgentCQL():
         self.policy             = policy
         self.soft_q1            = soft_q1
         self.soft_q2            = soft_q2
+        self.critics            = Critics(self.soft_q1, self.soft_q2)
         self.value              = value
 
         self.target_value       = target_value
@@ -30,6 +34,8 @@ class AgentCQL():
 
         self.agent_memory       = memory
         self.device             = device
+        self.acting_policy      = InferencePolicy(self.policy, self.device, compile_policy)
+        self.precision          = precision if precision is not None else Precision('fp32', self.device)
         
         self.soft_q_optimizer   = soft_q_optimizer
         self.policy_optimizer   = policy_optimizer
@@ -38,90 +44,103 @@ class AgentCQL():
         if self.target_value is None:
             self.target_value = deepcopy(self.value)
 
+        self.target_networks    = TargetNetworks([(self.value, self.target_value)], self.soft_tau, target_update_every)
+
     @property
     def memory(self):
         return self.agent_memory
 
-    def _training_q(self, states, actions, rewards, dones, next_states):
-        target_next_value   = self.target_value(next_states, True)
+    def _training_q(self, states, actions, rewards, dones, next_states, indices = None, weights = None):
+        with self.precision.autocast():
+            target_next_value   = self.target_value(next_states, True)
 
-        q1_value            = self.soft_q1(states, actions)
-        q2_value            = self.soft_q2(states, actions)
+            q1_value, q2_value              = self.critics.all(states, actions)
 
-        predicted_actions   = self.policy(states, True)
-        naive_q1_value      = self.soft_q1(states, predicted_actions)
-        naive_q2_value      = self.soft_q2(states, predicted_actions)
+            predicted_actions               = self.policy(states, True)
+            naive_q1_value, naive_q2_value  = self.critics.all(states, predicted_actions)
 
-        loss    = self.qLoss.compute_loss(q1_value, q2_value, naive_q1_value, naive_q2_value, target_next_value, rewards, dones)
+            loss    = self.qLoss.compute_loss(q1_value, q2_value, naive_q1_value, naive_q2_value, target_next_value, rewards, dones, weights)
 
         self.soft_q_optimizer.zero_grad()
-        loss.backward()
-        self.soft_q_optimizer.step()
+        self.precision.step(loss, self.soft_q_optimizer, 'soft_q')
+
+        if weights is not None:
+            td_errors = self.qLoss.compute_td_error(q1_value, q2_value, target_next_value, rewards, dones)
+            self.agent_memory.update_priorities(indices, td_errors.reshape(-1, len(states)).mean(0).cpu().numpy())
 
     def _training_value(self, states):
-        actions         = self.policy(states, True)
+        with self.precision.autocast():
+            actions         = self.policy(states, True)
 
-        q1_value        = self.soft_q1(states, actions, True)
-        q2_value        = self.soft_q2(states, actions, True)
+            q1_value, q2_value  = self.critics.pair(states, actions, True)
 
-        predicted_value = self.value(states)
+            predicted_value = self.value(states)
 
-        loss    = self.valueLoss.compute_loss(predicted_value, q1_value, q2_value)
+            loss    = self.valueLoss.compute_loss(predicted_value, q1_value, q2_value)
 
         self.value_optimizer.zero_grad()
-        loss.backward()
-        self.value_optimizer.step()
+        self.precision.step(loss, self.value_optimizer, 'value')
 
     def _training_policy(self, states):
-        actions     = self.policy(states)
+        with self.precision.autocast():
+            actions     = self.policy(states)
 
-        q1_value    = self.soft_q1(states, actions)
-        q2_value    = self.soft_q2(states, actions)
+            q1_value, q2_value  = self.critics.pair(states, actions)
 
-        loss    = self.policyLoss.compute_loss(q1_value, q2_value)
+            loss    = self.policyLoss.compute_loss(q1_value, q2_value)
 
         self.policy_optimizer.zero_grad()
-        loss.backward()
-        self.policy_optimizer.step()
+        self.precision.step(loss, self.policy_optimizer, 'policy')
 
     def _update_cql(self):        
         for _ in range(self.epochs):
-            # indices     = torch.randperm(len(self.agent_memory))[:self.batch_size]
-            indices     = torch.arange(-self.batch_size, 0)
+            indices, weights    = self.agent_memory.sample_indices(self.batch_size)
 
-            dataloader  = DataLoader(self.agent_memory, self.batch_size, sampler = SubsetRandomSampler(indices), num_workers = 8)                
-            for states, actions, rewards, dones, next_states in dataloader:         
-                actions = actions.clamp(-1, 1)
-                       
-                self._training_q(states.to(self.device), actions.to(self.device), rewards.to(self.device), dones.to(self.device), next_states.to(self.device))
-                self._training_value(states.to(self.device))
-                self._training_policy(states.to(self.device))
+            states, actions, rewards, dones, next_states = self.agent_memory.sample_batch(indices)
+            actions = actions.clamp(-1, 1)
 
-                self.target_value = copy_parameters(self.value, self.target_value, self.soft_tau)
+            if weights is not None:
+                weights = weights.to(self.device)
+                   
+            self._training_q(states.to(self.device), actions.to(self.device), rewards.to(self.device), dones.to(self.device), next_states.to(self.device), 
+                indices, weights)
+            self._training_value(states.to(self.device))
+            self._training_policy(states.to(self.device))
+
+            self.target_networks.update()
 
     def update(self):
         if len(self.agent_memory) > self.batch_size:
             self._update_cql()
 
+        self.acting_policy.refresh()
+
     def save_memory(self, policy_memory):
         states, actions, rewards, dones, next_states = policy_memory.get_all_items()
         self.agent_memory.save_all(states, actions, rewards, dones, next_states)
         
+    @torch.inference_mode()
     def act(self, state):
-        state   = torch.FloatTensor(state).unsqueeze(0).to(self.device)
-        action  = self.policy(state)
+        action  = self.acting_policy(state, unsqueeze = True)
               
-        return action.squeeze().detach().tolist()
+        return action.squeeze().detach().cpu().numpy()
+
+    @torch.inference_mode()
+    def act_batch(self, states):
+        actions = self.acting_policy(states)
+
+        return actions.cpu().numpy()
 
     def save_weights(self):
         torch.save({
             'policy_state_dict': self.policy.state_dict(),
             'soft_q1_state_dict': self.soft_q1.state_dict(),
-            'soft_q2_state_dict': self.soft_q2.state_dict(),
+            'soft_q2_state_dict': self.soft_q2.state_dict() if self.soft_q2 is not None else None,
             'value_state_dict': self.value.state_dict(),
             'policy_optimizer_state_dict': self.policy_optimizer.state_dict(),
             'soft_q_optimizer_state_dict': self.soft_q_optimizer.state_dict(),
             'value_optimizer_state_dict': self.value_optimizer.state_dict(),
+            'precision_state_dict': self.precision.state_dict(),
         }, self.folder + '/cql.tar')
         
     def load_weights(self, device = None):
@@ -132,8 +151,13 @@ class AgentCQL():
         
         self.policy.load_state_dict(model_checkpoint['policy_state_dict'])
         self.soft_q1.load_state_dict(model_checkpoint['soft_q1_state_dict'])
-        self.soft_q2.load_state_dict(model_checkpoint['soft_q2_state_dict'])
+        if self.soft_q2 is not None:
+            self.soft_q2.load_state_dict(model_checkpoint['soft_q2_state_dict'])
         self.value.load_state_dict(model_checkpoint['value_state_dict'])
         self.policy_optimizer.load_state_dict(model_checkpoint['policy_optimizer_state_dict'])
         self.soft_q_optimizer.load_state_dict(model_checkpoint['soft_q_optimizer_state_dict'])
-        self.value_optimizer.load_state_dict(model_checkpoint['value_optimizer_state_dict'])
\ No newline at end of file
+        self.value_optimizer.load_state_dict(model_checkpoint['value_optimizer_state_dict'])
+        if 'precision_state_dict' in model_checkpoint:
+            self.precision.load_state_dict(model_checkpoint['precision_state_dict'])
+
+        self.acting_policy.refresh()
\ No newline at end of file
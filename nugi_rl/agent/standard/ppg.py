@@ -1,12 +1,17 @@
 
 from copy import deepcopy
 import torch
-from torch.utils.data import DataLoader
+
+from helpers.data_loader import PrefetchLoader
+from helpers.inference import InferencePolicy
+from helpers.precision import Precision
+from helpers.pytorch_utils import cat_datas, split_datas
 
 class AgentPPG():  
     def __init__(self, policy, value, distribution, ppo_loss, aux_ppg_loss, ppo_memory, aux_ppg_memory, 
                 ppo_optimizer, aux_ppg_optimizer, ppo_epochs = 10, aux_ppg_epochs = 10, n_aux_update = 10, is_training_mode = True, 
-                batch_size = 32,  folder = 'model', device = torch.device('cuda:0'), policy_old = None, value_old = None):   
+                batch_size = 32,  folder = 'model', device = torch.device('cuda:0'), policy_old = None, value_old = None, num_workers = 0, 
+                precompute_advantages = False, n_envs = 1, compile_policy = None, precision = None):   
 
         self.batch_size         = batch_size  
         self.ppo_epochs         = ppo_epochs
@@ -14,6 +19,8 @@ class AgentPPG():
         self.is_training_mode   = is_training_mode
         self.folder             = folder
         self.n_aux_update       = n_aux_update
+        self.precompute_advantages  = precompute_advantages
+        self.n_envs             = n_envs
 
         self.policy             = policy
         self.policy_old         = policy_old
@@ -29,6 +36,8 @@ class AgentPPG():
         self.auxLoss            = aux_ppg_loss      
 
         self.device             = device
+        self.acting_policy      = InferencePolicy(self.policy, self.device, compile_policy)
+        self.precision          = precision if precision is not None else Precision('fp32', self.device)
         self.i_update           = 0
 
         self.ppo_optimizer      = ppo_optimizer
@@ -40,6 +49,9 @@ class AgentPPG():
         if self.value_old is None:
             self.value_old  = deepcopy(self.value)
 
+        self.ppo_loader         = PrefetchLoader(self.ppo_memory, self.batch_size, False, num_workers, self.device)
+        self.aux_ppg_loader     = PrefetchLoader(self.aux_ppg_memory, self.batch_size, False, num_workers, self.device)
+
         if is_training_mode:
           self.policy.train()
           self.value.train()
@@ -51,54 +63,108 @@ class AgentPPG():
     def memory(self):
         return self.ppo_memory
 
-    def _training_ppo(self, states, actions, rewards, dones, next_states): 
-        action_datas, _     = self.policy(states)
-        values              = self.value(states)
+    def _training_ppo(self, states, actions, rewards, dones, next_states, extras): 
+        with self.precision.autocast():
+            # old policy outputs and old values were cached once for the whole rollout by _compute_advantages
+            action_datas, _     = self.policy(states)
+            values              = self.value(states)
 
-        old_action_datas, _ = self.policy_old(states, True)
-        old_values          = self.value_old(states, True)
-        next_values         = self.value(next_states, True)
-
-        loss = self.ppoLoss.compute_loss(action_datas, old_action_datas, values, old_values, next_values, actions, rewards, dones)
+            loss = self.ppoLoss.compute_loss(action_datas, extras['old_action_datas'], values, extras['old_values'], extras.get('next_values'), actions, 
+                rewards, dones, extras.get('advantages'), extras.get('returns'))
 
         self.ppo_optimizer.zero_grad()
-        loss.backward()
-        self.ppo_optimizer.step()
+        self.precision.step(loss, self.ppo_optimizer, 'ppo')
 
     def _training_aux_ppg(self, states):  
-        action_datas, values    = self.policy(states)
+        with self.precision.autocast():
+            action_datas, values    = self.policy(states)
 
-        returns                 = self.value(states, True)
-        old_action_datas, _     = self.policy_old(states, True)
+            returns                 = self.value(states, True)
+            old_action_datas, _     = self.policy_old(states, True)
 
-        loss = self.auxLoss.compute_loss(action_datas, old_action_datas, values, returns)
+            loss = self.auxLoss.compute_loss(action_datas, old_action_datas, values, returns)
 
         self.aux_ppg_optimizer.zero_grad()
-        loss.backward()
-        self.aux_ppg_optimizer.step()
+        self.precision.step(loss, self.aux_ppg_optimizer, 'aux_ppg')
+
+    def _compute_advantages(self):
+        old_action_datas, actions, values, next_values, rewards, dones = [], [], [], [], [], []
+
+        with torch.no_grad():
+            for states, action, reward, done, next_states, *_ in self.ppo_memory.iter_minibatches(self.batch_size, shuffle = False):
+                states, next_states = states.float().to(self.device), next_states.float().to(self.device)
+
+                action_datas, _     = self.policy_old(states)
+                value, next_value   = split_datas(self.value_old(torch.cat((states, next_states))), len(states))
+
+                old_action_datas.append(action_datas)
+                actions.append(action.float().to(self.device))
+                values.append(value)
+                next_values.append(next_value)
+                rewards.append(reward.float().to(self.device))
+                dones.append(done.float().to(self.device))
+
+            old_action_datas, actions   = cat_datas(old_action_datas), torch.cat(actions)
+            values, next_values, rewards, dones = [torch.cat(datas).reshape(-1, self.n_envs, 1) for datas in (values, next_values, rewards, dones)]
+
+            # with several envs the rollout is interleaved per env step, advantages are only correct over the whole [T, n_envs] rollout
+            if not (self.precompute_advantages or self.n_envs > 1 or 'worker_logprobs' in self.ppo_memory.extras):
+                # advantages stay per minibatch, but the old outputs still come from this single pass instead of one per minibatch and epoch
+                self.ppo_memory.save_extras(old_action_datas = old_action_datas, old_values = values.reshape(-1, 1), next_values = next_values.reshape(-1, 1))
+                return
+
+            # worker logprobs are only used by an advantage function that does the v-trace correction, gae ignores them
+            if 'worker_logprobs' in self.ppo_memory.extras and hasattr(self.ppoLoss.advantage_function, 'compute_vtrace'):
+                worker_logprobs     = self.ppo_memory.extras['worker_logprobs'].to(self.device)
+                learner_logprobs    = self.distribution.logprob(old_action_datas, actions)
+
+                worker_logprobs     = worker_logprobs.reshape(values.shape[0], self.n_envs, -1)
+                learner_logprobs    = learner_logprobs.reshape(values.shape[0], self.n_envs, -1)
+                chunk_ends          = self.ppo_memory.extras['chunk_ends'].to(self.device).reshape(values.shape) if 'chunk_ends' in self.ppo_memory.extras else None
+
+                returns, advantages = self.ppoLoss.advantage_function.compute_vtrace(rewards, values, next_values, dones, worker_logprobs, learner_logprobs, 
+                    chunk_ends)
+            else:
+                advantages  = self.ppoLoss.advantage_function.compute_advantages(rewards, values, next_values, dones)
+                returns     = advantages + values
+
+        self.ppo_memory.save_extras(old_action_datas = old_action_datas, old_values = values.reshape(-1, 1), advantages = advantages.reshape(-1, 1), 
+            returns = returns.reshape(-1, 1))
+
+    def _compute_logprobs(self, memory, policy):
+        logprobs = []
+
+        with torch.no_grad():
+            for states, actions, *_ in memory.iter_minibatches(self.batch_size, shuffle = False):
+                action_datas, _ = policy(states.float().to(self.device))
+                logprobs.append(self.distribution.logprob(action_datas, actions.float().to(self.device)))
+
+        return torch.cat(logprobs)
 
     def _update_ppo(self):
         self.policy_old.load_state_dict(self.policy.state_dict())
         self.value_old.load_state_dict(self.value.state_dict())
 
+        self._compute_advantages()
+
         for _ in range(self.ppo_epochs):
-            dataloader = DataLoader(self.ppo_memory, self.batch_size, shuffle = False, num_workers = 8)
-            for states, actions, rewards, dones, next_states in dataloader:
-                self._training_ppo(states.float().to(self.device), actions.float().to(self.device), rewards.float().to(self.device), dones.float().to(self.device), next_states.float().to(self.device))
+            for batch in self.ppo_loader:
+                self._training_ppo(*batch)
 
         states, _, _, _, _ = self.ppo_memory.get_all_items()
         self.aux_ppg_memory.save_all(states)
-        self.ppo_memory.clear_memory()           
+        self.ppo_memory.clear_memory()
+        self.ppo_loader.reset()           
 
     def _update_aux_ppg(self):
         self.policy_old.load_state_dict(self.policy.state_dict())
 
         for _ in range(self.aux_ppg_epochs):
-            dataloader  = DataLoader(self.aux_ppg_memory, self.batch_size, shuffle = False, num_workers = 8)
-            for states in dataloader:
-                self._training_aux_ppg(states.float().to(self.device))
+            for states in self.aux_ppg_loader:
+                self._training_aux_ppg(states.float())
 
         self.aux_ppg_memory.clear_memory()
+        self.aux_ppg_loader.reset()
 
     def update(self):
         self._update_ppo()
@@ -106,19 +172,47 @@ class AgentPPG():
 
         if self.i_update % self.n_aux_update == 0:
             self._update_aux_ppg()
-            self.i_update = 0    
+            self.i_update = 0
+
+        self.acting_policy.refresh()
 
+    @torch.inference_mode()
     def act(self, state):
-        state           = torch.FloatTensor(state).unsqueeze(0).float().to(self.device)
-        action_datas, _ = self.policy(state)
+        action_datas, _ = self.acting_policy(state, unsqueeze = True)
         
         if self.is_training_mode:
             action = self.distribution.sample(action_datas)
         else:
             action = self.distribution.deterministic(action_datas)
               
-        return action.squeeze().detach().tolist()
+        return action.squeeze().detach().cpu().numpy()
+
+    def save_memory(self, policy_memory):
+        states, actions, rewards, dones, next_states = policy_memory.get_all_items()
+        self.ppo_memory.save_all(states, actions, rewards, dones, next_states)
+
+        if 'worker_logprobs' in policy_memory.extras:
+            # the last env step of every saved rollout is marked, so v-trace never runs across two runners' rollouts
+            chunk_ends                  = torch.zeros(len(dones), 1)
+            chunk_ends[-self.n_envs:]   = 1.0
+
+            self.ppo_memory.append_extras(worker_logprobs = policy_memory.extras['worker_logprobs'], chunk_ends = chunk_ends)
+
+    def memory_logprobs(self, memory):
+        return self._compute_logprobs(memory, self.policy).cpu()
 
+    @torch.inference_mode()
+    def act_batch(self, states):
+        action_datas, _ = self.acting_policy(states)
+
+        if self.is_training_mode:
+            actions = self.distribution.sample(action_datas)
+        else:
+            actions = self.distribution.deterministic(action_datas)
+
+        return actions.detach().cpu().numpy()
+
+    @torch.inference_mode()
     def logprobs(self, state, action):
         state           = torch.FloatTensor(state).unsqueeze(0).float().to(self.device)
         action          = torch.FloatTensor(action).unsqueeze(0).float().to(self.device)
@@ -137,6 +231,7 @@ class AgentPPG():
             'value_state_dict': self.value.state_dict(),
             'ppo_optimizer_state_dict': self.ppo_optimizer.state_dict(),
             'aux_ppg_optimizer_state_dict': self.aux_ppg_optimizer.state_dict(),
+            'precision_state_dict': self.precision.state_dict(),
         }, self.folder + '/ppg.tar')
         
     def load_weights(self, folder = None, device = None):
@@ -151,6 +246,8 @@ class AgentPPG():
         self.value.load_state_dict(model_checkpoint['value_state_dict'])
         self.ppo_optimizer.load_state_dict(model_checkpoint['ppo_optimizer_state_dict'])        
         self.aux_ppg_optimizer.load_state_dict(model_checkpoint['aux_ppg_optimizer_state_dict'])
+        if 'precision_state_dict' in model_checkpoint:
+            self.precision.load_state_dict(model_checkpoint['precision_state_dict'])
 
         if self.is_training_mode:
             self.policy.train()
@@ -160,9 +257,13 @@ class AgentPPG():
             self.policy.eval()
             self.value.eval()
 
+        self.acting_policy.refresh()
+
     def get_weights(self):
         return self.policy.state_dict(), self.value.state_dict()
 
     def set_weights(self, policy_weights, value_weights):
         self.policy.load_state_dict(policy_weights)
-        self.value.load_state_dict(value_weights)
\ No newline at end of file
+        self.value.load_state_dict(value_weights)
+
+        self.acting_policy.refresh()
\ No newline at end of file
@@ -1,13 +1,18 @@
 import torch
-from torch.utils.data import DataLoader, SubsetRandomSampler
 from copy import deepcopy
 
-from helpers.pytorch_utils import set_device, to_list, copy_parameters
+from helpers.pytorch_utils import set_device, to_list
+from helpers.inference import InferencePolicy
+from helpers.precision import Precision
+from helpers.target_network import TargetNetworks
+from helpers.critic import Critics
+from helpers.utd_scheduler import UTDScheduler
 
 class AgentSAC():
     def __init__(self, soft_q1, soft_q2, policy, value, distribution, q_loss, policy_loss, value_loss, memory, 
         soft_q_optimizer, policy_optimizer, value_optimizer, is_training_mode = True, batch_size = 32, epochs = 1, 
-        soft_tau = 0.95, folder = 'model', device = torch.device('cuda:0'), target_value = None):
+        soft_tau = 0.95, folder = 'model', device = torch.device('cuda:0'), target_value = None, compile_policy = None, precision = None, target_update_every = 1, 
+        utd_ratio = None, env_steps_per_update = 1, compile_update = None):
 
         self.batch_size         = batch_size
         self.is_training_mode   = is_training_mode
@@ -18,6 +23,7 @@ class AgentSAC():
         self.policy             = policy
         self.soft_q1            = soft_q1
         self.soft_q2            = soft_q2
+        self.critics            = Critics(self.soft_q1, self.soft_q2)
         self.value              = value
 
         self.target_value       = target_value
@@ -30,6 +36,8 @@ class AgentSAC():
         self.valueLoss          = value_loss
 
         self.device             = device
+        self.acting_policy      = InferencePolicy(self.policy, self.device, compile_policy)
+        self.precision          = precision if precision is not None else Precision('fp32', self.device)
         self.q_update           = 1
         
         self.soft_q_optimizer   = soft_q_optimizer
@@ -39,83 +47,102 @@ class AgentSAC():
         if self.target_value is None:
             self.target_value = deepcopy(self.value)
 
+        self.target_networks    = TargetNetworks([(self.value, self.target_value)], self.soft_tau, target_update_every)
+
+        # without a utd_ratio every update call takes `epochs` gradient steps, like before
+        self.update_scheduler   = UTDScheduler(self.agent_memory, self.batch_size, utd_ratio if utd_ratio is not None else epochs, 
+            env_steps_per_update, self.device, include_latest = True)
+        self._training_step     = UTDScheduler.compile(self._training_step, compile_update)
+
     @property
     def memory(self):
         return self.agent_memory
 
-    def _training_q(self, states, actions, rewards, dones, next_states):
-        target_values      = self.target_value(next_states, True)
+    def _training_q(self, states, actions, rewards, dones, next_states, indices = None, weights = None):
+        with self.precision.autocast():
+            target_values      = self.target_value(next_states, True)
 
-        predicted_q_value1  = self.soft_q1(states, actions)
-        predicted_q_value2  = self.soft_q2(states, actions)
+            predicted_q_value1, predicted_q_value2  = self.critics.all(states, actions)
 
-        loss  = self.qLoss.compute_loss(predicted_q_value1, predicted_q_value2, target_values, rewards, dones)
+            loss  = self.qLoss.compute_loss(predicted_q_value1, predicted_q_value2, target_values, rewards, dones, weights)
 
         self.soft_q_optimizer.zero_grad()
-        loss.backward()
-        self.soft_q_optimizer.step()
+        self.precision.step(loss, self.soft_q_optimizer, 'soft_q')
+
+        if weights is not None:
+            td_errors = self.qLoss.compute_td_error(predicted_q_value1, predicted_q_value2, target_values, rewards, dones)
+            self.agent_memory.update_priorities(indices, td_errors.reshape(-1, len(states)).mean(0).cpu().numpy())
 
     def _training_value(self, states):
-        action_datas    = self.policy(states, True)
-        actions         = self.distribution.sample(action_datas).detach()
+        with self.precision.autocast():
+            action_datas    = self.policy(states, True)
+            actions         = self.distribution.sample(action_datas).detach()
 
-        q_value1        = self.soft_q1(states, actions, True)
-        q_value2        = self.soft_q2(states, actions, True)
+            q_value1, q_value2  = self.critics.pair(states, actions, True)
 
-        predicted_value = self.value(states)
+            predicted_value = self.value(states)
 
-        loss    = self.valueLoss.compute_loss(predicted_value, action_datas, actions, q_value1, q_value2)
+            loss    = self.valueLoss.compute_loss(predicted_value, action_datas, actions, q_value1, q_value2)
 
         self.value_optimizer.zero_grad()
-        loss.backward()
-        self.value_optimizer.step()
+        self.precision.step(loss, self.value_optimizer, 'value')
 
     def _training_policy(self, states):
-        action_datas    = self.policy(states)
-        actions         = self.distribution.sample(action_datas)
+        with self.precision.autocast():
+            action_datas    = self.policy(states)
+            actions         = self.distribution.sample(action_datas)
 
-        q_value1        = self.soft_q1(states, actions)
-        q_value2        = self.soft_q2(states, actions)
+            q_value1, q_value2  = self.critics.pair(states, actions)
 
-        loss = self.policyLoss.compute_loss(action_datas, actions, q_value1, q_value2)
+            loss = self.policyLoss.compute_loss(action_datas, actions, q_value1, q_value2)
 
         self.policy_optimizer.zero_grad()
-        loss.backward()
-        self.policy_optimizer.step()
+        self.precision.step(loss, self.policy_optimizer, 'policy')
 
-    def _update_sac(self):        
-        for _ in range(self.epochs):
-            indices     = torch.randperm(len(self.agent_memory))[:self.batch_size]
-            indices[-1] = torch.IntTensor([len(self.agent_memory) - 1])
-            # indices     = torch.arange(-self.batch_size, 0)
+    def _training_step(self, states, actions, rewards, dones, next_states, indices = None, weights = None):
+        self._training_q(states, actions, rewards, dones, next_states, indices, weights)
+        self._training_value(states)
+        self._training_policy(states)
 
-            dataloader  = DataLoader(self.agent_memory, self.batch_size, sampler = SubsetRandomSampler(indices), num_workers = 8)                
-            for states, actions, rewards, dones, next_states in dataloader:                
-                self._training_q(states.to(self.device), actions.to(self.device), rewards.to(self.device), dones.to(self.device), next_states.to(self.device))
-                self._training_value(states.to(self.device))
-                self._training_policy(states.to(self.device))
+        self.target_networks.update()
 
-                self.target_value = copy_parameters(self.value, self.target_value, self.soft_tau)
+    def _update_sac(self):        
+        for states, actions, rewards, dones, next_states, indices, weights in self.update_scheduler:
+            self._training_step(states, actions, rewards, dones, next_states, indices, weights)
 
     def update(self):
         if len(self.agent_memory) > self.batch_size:
             self._update_sac()
 
+        self.acting_policy.refresh()
+
     def save_memory(self, policy_memory):
         states, actions, rewards, dones, next_states = policy_memory.get_all_items()
         self.agent_memory.save_all(states, actions, rewards, dones, next_states)
         
+    @torch.inference_mode()
     def act(self, state):
-        state               = torch.FloatTensor(state).unsqueeze(0).to(self.device)
-        action_datas        = self.policy(state)
+        action_datas        = self.acting_policy(state, unsqueeze = True)
         
         if self.is_training_mode:
             action = self.distribution.sample(action_datas)
         else:
             action = self.distribution.act_deterministic(action_datas)
               
-        return action.squeeze().detach().tolist()
+        return action.squeeze().detach().cpu().numpy()
 
+    @torch.inference_mode()
+    def act_batch(self, states):
+        action_datas        = self.acting_policy(states)
+
+        if self.is_training_mode:
+            actions = self.distribution.sample(action_datas)
+        else:
+            actions = self.distribution.act_deterministic(action_datas)
+
+        return actions.detach().cpu().numpy()
+
+    @torch.inference_mode()
     def logprobs(self, state, action):
         state           = torch.FloatTensor(state).unsqueeze(0).float().to(self.device)
         action          = torch.FloatTensor(action).unsqueeze(0).float().to(self.device)
@@ -129,9 +156,10 @@ class AgentSAC():
         torch.save({
             'policy_state_dict': self.policy.state_dict(),
             'soft_q1_state_dict': self.soft_q1.state_dict(),
-            'soft_q2_state_dict': self.soft_q2.state_dict(),
+            'soft_q2_state_dict': self.soft_q2.state_dict() if self.soft_q2 is not None else None,
             'policy_optimizer_state_dict': self.policy_optimizer.state_dict(),
             'soft_q_optimizer_state_dict': self.soft_q_optimizer.state_dict(),
+            'precision_state_dict': self.precision.state_dict(),
         }, self.folder + '/sac.tar')
         
     def load_weights(self, device = None):
@@ -142,6 +170,11 @@ class AgentSAC():
         
         self.policy.load_state_dict(model_checkpoint['policy_state_dict'])
         self.soft_q1.load_state_dict(model_checkpoint['soft_q1_state_dict'])
-        self.soft_q2.load_state_dict(model_checkpoint['soft_q2_state_dict'])
+        if self.soft_q2 is not None:
+            self.soft_q2.load_state_dict(model_checkpoint['soft_q2_state_dict'])
         self.policy_optimizer.load_state_dict(model_checkpoint['policy_optimizer_state_dict'])
-        self.soft_q_optimizer.load_state_dict(model_checkpoint['soft_q_optimizer_state_dict'])
\ No newline at end of file
+        self.soft_q_optimizer.load_state_dict(model_checkpoint['soft_q_optimizer_state_dict'])
+        if 'precision_state_dict' in model_checkpoint:
+            self.precision.load_state_dict(model_checkpoint['precision_state_dict'])
+
+        self.acting_policy.refresh()
\ No newline at end of file
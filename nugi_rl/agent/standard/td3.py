@@ -1,14 +1,19 @@
 import torch
-from torch.utils.data import DataLoader, SubsetRandomSampler
 from copy import deepcopy
 
-from helpers.pytorch_utils import set_device, copy_parameters, to_list
+from helpers.pytorch_utils import set_device, to_list
+from helpers.inference import InferencePolicy
+from helpers.precision import Precision
+from helpers.target_network import TargetNetworks
+from helpers.critic import Critics
+from helpers.utd_scheduler import UTDScheduler
 
 class AgentTD3():
     def __init__(self, soft_q1, soft_q2, policy, state_dim, action_dim, q_loss, policy_loss, memory, 
         soft_q_optimizer, policy_optimizer, is_training_mode = True, batch_size = 32, epochs = 1, 
         soft_tau = 0.95, folder = 'model', device = torch.device('cuda:0'), 
-        target_policy = None, target_soft_q1 = None, target_soft_q2 = None):
+        target_policy = None, target_soft_q1 = None, target_soft_q2 = None, compile_policy = None, precision = None, target_update_every = 1, 
+        utd_ratio = None, env_steps_per_update = 1, compile_update = None):
 
         self.batch_size         = batch_size
         self.is_training_mode   = is_training_mode
@@ -26,11 +31,13 @@ class AgentTD3():
         self.target_soft_q1     = target_soft_q1
         self.target_soft_q2     = target_soft_q2
 
-        self.memory             = memory        
+        self.agent_memory       = memory        
         self.qLoss              = q_loss
         self.policyLoss         = policy_loss
 
         self.device             = device
+        self.acting_policy      = InferencePolicy(self.policy, self.device, compile_policy)
+        self.precision          = precision if precision is not None else Precision('fp32', self.device)
         self.q_update           = 1
         
         self.soft_q_optimizer   = soft_q_optimizer
@@ -45,79 +52,91 @@ class AgentTD3():
         if self.target_soft_q2 is None:
             self.target_soft_q2 = deepcopy(self.soft_q2)
 
+        self.critics            = Critics(self.soft_q1, self.soft_q2)
+        self.target_critics     = Critics(self.target_soft_q1, self.target_soft_q2)
+
+        self.target_networks    = TargetNetworks([(self.soft_q1, self.target_soft_q1), (self.soft_q2, self.target_soft_q2), (self.policy, self.target_policy)], 
+            self.soft_tau, target_update_every)
+
+        # without a utd_ratio every update call takes `epochs` gradient steps, like before
+        self.update_scheduler   = UTDScheduler(self.agent_memory, self.batch_size, utd_ratio if utd_ratio is not None else epochs, 
+            env_steps_per_update, self.device)
+        self._training_step     = UTDScheduler.compile(self._training_step, compile_update)
+
     @property
     def memory(self):
-        return self.memory
+        return self.agent_memory
 
-    def _training_q(self, states, actions, rewards, dones, next_states):
-        predicted_next_actions      = self.policy(next_states, True)
-        target_next_q1              = self.soft_q1(next_states, predicted_next_actions, True)
-        target_next_q2              = self.soft_q2(next_states, predicted_next_actions, True)
+    def _training_q(self, states, actions, rewards, dones, next_states, indices = None, weights = None):
+        with self.precision.autocast():
+            predicted_next_actions                  = self.target_policy(next_states, True)
+            target_next_q1, target_next_q2          = self.target_critics.pair(next_states, predicted_next_actions, True)
 
-        predicted_q_value1          = self.soft_q1(states, actions)
-        predicted_q_value2          = self.soft_q2(states, actions)
+            predicted_q_value1, predicted_q_value2  = self.critics.all(states, actions)
                                         
-        loss = self.qLoss.compute_loss(predicted_q_value1, predicted_q_value2, target_next_q1, target_next_q2, rewards, dones)
+            loss = self.qLoss.compute_loss(predicted_q_value1, predicted_q_value2, target_next_q1, target_next_q2, rewards, dones, weights)
 
         self.soft_q_optimizer.zero_grad()
-        loss.backward()
-        self.soft_q_optimizer.step()
+        self.precision.step(loss, self.soft_q_optimizer, 'soft_q')
+
+        if weights is not None:
+            td_errors = self.qLoss.compute_td_error(predicted_q_value1, predicted_q_value2, target_next_q1, target_next_q2, rewards, dones)
+            self.agent_memory.update_priorities(indices, td_errors.reshape(-1, len(states)).mean(0).cpu().numpy())
 
     def _training_policy(self, states):
-        predicted_actions   = self.policy(states)
-        predicted_q_value1  = self.soft_q1(states, predicted_actions)
-        predicted_q_value2  = self.soft_q2(states, predicted_actions)
+        with self.precision.autocast():
+            predicted_actions                       = self.policy(states)
+            predicted_q_value1, predicted_q_value2  = self.critics.pair(states, predicted_actions)
 
-        loss = self.policyLoss.compute_loss(predicted_q_value1, predicted_q_value2)
+            loss = self.policyLoss.compute_loss(predicted_q_value1, predicted_q_value2)
 
         self.policy_optimizer.zero_grad()
-        loss.backward()
-        self.policy_optimizer.step()
+        self.precision.step(loss, self.policy_optimizer, 'policy')
+
+    def _training_step(self, states, actions, rewards, dones, next_states, indices = None, weights = None, update_policy = False):
+        self._training_q(states, actions, rewards, dones, next_states, indices, weights)
+
+        if update_policy:
+            self._training_policy(states)
+
+            # targets follow the delayed policy update, all three pairs are blended in one call
+            self.target_networks.update()
 
     def _update_offpolicy(self):        
-        for _ in range(self.epochs):
-            indices     = torch.randperm(len(self.memory))[:self.batch_size]
-            dataloader  = DataLoader(self.memory, self.batch_size, sampler = SubsetRandomSampler(indices), num_workers = 8)
-            
-            if self.q_update == 1:
-                for states, actions, rewards, dones, next_states in dataloader:
-                    self._training_q(states.to(self.device), actions.to(self.device), rewards.to(self.device), dones.to(self.device), next_states.to(self.device))
-                self.q_update = 2
-
-                self.target_next_q1 = copy_parameters(self.soft_q1, self.target_next_q1, self.soft_tau)
-                self.target_next_q2 = copy_parameters(self.soft_q2, self.target_next_q2, self.soft_tau)
-
-            else:
-                for states, actions, rewards, dones, next_states in dataloader:
-                    self._training_q(states.to(self.device), actions.to(self.device), rewards.to(self.device), dones.to(self.device), next_states.to(self.device))
-                    self._training_policy(states.to(self.device))                
-                self.q_update = 1
-
-                self.target_next_q1 = copy_parameters(self.soft_q1, self.target_next_q1, self.soft_tau)
-                self.target_next_q2 = copy_parameters(self.soft_q2, self.target_next_q2, self.soft_tau)
-                self.target_policy  = copy_parameters(self.policy, self.target_policy, self.soft_tau)
+        for states, actions, rewards, dones, next_states, indices, weights in self.update_scheduler:
+            self._training_step(states, actions, rewards, dones, next_states, indices, weights, self.q_update == 2)
+            self.q_update = 1 if self.q_update == 2 else 2
 
     def save_memory(self, policy_memory):
         states, actions, rewards, dones, next_states = policy_memory.get_all_items()
         self.memory.save_all(states, actions, rewards, dones, next_states)
         
+    @torch.inference_mode()
     def act(self, state):
-        state   = torch.FloatTensor(state).unsqueeze(0).to(self.device)
-        action  = self.policy(state)
+        action  = self.acting_policy(state, unsqueeze = True)
                       
-        return to_list(action.squeeze(), self.use_gpu)
+        return action.squeeze().detach().cpu().numpy()
+
+    @torch.inference_mode()
+    def act_batch(self, states):
+        actions = self.acting_policy(states)
+
+        return actions.cpu().numpy()
 
     def update(self):
         if len(self.memory) > self.batch_size:
             self._update_offpolicy()
-        
+
+        self.acting_policy.refresh()
+
     def save_weights(self):
         torch.save({
             'policy_state_dict': self.policy.state_dict(),
-            'value_state_dict': self.value.state_dict(),
-            'soft_q_state_dict': self.soft_q.state_dict(),
+            'soft_q1_state_dict': self.soft_q1.state_dict(),
+            'soft_q2_state_dict': self.soft_q2.state_dict() if self.soft_q2 is not None else None,
             'policy_optimizer_state_dict': self.policy_optimizer.state_dict(),
             'soft_q_optimizer_state_dict': self.soft_q_optimizer.state_dict(),
+            'precision_state_dict': self.precision.state_dict(),
         }, self.folder + '/cql.tar')
         
     def load_weights(self, device = None):
@@ -127,21 +146,26 @@ class AgentTD3():
         model_checkpoint = torch.load(self.folder + '/cql.tar', map_location = device)
         
         self.policy.load_state_dict(model_checkpoint['policy_state_dict'])        
-        self.value.load_state_dict(model_checkpoint['value_state_dict'])
-        self.soft_q.load_state_dict(model_checkpoint['soft_q_state_dict'])
+        self.soft_q1.load_state_dict(model_checkpoint['soft_q1_state_dict'])
+        if self.soft_q2 is not None:
+            self.soft_q2.load_state_dict(model_checkpoint['soft_q2_state_dict'])
         self.policy_optimizer.load_state_dict(model_checkpoint['policy_optimizer_state_dict'])
-        self.value_optimizer.load_state_dict(model_checkpoint['value_optimizer_state_dict'])
         self.soft_q_optimizer.load_state_dict(model_checkpoint['soft_q_optimizer_state_dict'])
-        self.policy_scaler.load_state_dict(model_checkpoint['policy_scaler_state_dict'])        
-        self.value_scaler.load_state_dict(model_checkpoint['value_scaler_state_dict'])
-        self.soft_q_scaler.load_state_dict(model_checkpoint['soft_q_scaler_state_dict'])
+        if 'precision_state_dict' in model_checkpoint:
+            self.precision.load_state_dict(model_checkpoint['precision_state_dict'])
 
         if self.is_training_mode:
             self.policy.train()
-            self.value.train()
+            self.soft_q1.train()
+            if self.soft_q2 is not None:
+                self.soft_q2.train()
             print('Model is training...')
 
         else:
             self.policy.eval()
-            self.value.eval()
-            print('Model is evaluating...')
\ No newline at end of file
+            self.soft_q1.eval()
+            if self.soft_q2 is not None:
+                self.soft_q2.eval()
+            print('Model is evaluating...')
+
+        self.acting_policy.refresh()
\ No newline at end of file
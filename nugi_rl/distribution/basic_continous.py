@@ -33,5 +33,6 @@ class BasicContinous():
         return kl_divergence(distribution1, distribution2)
 
     def deterministic(self, datas):
+        # keeps the batch dimension, act squeezes single states itself
         mean, _ = datas
-        return mean.squeeze(0)
\ No newline at end of file
+        return mean
\ No newline at end of file
@@ -26,4 +26,4 @@ class BasicDiscrete():
         return kl_divergence(distribution1, distribution2).unsqueeze(1).float().to(set_device(self.use_gpu))
 
     def deterministic(self, datas):
-        return int(torch.argmax(datas, 1))
+        return torch.argmax(datas, -1).int()
@@ -0,0 +1,19 @@
+"""
+Continuous-action variant of environment/custom/vector_cartpole_discrete.py, following
+environment/custom/cartpole_continous.py: the force scales with an action in [-1, 1] and
+episodes are cut after max_episode steps.
+"""
+
+from gym import spaces
+import numpy as np
+
+from environment.custom.vector_cartpole_discrete import VectorCartPoleEnv
+
+
+class VectorCartPoleContinousEnv(VectorCartPoleEnv):
+    def __init__(self, n_envs, max_episode = 500):
+        super().__init__(n_envs, max_episode)
+        self.action_space = spaces.Box(np.array([-1]), np.array([1]), dtype=np.float32)
+
+    def _forces(self, actions):
+        return self.force_mag * np.asarray(actions, dtype=np.float64).reshape(self.n_envs)
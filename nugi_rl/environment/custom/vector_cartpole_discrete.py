@@ -0,0 +1,128 @@
+"""
+Classic cart-pole system implemented by Rich Sutton et al., simulating N carts at once.
+Physics follow environment/custom/cartpole_discrete.py, but the state is held as a [N, 4] array and
+every cart is stepped with one set of NumPy operations. Finished carts are reset automatically.
+"""
+
+import math
+import gym
+from gym import spaces
+from gym.utils import seeding
+import numpy as np
+
+
+class VectorCartPoleEnv():
+    def __init__(self, n_envs, max_episode = None):
+        self.n_envs = n_envs
+        self.max_episode = max_episode
+
+        self.gravity = 9.8
+        self.masscart = 1.0
+        self.masspole = 0.1
+        self.total_mass = (self.masspole + self.masscart)
+        self.length = 0.5  # actually half the pole's length
+        self.polemass_length = (self.masspole * self.length)
+        self.force_mag = 10.0
+        self.tau = 0.02  # seconds between state updates
+        self.kinematics_integrator = 'euler'
+
+        # Angle at which to fail the episode
+        self.theta_threshold_radians = 12 * 2 * math.pi / 360
+        self.x_threshold = 2.4
+
+        high = np.array([self.x_threshold * 2,
+                         np.finfo(np.float32).max,
+                         self.theta_threshold_radians * 2,
+                         np.finfo(np.float32).max],
+                        dtype=np.float32)
+
+        self.action_space = spaces.Discrete(2)
+        self.observation_space = spaces.Box(-high, high, dtype=np.float32)
+
+        self.seed()
+        self.states = np.zeros((self.n_envs, 4), dtype=np.float64)
+        self.n_steps = np.zeros(self.n_envs, dtype=np.int64)
+
+    def __len__(self):
+        return self.n_envs
+
+    def is_discrete(self):
+        return type(self.action_space) is not gym.spaces.Box
+
+    def get_obs_dim(self):
+        return self.observation_space.shape[0]
+
+    def get_action_dim(self):
+        if self.is_discrete():
+            return self.action_space.n
+        else:
+            return self.action_space.shape[0]
+
+    def seed(self, seeds=None):
+        # same interface as VectorEnv.seed, one seed per cart, a single seed (or None) is spread over the carts
+        if seeds is None or np.isscalar(seeds):
+            seeds = [None if seeds is None else seeds + i for i in range(self.n_envs)]
+
+        assert self.n_envs == len(seeds)
+
+        self.np_randoms, seeds = zip(*[seeding.np_random(seed) for seed in seeds])
+        return tuple([seed] for seed in seeds)
+
+    def _forces(self, actions):
+        return np.where(np.asarray(actions).reshape(self.n_envs) == 1, self.force_mag, -self.force_mag)
+
+    def _reset_envs(self, indices):
+        self.states[indices] = [self.np_randoms[index].uniform(low=-0.05, high=0.05, size=4) for index in indices]
+        self.n_steps[indices] = 0
+
+    def step(self, actions):
+        x, x_dot, theta, theta_dot = self.states.T
+        force = self._forces(actions)
+        costheta = np.cos(theta)
+        sintheta = np.sin(theta)
+
+        temp = (force + self.polemass_length * theta_dot ** 2 * sintheta) / self.total_mass
+        thetaacc = (self.gravity * sintheta - costheta * temp) / (self.length * (4.0 / 3.0 - self.masspole * costheta ** 2 / self.total_mass))
+        xacc = temp - self.polemass_length * thetaacc * costheta / self.total_mass
+
+        if self.kinematics_integrator == 'euler':
+            x = x + self.tau * x_dot
+            x_dot = x_dot + self.tau * xacc
+            theta = theta + self.tau * theta_dot
+            theta_dot = theta_dot + self.tau * thetaacc
+        else:  # semi-implicit euler
+            x_dot = x_dot + self.tau * xacc
+            x = x + self.tau * x_dot
+            theta_dot = theta_dot + self.tau * thetaacc
+            theta = theta + self.tau * theta_dot
+
+        self.states = np.stack((x, x_dot, theta, theta_dot), axis=1)
+        self.n_steps += 1
+
+        dones = (x < -self.x_threshold) | (x > self.x_threshold) | (theta < -self.theta_threshold_radians) | (theta > self.theta_threshold_radians)
+        if self.max_episode is not None:
+            dones |= self.n_steps >= self.max_episode
+
+        rewards = np.ones(self.n_envs, dtype=np.float32)
+        infos = [{} for _ in range(self.n_envs)]
+
+        done_indices = np.flatnonzero(dones)
+        if len(done_indices) > 0:
+            terminal_states = self.states[done_indices].astype(np.float32)
+            for index, terminal_state in zip(done_indices, terminal_states):
+                infos[index]['terminal_observation'] = terminal_state
+
+            self._reset_envs(done_indices)
+
+        return self.states.astype(np.float32), rewards, dones, tuple(infos)
+
+    def reset(self):
+        self._reset_envs(np.arange(self.n_envs))
+        return self.states.astype(np.float32)
+
+    def render(self):
+        # there is no viewer for the batched simulation, rendering is skipped so runners built with render = True keep working
+        pass
+
+    def close(self):
+        pass
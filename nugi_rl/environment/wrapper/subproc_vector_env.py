@@ -0,0 +1,185 @@
+import gym
+import numpy as np
+import multiprocessing as mp
+from multiprocessing import shared_memory
+
+def _worker(remote, parent_remote, env_fns, shared_memory_name, shape, dtype, start):
+    parent_remote.close()
+
+    envs            = [env_fn() for env_fn in env_fns]
+    buffer          = shared_memory.SharedMemory(name = shared_memory_name)
+    observations    = np.ndarray(shape, dtype = dtype, buffer = buffer.buf)
+
+    try:
+        while True:
+            command, datas = remote.recv()
+
+            if command == 'step':
+                rewards, dones, infos = [], [], []
+                for index, (env, action) in enumerate(zip(envs, datas)):
+                    observation, reward, done, info = env.step(action)
+                    if done:
+                        info                            = dict(info)
+                        info['terminal_observation']    = observation
+                        observation                     = env.reset()
+
+                    observations[start + index] = observation
+                    rewards.append(reward)
+                    dones.append(done)
+                    infos.append(info)
+
+                remote.send((rewards, dones, infos))
+
+            elif command == 'reset':
+                for index, env in enumerate(envs):
+                    observations[start + index] = env.reset()
+                remote.send(None)
+
+            elif command == 'seed':
+                remote.send([env.seed(seed) for env, seed in zip(envs, datas)])
+
+            elif command == 'render':
+                for env in envs:
+                    env.render()
+                remote.send(None)
+
+            elif command == 'close':
+                for env in envs:
+                    env.close()
+                remote.send(None)
+                break
+
+    except KeyboardInterrupt:
+        pass
+    finally:
+        del observations
+        buffer.close()
+        remote.close()
+
+class SubprocVectorEnv():
+    def __init__(self, env_fns, n_workers = None, start_method = None):
+        self.n_envs             = len(env_fns)
+        n_workers               = min(n_workers or mp.cpu_count(), self.n_envs)
+
+        env                     = env_fns[0]()
+        self.observation_space  = env.observation_space
+        self.action_space       = env.action_space
+        env.close()
+
+        shape                   = (self.n_envs, ) + self.observation_space.shape
+        dtype                   = np.dtype(self.observation_space.dtype)
+
+        self.shared_memory      = shared_memory.SharedMemory(create = True, size = max(int(np.prod(shape)) * dtype.itemsize, 1))
+        self.observations       = np.ndarray(shape, dtype = dtype, buffer = self.shared_memory.buf)
+
+        context                 = mp.get_context(start_method)
+
+        self.groups             = np.array_split(np.arange(self.n_envs), n_workers)
+        self.remotes            = []
+        self.processes          = []
+
+        for group in self.groups:
+            remote, work_remote = context.Pipe()
+            process             = context.Process(target = _worker, args = (work_remote, remote, [env_fns[i] for i in group],
+                self.shared_memory.name, shape, dtype, int(group[0])), daemon = True)
+
+            process.start()
+            work_remote.close()
+
+            self.remotes.append(remote)
+            self.processes.append(process)
+
+        self.waiting            = False
+        self.closed             = False
+
+    def __len__(self):
+        return self.n_envs
+
+    def is_discrete(self):
+        return type(self.action_space) is not gym.spaces.Box
+
+    def get_obs_dim(self):
+        if type(self.observation_space) is gym.spaces.Box:
+            return int(np.prod(self.observation_space.shape))
+        else:
+            return self.observation_space.n
+
+    def get_action_dim(self):
+        if self.is_discrete():
+            return self.action_space.n
+        else:
+            return self.action_space.shape[0]
+
+    # Call this only once at the beginning of training (optional):
+    def seed(self, seeds):
+        assert self.n_envs == len(seeds)
+
+        for remote, group in zip(self.remotes, self.groups):
+            remote.send(('seed', [seeds[i] for i in group]))
+
+        return tuple(seed for remote in self.remotes for seed in remote.recv())
+
+    # Call this only once at the beginning of training:
+    def reset(self):
+        for remote in self.remotes:
+            remote.send(('reset', None))
+
+        for remote in self.remotes:
+            remote.recv()
+
+        return self.observations.copy()
+
+    def step_async(self, actions):
+        assert self.n_envs == len(actions)
+
+        for remote, group in zip(self.remotes, self.groups):
+            remote.send(('step', actions[group[0]:group[-1] + 1]))
+
+        self.waiting = True
+
+    def step_wait(self):
+        rewards, dones, infos = [], [], []
+        for remote in self.remotes:
+            reward, done, info = remote.recv()
+
+            rewards.extend(reward)
+            dones.extend(done)
+            infos.extend(info)
+
+        self.waiting = False
+        return self.observations.copy(), np.array(rewards, dtype = np.float32), np.array(dones, dtype = bool), tuple(infos)
+
+    # Call this on every timestep. Finished envs are reset, their last observation is kept in info['terminal_observation']:
+    def step(self, actions):
+        self.step_async(actions)
+        return self.step_wait()
+
+    def render(self):
+        for remote in self.remotes:
+            remote.send(('render', None))
+
+        for remote in self.remotes:
+            remote.recv()
+
+    # Call this at the end of training:
+    def close(self):
+        if self.closed:
+            return
+
+        if self.waiting:
+            self.step_wait()
+
+        for remote in self.remotes:
+            remote.send(('close', None))
+
+        for remote in self.remotes:
+            remote.recv()
+
+        for process in self.processes:
+            process.join()
+
+        del self.observations
+        self.shared_memory.close()
+        self.shared_memory.unlink()
+
+        self.closed = True
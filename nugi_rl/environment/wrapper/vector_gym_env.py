@@ -1,9 +1,13 @@
 import gym
+import numpy as np
 
 class VectorEnv():
     def __init__(self, envs):
         self.envs = envs
 
+    def __len__(self):
+        return len(self.envs)
+
     def is_discrete(self):
         return type(self.envs[0].action_space) is not gym.spaces.Box
 
@@ -35,20 +39,26 @@ class VectorEnv():
 
     # Call this only once at the beginning of training:
     def reset(self):
-        return tuple(env.reset() for env in self.envs)
+        return np.stack([env.reset() for env in self.envs])
 
-    # Call this on every timestep:
+    # Call this on every timestep. Finished envs are reset, their last observation is kept in info['terminal_observation']:
     def step(self, actions):
         assert len(self.envs) == len(actions)
 
-        return_values = []
+        observations, rewards, dones, infos = [], [], [], []
         for env, a in zip(self.envs, actions):
             observation, reward, done, info = env.step(a)
             if done:
-                observation = env.reset()
-            return_values.append((observation, reward, done, info))
+                info                        = dict(info)
+                info['terminal_observation'] = observation
+                observation                 = env.reset()
+
+            observations.append(observation)
+            rewards.append(reward)
+            dones.append(done)
+            infos.append(info)
             
-        return tuple(return_values)
+        return np.stack(observations), np.array(rewards, dtype = np.float32), np.array(dones, dtype = bool), tuple(infos)
 
     def render(self):
         for env in self.envs:
@@ -37,8 +37,8 @@ class IterRunner():
             reward = self.coef_task_reward * task_reward + self.coef_imitation_reward * imitation_reward
             
             if self.is_save_memory:
-                self.agent.memory.save_obs(self.states.tolist(), self.goal, action, reward, float(done), next_state.tolist())
-                self.teacher.memory.save_policy_obs(self.states.tolist(), self.goal, next_state.tolist())
+                self.agent.memory.save_obs(self.states, self.goal, action, reward, float(done), next_state)
+                self.teacher.memory.save_policy_obs(self.states, self.goal, next_state)
                 
             self.states         = next_state
             self.eps_time       += 1 
@@ -27,7 +27,7 @@ class IterRunner():
             next_state, reward, done, _ = self.env.step(action)
             
             if self.is_save_memory:
-                self.agent.memory.save_obs(self.states.tolist(), action, reward, float(done), next_state.tolist())
+                self.agent.memory.save_obs(self.states, action, reward, float(done), next_state)
                 
             self.states         = next_state
             self.eps_time       += 1 
@@ -21,7 +21,7 @@ class PongRunner(IterRunner):
             next_state  = next_obs - self.obs
             
             if self.is_save_memory:
-                self.agent.memory.save_obs(self.states.tolist(), action, reward, float(done), next_state.tolist())
+                self.agent.memory.save_obs(self.states, action, reward, float(done), next_state)
                 
             self.states         = next_state
             self.obs            = next_obs
@@ -36,7 +36,7 @@ class PongFullRunner(IterRunner):
                     break 
             
             if self.training_mode:
-                self.agent.memory.save_obs(self.states.tolist(), action, reward, float(done), next_state.tolist())
+                self.agent.memory.save_obs(self.states, action, reward, float(done), next_state)
                 
             self.states         = next_state
             self.eps_time       += 1 
@@ -7,7 +7,7 @@ import ray
 @ray.remote(num_gpus = 0.25)
 class SyncRunner(IterRunner):
     def __init__(self, agent, env, memory, training_mode, render, n_update, is_discrete, max_action, writer = None, n_plot_batch = 100, 
-        folder = '', tag = 0):
+        folder = '', tag = 0, weight_broadcast = None, with_logprobs = False):
 
         self.env                = env
         self.agent              = agent
@@ -19,6 +19,8 @@ class SyncRunner(IterRunner):
         self.n_plot_batch       = n_plot_batch
         self.folder             = folder
         self.tag                = tag
+        self.weight_broadcast   = weight_broadcast
+        self.with_logprobs      = with_logprobs
 
         self.t_updates          = 0
         self.i_episode          = 0
@@ -31,7 +33,12 @@ class SyncRunner(IterRunner):
 
     def run(self):
         self.memories.clear_memory()
-        self.agent.load_weights(self.folder)
+
+        if self.weight_broadcast is not None:
+            if self.weight_broadcast.pull(self.agent.policy):
+                self.agent.acting_policy.refresh()
+        else:
+            self.agent.load_weights(self.folder)
 
         for _ in range(self.n_update):
             action = self.agent.act(self.states)
@@ -46,7 +53,7 @@ class SyncRunner(IterRunner):
                 next_state, reward, done, _ = self.env.step(action)
             
             if self.training_mode:
-                self.memories.save_eps(self.states.tolist(), action, reward, float(done), next_state.tolist())
+                self.memories.save_obs(self.states, action, reward, float(done), next_state)
                 
             self.states         = next_state
             self.eps_time       += 1 
@@ -66,5 +73,9 @@ class SyncRunner(IterRunner):
                 self.states         = self.env.reset()
                 self.total_reward   = 0
                 self.eps_time       = 0             
+
+        # only needed when the learner corrects the off-policy rollouts with v-trace
+        if self.training_mode and self.with_logprobs:
+            self.memories.save_extras(worker_logprobs = self.agent.memory_logprobs(self.memories))
         
         return self.memories, self.tag
\ No newline at end of file
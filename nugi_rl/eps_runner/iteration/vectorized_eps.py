@@ -3,63 +3,66 @@ from copy import deepcopy
 
 from eps_runner.iteration.iter_runner import IterRunner
 
-class VectorizedRunner(IterRunner): 
-    def __init__(self, agent, envs, training_mode, render, n_update, is_discrete, max_action, writer = None, n_plot_batch = 100):
-        self.envs               = envs
+class VectorizedRunner(IterRunner):
+    def __init__(self, agent, env, is_save_memory, render, n_update, is_discrete, max_action, writer = None, n_plot_batch = 100):
         self.agent              = agent
+        self.env                = env
+
         self.render             = render
-        self.training_mode      = training_mode
+        self.is_save_memory     = is_save_memory
         self.n_update           = n_update
         self.max_action         = max_action
         self.writer             = writer
         self.n_plot_batch       = n_plot_batch
+        self.is_discrete        = is_discrete
 
         self.t_updates          = 0
         self.i_episode          = 0
-        self.total_reward       = 0
-        self.eps_time           = 0
 
-        self.states             = [env.reset() for env in self.envs]
+        self.states             = self.env.reset()
+        self.n_envs             = len(self.states)
 
-        self.states             = [env.reset() for env in envs]
-        self.total_rewards      = [0 for _ in range(len(envs))]
-        self.eps_times          = [0 for _ in range(len(envs))]
-        self.i_episodes         = [0 for _ in range(len(envs))]
+        self.total_rewards      = np.zeros(self.n_envs, dtype = np.float32)
+        self.eps_times          = np.zeros(self.n_envs, dtype = np.int64)
+        self.i_episodes         = np.zeros(self.n_envs, dtype = np.int64)
 
     def run(self):
         for _ in range(self.n_update):
-            actions = self.agent.act(self.states)
+            actions = self.agent.act_batch(self.states)
+
+            if self.is_discrete:
+                actions_gym = actions.astype(np.int64)
+            elif self.max_action is not None:
+                actions_gym = np.clip(actions, -1.0, 1.0) * self.max_action
+            else:
+                actions_gym = actions
 
-            for index, (env, memory, action) in enumerate(zip(self.envs, self.memories, actions)):
-                if self.is_discrete:
-                    action = int(action)
+            next_states, rewards, dones, infos = self.env.step(actions_gym)
 
-                if self.max_action is not None and not self.is_discrete:
-                    action_gym  =  np.clip(action, -1.0, 1.0) * self.max_action
-                    next_state, reward, done, _ = env.step(action_gym)
-                else:
-                    next_state, reward, done, _ = env.step(action)
+            terminal_states = next_states.copy()
+            for index in np.flatnonzero(dones):
+                terminal_states[index] = infos[index]['terminal_observation']
 
-                if self.training_mode:
-                    self.agent.memory.save_obs(self.states[index].tolist(), action, reward, float(done), next_state.tolist())
+            if self.is_save_memory:
+                self.agent.memory.save_all(self.states, actions, rewards, dones.astype(np.float32), terminal_states)
 
-                self.states[index]           = next_state
-                self.total_rewards[index]    += reward
-                self.eps_times[index]        += 1
+            self.states         = next_states
+            self.total_rewards  += rewards
+            self.eps_times      += 1
 
-                if self.render:
-                    env.render()
+            if self.render:
+                self.env.render()
 
-                if done:
-                    self.i_episodes[index]  += 1
-                    print('Agent {} Episode {} \t t_reward: {} \t time: {} '.format(index, self.i_episodes[index], self.total_rewards[index], self.eps_times[index]))
+            for index in np.flatnonzero(dones):
+                self.i_episode          += 1
+                self.i_episodes[index]  += 1
+                print('Agent {} Episode {} \t t_reward: {} \t time: {} '.format(index, self.i_episodes[index], self.total_rewards[index], self.eps_times[index]))
 
-                    if self.i_episode % self.n_plot_batch == 0 and self.writer is not None:
-                        self.writer.add_scalar('Rewards', self.total_rewards[index], self.i_episodes[index])
-                        self.writer.add_scalar('Times', self.eps_times[index], self.i_episodes[index])
+                if self.i_episode % self.n_plot_batch == 0 and self.writer is not None:
+                    self.writer.add_scalar('Rewards', self.total_rewards[index], self.i_episode)
+                    self.writer.add_scalar('Times', self.eps_times[index], self.i_episode)
 
-                    self.states[index]           = env.reset()
-                    self.total_rewards[index]    = 0
-                    self.eps_times[index]        = 0
+                self.total_rewards[index]   = 0
+                self.eps_times[index]       = 0
 
-        return self.agent.memory.get_ranged_items(-self.n_update)
\ No newline at end of file
+        return self.agent.memory.get_ranged_items(-self.n_update * self.n_envs)
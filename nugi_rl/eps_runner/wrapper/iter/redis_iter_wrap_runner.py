@@ -8,7 +8,7 @@ class RedisIterWrapRunner():
 
     def run(self):        
         for i in range(1, self.n_update, 1):
-            self.runner.run()            
-            self.agent.memory.save_redis(-1)
+            self.runner.run()
 
-        return self.agent.memory.get_ranged_items(-self.n_update)
\ No newline at end of file
+        self.agent.memory.save_redis(-(self.n_update - 1))
+        return self.agent.memory.get_ranged_items(-self.n_update)
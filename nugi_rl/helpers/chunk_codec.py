@@ -0,0 +1,38 @@
+import struct
+import numpy as np
+
+CHUNK_MAGIC     = b'NRLC'
+CHUNK_VERSION   = 1
+
+def encode_chunk(columns):
+    columns = [np.ascontiguousarray(column, dtype = np.float32) for column in columns]
+    header  = struct.pack('<4sHH', CHUNK_MAGIC, CHUNK_VERSION, len(columns))
+
+    for column in columns:
+        header += struct.pack('<B', column.ndim) + struct.pack('<{}I'.format(column.ndim), *column.shape)
+
+    header += b'\x00' * (-len(header) % 4)
+    return b''.join([header] + [column.tobytes() for column in columns])
+
+def decode_chunk(payload):
+    magic, version, n_columns = struct.unpack_from('<4sHH', payload, 0)
+    if magic != CHUNK_MAGIC or version != CHUNK_VERSION:
+        raise Exception('payload is not a chunk with version {}'.format(CHUNK_VERSION))
+
+    offset = struct.calcsize('<4sHH')
+    shapes = []
+    for _ in range(n_columns):
+        ndim,   = struct.unpack_from('<B', payload, offset)
+        shape   = struct.unpack_from('<{}I'.format(ndim), payload, offset + 1)
+
+        shapes.append(shape)
+        offset  += 1 + 4 * ndim
+
+    offset  += -offset % 4
+    columns = []
+    for shape in shapes:
+        count   = int(np.prod(shape))
+        columns.append(np.frombuffer(payload, dtype = np.float32, count = count, offset = offset).reshape(shape))
+        offset  += 4 * count
+
+    return columns
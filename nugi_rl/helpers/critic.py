@@ -0,0 +1,29 @@
+import torch
+
+class Critics():
+    def __init__(self, soft_q1, soft_q2 = None):
+        self.soft_q1    = soft_q1
+        self.soft_q2    = soft_q2
+
+    @property
+    def is_ensemble(self):
+        # a single ensemble critic returns every member stacked as [n_critics, batch, 1] from one forward
+        return self.soft_q2 is None
+
+    def all(self, states, actions, detach = False):
+        if not self.is_ensemble:
+            return self.soft_q1(states, actions, detach), self.soft_q2(states, actions, detach)
+
+        # both halves broadcast against [batch, 1] targets in the q losses, so every member is trained
+        q_values = self.soft_q1(states, actions, detach)
+        return q_values[:len(q_values) // 2], q_values[len(q_values) // 2:]
+
+    def pair(self, states, actions, detach = False):
+        if not self.is_ensemble:
+            return self.soft_q1(states, actions, detach), self.soft_q2(states, actions, detach)
+
+        # REDQ style, the min is taken over two randomly drawn members
+        q_values    = self.soft_q1(states, actions, detach)
+        members     = torch.randperm(len(q_values), device = q_values.device)[:2]
+
+        return q_values[members[0]], q_values[members[1]]
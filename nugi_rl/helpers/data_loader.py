@@ -0,0 +1,116 @@
+import torch
+from torch.utils.data import DataLoader, Dataset
+
+class IndexDataset(Dataset):
+    def __init__(self, memory):
+        self.memory = memory
+
+    def __len__(self):
+        return len(self.memory)
+
+    def __getitem__(self, idx):
+        return idx
+
+class GatherBatch():
+    def __init__(self, memory):
+        self.memory = memory
+
+    def __call__(self, indices):
+        # runs inside the worker, the rows are gathered there and the indices come back so the learner can gather the extras itself
+        indices = torch.tensor(indices, dtype = torch.long)
+        return indices, self.memory.sample_batch(indices)
+
+class PrefetchLoader():
+    def __init__(self, memory, batch_size = 32, shuffle = False, num_workers = 0, device = torch.device('cuda:0'), pin_memory = True):
+        self.memory         = memory
+        self.batch_size     = batch_size
+        self.shuffle        = shuffle
+        self.num_workers    = num_workers
+        self.device         = device
+
+        self.use_cuda       = device.type == 'cuda' and torch.cuda.is_available()
+        self.pin_memory     = pin_memory and self.use_cuda
+        self.stream         = torch.cuda.Stream(device) if self.use_cuda else None
+
+        self.dataloader     = None
+
+    def __iter__(self):
+        batches = self._batches()
+
+        if self.stream is None:
+            for batch in batches:
+                yield self._to_device(batch)
+            return
+
+        next_batch = self._preload(batches)
+        while next_batch is not None:
+            torch.cuda.current_stream(self.device).wait_stream(self.stream)
+            batch = next_batch
+
+            for data in self._tensors(batch):
+                data.record_stream(torch.cuda.current_stream(self.device))
+
+            next_batch = self._preload(batches)
+            yield batch if len(batch) > 1 else batch[0]
+
+    def _batches(self):
+        if self.num_workers > 0:
+            if self.dataloader is None:
+                self.dataloader = DataLoader(IndexDataset(self.memory), self.batch_size, shuffle = self.shuffle, num_workers = self.num_workers,
+                    collate_fn = GatherBatch(self.memory), pin_memory = self.pin_memory, persistent_workers = True)
+
+            return self._with_extras(iter(self.dataloader))
+
+        return self.memory.iter_minibatches(self.batch_size, self.shuffle)
+
+    def _with_extras(self, batches):
+        # extras such as the cached old policy outputs can live on the gpu, so they are never sent to the workers
+        for indices, batch in batches:
+            if getattr(self.memory, 'extras', None):
+                yield batch + (self.memory.get_extras(indices), )
+            else:
+                yield batch
+
+    def _preload(self, batches):
+        try:
+            batch = next(batches)
+        except StopIteration:
+            return None
+
+        with torch.cuda.stream(self.stream):
+            batch = self._to_device(batch)
+
+        return batch if isinstance(batch, tuple) else (batch, )
+
+    def _tensors(self, batch):
+        for data in batch:
+            if isinstance(data, dict):
+                yield from self._tensors(data.values())
+            elif isinstance(data, tuple):
+                yield from self._tensors(data)
+            else:
+                yield data
+
+    def _data_to_device(self, data):
+        if isinstance(data, dict):
+            return { key: self._data_to_device(value) for key, value in data.items() }
+
+        if isinstance(data, tuple):
+            return tuple(self._data_to_device(value) for value in data)
+
+        if data.device.type != 'cpu':
+            return data.to(self.device)
+
+        if self.pin_memory and not data.is_pinned():
+            data = data.pin_memory()
+
+        return data.to(self.device, non_blocking = self.pin_memory)
+
+    def _to_device(self, batch):
+        if isinstance(batch, torch.Tensor):
+            return self._data_to_device(batch)
+
+        return tuple(self._data_to_device(data) for data in batch)
+
+    def reset(self):
+        self.dataloader = None
@@ -0,0 +1,43 @@
+from copy import deepcopy
+import torch
+
+class InferencePolicy():
+    def __init__(self, policy, device = torch.device('cuda:0'), compile_mode = None):
+        self.policy         = policy
+        self.device         = device
+        self.compile_mode   = compile_mode
+
+        self.buffers        = {}
+        self.acting         = self._build()
+
+    def _build(self):
+        if self.compile_mode is None:
+            return self.policy
+        elif self.compile_mode == 'script':
+            return torch.jit.script(deepcopy(self.policy))
+        elif self.compile_mode == 'compile':
+            return torch.compile(self.policy)
+        else:
+            raise Exception('compile_mode must be one of None, \'script\' or \'compile\'')
+
+    def _input(self, i, data, unsqueeze):
+        data = torch.as_tensor(data, dtype = torch.float32)
+        if unsqueeze:
+            data = data.unsqueeze(0)
+
+        # one buffer per input slot and shape, so acting on a single state and on a batch do not keep reallocating
+        key = (i, tuple(data.shape))
+        if key not in self.buffers:
+            self.buffers[key] = torch.empty(data.shape, dtype = torch.float32, device = self.device)
+
+        return self.buffers[key].copy_(data, non_blocking = True)
+
+    def refresh(self):
+        # the scripted policy is a copy, eager and compiled ones share the parameters of self.policy
+        if self.compile_mode == 'script':
+            self.acting.load_state_dict(self.policy.state_dict())
+
+    @torch.inference_mode()
+    def __call__(self, *datas, unsqueeze = False):
+        inputs = [self._input(i, data, unsqueeze) for i, data in enumerate(datas)]
+        return self.acting(*inputs)
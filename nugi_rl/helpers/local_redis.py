@@ -0,0 +1,97 @@
+import threading
+
+class LocalRedisPipeline():
+    def __init__(self, redis):
+        self.redis      = redis
+        self.commands   = []
+
+    def __getattr__(self, name):
+        command = getattr(self.redis, name)
+
+        def queue(*args, **kwargs):
+            self.commands.append((command, args, kwargs))
+            return self
+
+        return queue
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.commands = []
+
+    def execute(self):
+        with self.redis.lock:
+            results = [command(*args, **kwargs) for command, args, kwargs in self.commands]
+
+        self.commands = []
+        return results
+
+class LocalRedis():
+    def __init__(self):
+        self.datas  = {}
+        self.lock   = threading.RLock()
+
+    def _encode(self, value):
+        if isinstance(value, bytes):
+            return value
+        if isinstance(value, str):
+            return value.encode()
+        return str(value).encode()
+
+    def _range(self, values, start, end):
+        end = len(values) + end if end < 0 else end
+        return values[start:end + 1] if start >= 0 else values[max(len(values) + start, 0):end + 1]
+
+    def pipeline(self, transaction = True):
+        return LocalRedisPipeline(self)
+
+    def set(self, key, value):
+        with self.lock:
+            self.datas[key] = self._encode(value)
+            return True
+
+    def get(self, key):
+        with self.lock:
+            return self.datas.get(key)
+
+    def mget(self, *keys):
+        if len(keys) == 1 and isinstance(keys[0], (list, tuple)):
+            keys = keys[0]
+
+        with self.lock:
+            return [self.datas.get(key) for key in keys]
+
+    def delete(self, *keys):
+        with self.lock:
+            return sum(self.datas.pop(key, None) is not None for key in keys)
+
+    def exists(self, *keys):
+        with self.lock:
+            return sum(key in self.datas for key in keys)
+
+    def rpush(self, key, *values):
+        with self.lock:
+            self.datas.setdefault(key, []).extend(self._encode(value) for value in values)
+            return len(self.datas[key])
+
+    def lrange(self, key, start, end):
+        with self.lock:
+            return self._range(self.datas.get(key, []), start, end)
+
+    def lindex(self, key, index):
+        with self.lock:
+            values = self.datas.get(key, [])
+            return values[index] if -len(values) <= index < len(values) else None
+
+    def ltrim(self, key, start, end):
+        with self.lock:
+            if key in self.datas:
+                self.datas[key] = self._range(self.datas[key], start, end)
+                if len(self.datas[key]) == 0:
+                    del self.datas[key]
+            return True
+
+    def llen(self, key):
+        with self.lock:
+            return len(self.datas.get(key, []))
@@ -0,0 +1,57 @@
+import torch
+
+class Precision():
+    def __init__(self, mode = 'fp32', device = torch.device('cuda:0'), channels_last = False):
+        if mode not in ('fp32', 'bf16', 'fp16'):
+            raise Exception('precision mode must be one of fp32, bf16 or fp16')
+
+        self.device_type    = device.type if device.type in ('cuda', 'cpu') else 'cpu'
+        self.channels_last  = channels_last
+
+        # fp16 autocast and GradScaler are only worth it on cuda, on cpu it falls back to fp32 like torch.cuda.amp does
+        if mode == 'fp16' and not (self.device_type == 'cuda' and torch.cuda.is_available()):
+            mode = 'fp32'
+
+        self.mode           = mode
+        self.dtype          = torch.bfloat16 if mode == 'bf16' else torch.float16
+        self.use_scaler     = mode == 'fp16'
+        self.scalers        = {}
+
+    def autocast(self):
+        return torch.autocast(self.device_type, dtype = self.dtype, enabled = self.mode != 'fp32')
+
+    def prepare(self, *modules):
+        if self.channels_last:
+            for module in modules:
+                module.to(memory_format = torch.channels_last)
+
+    def memory_format(self, images):
+        if self.channels_last and images.dim() == 4:
+            return images.contiguous(memory_format = torch.channels_last)
+
+        return images
+
+    def _scaler(self, name):
+        if name not in self.scalers:
+            self.scalers[name] = torch.cuda.amp.GradScaler()
+
+        return self.scalers[name]
+
+    def step(self, loss, optimizer, name):
+        if not self.use_scaler:
+            loss.backward()
+            optimizer.step()
+            return
+
+        scaler = self._scaler(name)
+        scaler.scale(loss).backward()
+        scaler.step(optimizer)
+        scaler.update()
+
+    def state_dict(self):
+        return { name: scaler.state_dict() for name, scaler in self.scalers.items() }
+
+    def load_state_dict(self, state_dict):
+        for name, scaler_state in state_dict.items():
+            if self.use_scaler:
+                self._scaler(name).load_state_dict(scaler_state)
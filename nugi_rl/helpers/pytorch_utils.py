@@ -56,8 +56,48 @@ def to_tensor(datas, use_gpu = True, first_unsqueeze = False, last_unsqueeze = F
     
     return datas
 
+@torch.no_grad()
 def copy_parameters(source_model, target_model, tau = 0.95):
-    for target_param, param in zip(target_model.parameters(), source_model.parameters()):
-        target_param.data.copy_(target_param.data * tau + param.data * (1.0 - tau))
+    target_params = list(target_model.parameters())
+
+    torch._foreach_mul_(target_params, tau)
+    torch._foreach_add_(target_params, list(source_model.parameters()), alpha = 1.0 - tau)
 
     return target_model
+
+def discounted_reverse_scan(deltas, decays, block_size = 256):
+    shape       = deltas.shape
+    deltas      = deltas.reshape(shape[0], -1)
+    decays      = decays.reshape(shape[0], -1)
+
+    results     = torch.zeros_like(deltas)
+    carry       = torch.zeros_like(deltas[0])
+
+    for end in range(shape[0], 0, -block_size):
+        start   = max(end - block_size, 0)
+        delta   = deltas[start:end]
+        decay   = decays[start:end]
+
+        mask    = torch.ones(end - start, end - start, dtype = torch.bool, device = deltas.device).triu().unsqueeze(-1)
+        factors = torch.where(mask, decay.unsqueeze(0), torch.ones_like(decay).unsqueeze(0))
+
+        cumprods    = factors.cumprod(1)
+        weights     = torch.cat((torch.ones_like(cumprods[:, :1]), cumprods[:, :-1]), 1) * mask
+
+        block       = torch.einsum('tsn,sn->tn', weights, delta) + cumprods[:, -1] * carry
+        results[start:end] = block
+        carry       = block[0]
+
+    return results.reshape(shape)
+
+def cat_datas(datas):
+    if isinstance(datas[0], tuple):
+        return tuple(torch.cat(data) for data in zip(*datas))
+
+    return torch.cat(datas)
+
+def split_datas(datas, n):
+    if isinstance(datas, tuple):
+        return tuple(data[:n] for data in datas), tuple(data[n:] for data in datas)
+
+    return datas[:n], datas[n:]
@@ -0,0 +1,108 @@
+import queue
+from multiprocessing import shared_memory, resource_tracker
+
+import numpy as np
+
+class SharedRolloutRing():
+    def __init__(self, ctx, n_slots, n_steps, state_shape, action_shape = (), logprob_shape = None, state_dtype = np.float32):
+        self.n_slots        = n_slots
+        self.n_steps        = n_steps
+
+        self.specs          = [
+            ('states', (n_steps, *state_shape), state_dtype),
+            ('actions', (n_steps, *action_shape), np.float32),
+            ('rewards', (n_steps, ), np.float32),
+            ('dones', (n_steps, ), np.float32),
+            ('next_states', (n_steps, *state_shape), state_dtype),
+            ('lengths', (), np.int64),
+            ('versions', (), np.int64),
+        ]
+
+        if logprob_shape is not None:
+            self.specs.append(('logprobs', (n_steps, *logprob_shape), np.float32))
+
+        size                = sum(self._nbytes(shape, dtype) for _, shape, dtype in self.specs)
+        self.shm            = shared_memory.SharedMemory(create = True, size = size)
+        self.is_owner       = True
+
+        # only slot ids travel through the queue, the rollouts themselves stay in the shared block
+        self.free_slots     = ctx.Queue()
+        for slot in range(n_slots):
+            self.free_slots.put(slot)
+
+        self._attach()
+
+    def _nbytes(self, shape, dtype):
+        return self.n_slots * int(np.prod(shape, dtype = np.int64)) * np.dtype(dtype).itemsize
+
+    def _attach(self):
+        self.columns = {}
+
+        offset = 0
+        for name, shape, dtype in self.specs:
+            self.columns[name] = np.ndarray((self.n_slots, *shape), dtype = dtype, buffer = self.shm.buf, offset = offset)
+            offset += self._nbytes(shape, dtype)
+
+    def __getstate__(self):
+        state           = self.__dict__.copy()
+        state['shm']    = self.shm.name
+        del state['columns']
+
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.shm        = shared_memory.SharedMemory(name = state['shm'])
+        self.is_owner   = False
+
+        # a spawned child must not let its resource tracker unlink the learner's block when it exits
+        resource_tracker.unregister(self.shm._name, 'shared_memory')
+
+        self._attach()
+
+    def acquire(self, stop_event, timeout = 0.1):
+        # no free slot means the learner is behind, the child waits here until one is released or shutdown starts
+        while not stop_event.is_set():
+            try:
+                return self.free_slots.get(timeout = timeout)
+            except queue.Empty:
+                continue
+
+        return None
+
+    def release(self, slot):
+        self.free_slots.put(slot)
+
+    def write(self, slot, states, actions, rewards, dones, next_states, version, logprobs = None):
+        length = len(dones)
+        if length > self.n_steps:
+            raise Exception('rollout of {} steps does not fit in a slot of {} steps'.format(length, self.n_steps))
+
+        self.columns['states'][slot, :length]       = states
+        self.columns['actions'][slot, :length]      = np.reshape(actions, (length, *self.columns['actions'].shape[2:]))
+        self.columns['rewards'][slot, :length]      = np.reshape(rewards, -1)
+        self.columns['dones'][slot, :length]        = np.reshape(dones, -1)
+        self.columns['next_states'][slot, :length]  = next_states
+
+        if logprobs is not None:
+            self.columns['logprobs'][slot, :length] = np.reshape(logprobs, (length, *self.columns['logprobs'].shape[2:]))
+
+        self.columns['versions'][slot]  = version
+        self.columns['lengths'][slot]   = length
+
+    def read(self, slot):
+        length  = int(self.columns['lengths'][slot])
+        datas   = tuple(self.columns[name][slot, :length].copy() for name in ('states', 'actions', 'rewards', 'dones', 'next_states'))
+
+        logprobs = self.columns['logprobs'][slot, :length].copy() if 'logprobs' in self.columns else None
+        return datas, logprobs, int(self.columns['versions'][slot])
+
+    def close(self):
+        self.columns = {}
+        self.shm.close()
+
+        if self.is_owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,43 @@
+import numpy as np
+
+class SumTree():
+    def __init__(self, capacity):
+        self.capacity   = capacity
+        self.n_leaves   = 1
+        while self.n_leaves < capacity:
+            self.n_leaves *= 2
+
+        # node 1 is the root, node i has children 2i and 2i + 1, the leaves start at n_leaves
+        self.tree       = np.zeros(2 * self.n_leaves, dtype = np.float64)
+
+    def total(self):
+        return self.tree[1]
+
+    def get(self, indices):
+        return self.tree[np.asarray(indices) + self.n_leaves]
+
+    def update(self, indices, priorities):
+        nodes               = np.asarray(indices, dtype = np.int64) + self.n_leaves
+        self.tree[nodes]    = priorities
+
+        nodes = np.unique(nodes // 2)
+        while nodes[0] >= 1:
+            self.tree[nodes] = self.tree[2 * nodes] + self.tree[2 * nodes + 1]
+            if nodes[0] == 1:
+                break
+
+            nodes = np.unique(nodes // 2)
+
+    def find(self, values):
+        values  = np.array(values, dtype = np.float64)
+        nodes   = np.ones(len(values), dtype = np.int64)
+
+        while nodes[0] < self.n_leaves:
+            left        = 2 * nodes
+            # never descend into an empty subtree, rounding can push a value just past the last non zero leaf
+            go_right    = (values >= self.tree[left]) & (self.tree[left + 1] > 0)
+
+            values      = np.where(go_right, values - self.tree[left], values)
+            nodes       = np.where(go_right, left + 1, left)
+
+        return np.minimum(nodes - self.n_leaves, self.capacity - 1)
@@ -0,0 +1,38 @@
+import torch
+
+class TargetNetworks():
+    def __init__(self, pairs, tau = 0.95, update_every = 1):
+        self.tau            = tau
+        self.update_every   = update_every
+        self.i_step         = 0
+
+        self.source_params  = []
+        self.target_params  = []
+
+        # every (source, target) pair goes into the same flat lists, so all targets are blended by one pair of foreach kernels
+        for source, target in pairs:
+            if source is None:
+                continue
+
+            source_params, target_params = list(source.parameters()), list(target.parameters())
+            if len(source_params) != len(target_params):
+                raise Exception('source and target network must have the same parameters')
+
+            self.source_params.extend(source_params)
+            self.target_params.extend(target_params)
+
+    @torch.no_grad()
+    def update(self):
+        self.i_step += 1
+        if self.i_step % self.update_every != 0:
+            return False
+
+        torch._foreach_mul_(self.target_params, self.tau)
+        torch._foreach_add_(self.target_params, self.source_params, alpha = 1.0 - self.tau)
+
+        return True
+
+    @torch.no_grad()
+    def hard_update(self):
+        for target_param, param in zip(self.target_params, self.source_params):
+            target_param.copy_(param)
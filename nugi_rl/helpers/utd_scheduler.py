@@ -0,0 +1,60 @@
+import torch
+
+class UTDScheduler():
+    def __init__(self, memory, batch_size, utd_ratio = 1.0, env_steps_per_update = 1, device = torch.device('cuda:0'), include_latest = False):
+        self.memory                 = memory
+        self.batch_size             = batch_size
+        self.utd_ratio              = utd_ratio
+        self.env_steps_per_update   = env_steps_per_update
+        self.device                 = device
+        self.include_latest         = include_latest
+
+        self.carry                  = 0.0
+
+    def n_updates(self):
+        # fractional ratios are carried over, e.g. utd_ratio 0.25 with one env step per update trains on every fourth call
+        self.carry  += self.utd_ratio * self.env_steps_per_update
+        n_updates   = int(self.carry)
+        self.carry  -= n_updates
+
+        return n_updates
+
+    def sample(self, n_updates):
+        indices, weights = self.memory.sample_indices(n_updates * self.batch_size)
+
+        # prioritized sampling is stratified in ascending priority order, shuffle so every minibatch spans the whole buffer
+        order   = torch.randperm(n_updates * self.batch_size)
+        indices = indices[order].reshape(n_updates, self.batch_size)
+
+        if weights is None and self.include_latest:
+            indices[:, -1] = len(self.memory) - 1
+
+        # one gather and one host to device copy for all K minibatches, every gradient step then takes a view
+        datas   = [data.to(self.device, non_blocking = True) for data in self.memory.sample_batch(indices.reshape(-1))]
+        datas   = [data.reshape(n_updates, self.batch_size, *data.shape[1:]) for data in datas]
+
+        if weights is not None:
+            weights = weights[order].to(self.device, non_blocking = True).reshape(n_updates, self.batch_size, *weights.shape[1:])
+            weights = weights / weights.reshape(n_updates, -1).max(1)[0].reshape(n_updates, *([1] * (weights.dim() - 1)))
+
+        return datas, indices, weights
+
+    def __iter__(self):
+        n_updates = self.n_updates()
+        if n_updates == 0:
+            return
+
+        (states, actions, rewards, dones, next_states), indices, weights = self.sample(n_updates)
+
+        for i in range(n_updates):
+            yield states[i], actions[i], rewards[i], dones[i], next_states[i], indices[i], weights[i] if weights is not None else None
+
+    @staticmethod
+    def compile(step, compile_mode = None):
+        if compile_mode is None:
+            return step
+        elif compile_mode == 'compile':
+            # backward, optimizer steps and priority updates break the graph, so only the pieces in between get compiled
+            return torch.compile(step)
+        else:
+            raise Exception('compile_mode must be one of None or \'compile\'')
@@ -0,0 +1,85 @@
+from multiprocessing import shared_memory, resource_tracker
+
+import numpy as np
+import torch
+from torch.nn.utils import parameters_to_vector, vector_to_parameters
+
+class WeightBroadcast():
+    header_size = 8
+
+    def __init__(self, module, name = None):
+        self.n_params   = sum(param.numel() for param in module.parameters())
+        self.is_owner   = name is None
+
+        if self.is_owner:
+            self.shm    = shared_memory.SharedMemory(create = True, size = self.header_size + self.n_params * 4)
+        else:
+            self._attach_shm(name)
+
+        self.version    = 0
+        self._attach()
+
+        if self.is_owner:
+            self.header[0] = 0
+            self.publish(module)
+
+    def _attach_shm(self, name):
+        # attaching registers the block with this process's resource tracker too, which would unlink it when the actor exits
+        self.shm    = shared_memory.SharedMemory(name = name)
+        resource_tracker.unregister(self.shm._name, 'shared_memory')
+
+    def _attach(self):
+        self.header     = np.ndarray((1, ), dtype = np.int64, buffer = self.shm.buf)
+        self.vector     = np.ndarray((self.n_params, ), dtype = np.float32, buffer = self.shm.buf, offset = self.header_size)
+
+    def __getstate__(self):
+        # actors only get the name of the block and attach to it themselves, the weights never go through pickle
+        return { 'name': self.shm.name, 'n_params': self.n_params }
+
+    def __setstate__(self, state):
+        self.n_params   = state['n_params']
+        self.is_owner   = False
+        self.version    = 0
+
+        self._attach_shm(state['name'])
+
+        self._attach()
+
+    @torch.no_grad()
+    def publish(self, module):
+        # seqlock, an odd header means a write is in progress and readers retry
+        self.header[0]  = 2 * self.version + 1
+        self.vector[:]  = parameters_to_vector(module.parameters()).detach().float().cpu().numpy()
+
+        self.version    += 1
+        self.header[0]  = 2 * self.version
+
+    @torch.no_grad()
+    def pull(self, module):
+        while True:
+            header = int(self.header[0])
+            if header == 2 * self.version:
+                return False
+
+            if header % 2 == 1:
+                continue
+
+            vector = self.vector.copy()
+            if int(self.header[0]) == header:
+                break
+
+        params = list(module.parameters())
+        vector_to_parameters(torch.from_numpy(vector).to(params[0].device), params)
+        self.version = header // 2
+
+        return True
+
+    def close(self):
+        self.header, self.vector = None, None
+        self.shm.close()
+
+        if self.is_owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
@@ -5,11 +5,22 @@ class QLoss():
         self.gamma = gamma
         self.alpha = alpha
 
-    def compute_loss(self, q1_value, q2_value, naive_q1_value, naive_q2_value, target_next_value, rewards, dones):
+    def compute_td_error(self, q1_value, q2_value, target_next_value, rewards, dones):
         target_q_value          = (rewards + (1 - dones) * self.gamma * target_next_value).detach()
+        return ((target_q_value - q1_value).abs() + (target_q_value - q2_value).abs()).detach() * 0.5
 
-        td_error1               = ((target_q_value - q1_value).pow(2) * 0.5).mean()
-        td_error2               = ((target_q_value - q2_value).pow(2) * 0.5).mean()
+    def compute_loss(self, q1_value, q2_value, naive_q1_value, naive_q2_value, target_next_value, rewards, dones, weights = None):
+        target_q_value          = (rewards + (1 - dones) * self.gamma * target_next_value).detach()
+
+        td_error1               = (target_q_value - q1_value).pow(2) * 0.5
+        td_error2               = (target_q_value - q2_value).pow(2) * 0.5
+
+        if weights is not None:
+            td_error1           = td_error1 * weights
+            td_error2           = td_error2 * weights
+
+        td_error1               = td_error1.mean()
+        td_error2               = td_error2.mean()
 
         cql_regularizer1        = ((naive_q1_value - q1_value) * self.alpha).mean()
         cql_regularizer2        = ((naive_q2_value - q2_value) * self.alpha).mean()
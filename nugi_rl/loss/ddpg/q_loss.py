@@ -4,7 +4,15 @@ class QLoss():
     def __init__(self, gamma = 0.99):
         self.gamma = gamma
 
-    def compute_loss(self, predicted_q_value, target_next_q, reward, done):
+    def compute_td_error(self, predicted_q_value, target_next_q, reward, done):
         target_q_value  = (reward + (1 - done) * self.gamma * target_next_q).detach()
-        q_value_loss    = ((target_q_value - predicted_q_value).pow(2) * 0.5).mean()    
-        return q_value_loss
\ No newline at end of file
+        return (target_q_value - predicted_q_value).abs().detach()
+
+    def compute_loss(self, predicted_q_value, target_next_q, reward, done, weights = None):
+        target_q_value  = (reward + (1 - done) * self.gamma * target_next_q).detach()
+        q_value_loss    = (target_q_value - predicted_q_value).pow(2) * 0.5
+
+        if weights is not None:
+            q_value_loss = q_value_loss * weights
+
+        return q_value_loss.mean()
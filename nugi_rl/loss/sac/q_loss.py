@@ -5,10 +5,18 @@ class QLoss():
         self.gamma          = gamma
         self.distribution   = distribution
 
-    def compute_loss(self, predicted_q_value1, predicted_q_value2, target_value, reward, done):
+    def compute_td_error(self, predicted_q_value1, predicted_q_value2, target_value, reward, done):
         target_q_value          = (reward + (1 - done) * self.gamma * target_value).detach()
+        return ((target_q_value - predicted_q_value1).abs() + (target_q_value - predicted_q_value2).abs()).detach() * 0.5
 
-        q_value_loss1           = ((target_q_value - predicted_q_value1).pow(2) * 0.5).mean()
-        q_value_loss2           = ((target_q_value - predicted_q_value2).pow(2) * 0.5).mean()
+    def compute_loss(self, predicted_q_value1, predicted_q_value2, target_value, reward, done, weights = None):
+        target_q_value          = (reward + (1 - done) * self.gamma * target_value).detach()
+
+        q_value_loss1           = (target_q_value - predicted_q_value1).pow(2) * 0.5
+        q_value_loss2           = (target_q_value - predicted_q_value2).pow(2) * 0.5
+
+        if weights is not None:
+            q_value_loss1       = q_value_loss1 * weights
+            q_value_loss2       = q_value_loss2 * weights
         
-        return q_value_loss1 + q_value_loss2
\ No newline at end of file
+        return q_value_loss1.mean() + q_value_loss2.mean()
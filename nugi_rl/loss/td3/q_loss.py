@@ -4,11 +4,21 @@ class QLoss():
     def __init__(self, gamma = 0.99):
         self.gamma = gamma
 
-    def compute_loss(self, predicted_q_value1, predicted_q_value2, target_next_q1, target_next_q2, rewards, dones):
+    def compute_td_error(self, predicted_q_value1, predicted_q_value2, target_next_q1, target_next_q2, rewards, dones):
         next_value              = torch.min(target_next_q1, target_next_q2)
         target_q_value          = (rewards + (1 - dones) * self.gamma * next_value).detach()
 
-        td_error1               = ((target_q_value - predicted_q_value1).pow(2) * 0.5).mean()
-        td_error2               = ((target_q_value - predicted_q_value2).pow(2) * 0.5).mean()
+        return ((target_q_value - predicted_q_value1).abs() + (target_q_value - predicted_q_value2).abs()).detach() * 0.5
 
-        return td_error1 + td_error2
\ No newline at end of file
+    def compute_loss(self, predicted_q_value1, predicted_q_value2, target_next_q1, target_next_q2, rewards, dones, weights = None):
+        next_value              = torch.min(target_next_q1, target_next_q2)
+        target_q_value          = (rewards + (1 - dones) * self.gamma * next_value).detach()
+
+        td_error1               = (target_q_value - predicted_q_value1).pow(2) * 0.5
+        td_error2               = (target_q_value - predicted_q_value2).pow(2) * 0.5
+
+        if weights is not None:
+            td_error1           = td_error1 * weights
+            td_error2           = td_error2 * weights
+
+        return td_error1.mean() + td_error2.mean()
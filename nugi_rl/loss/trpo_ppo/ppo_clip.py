@@ -11,9 +11,10 @@ class PPOClip():
         self.distribution       = distribution
 
     # Loss for PPO  
-    def compute_loss(self, action_datas, old_action_datas, values, old_values, next_values, actions, rewards, dones):
-        advantages      = self.advantage_function.compute_advantages(rewards, values, next_values, dones).detach()
-        returns         = (advantages + values).detach()
+    def compute_loss(self, action_datas, old_action_datas, values, old_values, next_values, actions, rewards, dones, advantages = None, returns = None):
+        if advantages is None:
+            advantages  = self.advantage_function.compute_advantages(rewards, values, next_values, dones).detach()
+            returns     = (advantages + values).detach()
 
         logprobs        = self.distribution.logprob(action_datas, actions) + 1e-5
         old_logprobs    = (self.distribution.logprob(old_action_datas, actions) + 1e-5).detach()
@@ -1,4 +1,5 @@
 from copy import deepcopy
+import numpy as np
 import torch
 from torch.utils.data import Dataset
 
@@ -19,6 +20,19 @@ class AuxPpgMemory(Dataset):
     def __getitem__(self, idx):
         return torch.tensor(self.states[idx])
 
+    def sample_batch(self, indices):
+        indices = np.asarray(indices).tolist()
+        return torch.tensor(np.array([self.states[idx] for idx in indices]), dtype = torch.float32)
+
+    def iter_minibatches(self, batch_size, shuffle = False):
+        if shuffle:
+            indices = torch.randperm(len(self))
+        else:
+            indices = torch.arange(len(self))
+
+        for start in range(0, len(self), batch_size):
+            yield self.sample_batch(indices[start:start + batch_size])
+
     def save_obs(self, state):
         if len(self) >= self.capacity:
             del self.states[0]
@@ -0,0 +1,177 @@
+import zlib
+import numpy as np
+import torch
+
+from memory.policy.standard import PolicyMemory
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:
+    lz4_frame = None
+
+class FramePolicyMemory(PolicyMemory):
+    def __init__(self, capacity = 100000, datas = None, frame_capacity = None, compress = False):
+        self.capacity       = capacity
+        self.frame_capacity = frame_capacity if frame_capacity is not None else capacity + capacity // 4 + 1
+        self.compress       = compress
+
+        self.head           = 0
+        self.position       = 0
+        self.size           = 0
+        self.n_frames       = 0
+        self.extras         = {}
+
+        self.frames         = None
+        self.frame_shape    = None
+
+        self.state_ids      = np.zeros(self.capacity, dtype = np.int64)
+        self.next_state_ids = np.zeros(self.capacity, dtype = np.int64)
+        self.actions        = None
+        self.rewards        = np.zeros((self.capacity, 1), dtype = np.float32)
+        self.dones          = np.zeros((self.capacity, 1), dtype = np.float32)
+
+        if datas is not None:
+            states, actions, rewards, dones, next_states = datas
+            if len(dones) > self.capacity:
+                raise Exception('datas cannot be longer than capacity')
+
+            self.save_all(states, actions, rewards, dones, next_states)
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, idx):
+        states, actions, rewards, dones, next_states = self.sample_batch([int(idx)])
+        return states[0], actions[0], rewards[0], dones[0], next_states[0]
+
+    def _physical_indices(self, indices):
+        return (self.head + np.asarray(indices) % self.size) % self.capacity
+
+    def _evict(self):
+        self.head   = (self.head + 1) % self.capacity
+        self.size   -= 1
+
+    def _encode_frame(self, frame):
+        frame = np.ascontiguousarray(frame, dtype = np.uint8)
+        if lz4_frame is not None:
+            return lz4_frame.compress(frame)
+        return zlib.compress(frame, 1)
+
+    def _decode_frame(self, payload):
+        if lz4_frame is not None:
+            payload = lz4_frame.decompress(payload)
+        else:
+            payload = zlib.decompress(payload)
+
+        return np.frombuffer(payload, dtype = np.uint8).reshape(self.frame_shape)
+
+    def _push_frame(self, frame):
+        if self.frame_shape is None:
+            self.frame_shape    = np.shape(frame)
+            self.frames         = [None] * self.frame_capacity if self.compress else np.zeros((self.frame_capacity, *self.frame_shape), dtype = np.uint8)
+
+        frame_id = self.n_frames
+
+        # the frame pool is a ring too, drop the oldest transitions whose frames are about to be overwritten
+        while self.size > 0 and self.state_ids[self.head] <= frame_id - self.frame_capacity:
+            self._evict()
+
+        if self.compress:
+            self.frames[frame_id % self.frame_capacity] = self._encode_frame(frame)
+        else:
+            self.frames[frame_id % self.frame_capacity] = frame
+
+        self.n_frames += 1
+        return frame_id
+
+    def _last_frame(self):
+        frame_id = self.n_frames - 1
+        if self.compress:
+            return self._decode_frame(self.frames[frame_id % self.frame_capacity])
+        return self.frames[frame_id % self.frame_capacity]
+
+    def _get_frames(self, frame_ids):
+        slots = np.asarray(frame_ids) % self.frame_capacity
+        if self.compress:
+            return np.stack([self._decode_frame(self.frames[slot]) for slot in slots])
+        return self.frames[slots]
+
+    def _gather(self, indices):
+        indices = self._physical_indices(indices)
+
+        return self._get_frames(self.state_ids[indices]), self.actions[indices], self.rewards[indices], \
+            self.dones[indices], self._get_frames(self.next_state_ids[indices])
+
+    def transform(self, image):
+        return self.normalize(torch.from_numpy(np.asarray(image, dtype = np.uint8)).unsqueeze(0)).squeeze(0)
+
+    def normalize(self, images):
+        return images.permute(0, 3, 1, 2).float().div_(127.5).sub_(1.0)
+
+    def sample_batch(self, indices):
+        states, actions, rewards, dones, next_states = self._gather(indices)
+
+        return torch.from_numpy(states), torch.from_numpy(actions), torch.from_numpy(rewards), \
+            torch.from_numpy(dones), torch.from_numpy(next_states)
+
+    def save_obs(self, state, action, reward, done, next_state):
+        if self.actions is None:
+            self.actions = np.zeros((self.capacity, *np.shape(action)), dtype = np.float32)
+
+        # next_state of the previous step is usually the state of this one, so it is only stored once
+        if self.size > 0 and self.dones[(self.head + self.size - 1) % self.capacity, 0] == 0 and np.array_equal(self._last_frame(), state):
+            state_id = self.n_frames - 1
+        else:
+            state_id = self._push_frame(state)
+
+        next_state_id = self._push_frame(next_state)
+
+        if self.size == self.capacity:
+            self._evict()
+
+        position = (self.head + self.size) % self.capacity
+
+        self.state_ids[position]        = state_id
+        self.next_state_ids[position]   = next_state_id
+        self.actions[position]          = action
+        self.rewards[position]          = reward
+        self.dones[position]            = done
+
+        self.position   = (position + 1) % self.capacity
+        self.size       += 1
+
+    def save_replace_all(self, states, actions, rewards, dones, next_states):
+        self.clear_memory()
+        self.save_all(states, actions, rewards, dones, next_states)
+
+    def save_all(self, states, actions, rewards, dones, next_states):
+        for state, action, reward, done, next_state in zip(states, actions, rewards, dones, next_states):
+            self.save_obs(state, action, reward, done, next_state)
+
+    def get_all_items(self):
+        return self.get_ranged_items()
+
+    def get_ranged_items(self, start_position = 0, end_position = None):
+        if self.size == 0:
+            return [], [], [], [], []
+
+        if end_position is None or end_position == -1:
+            indices = np.arange(self.size)[start_position:]
+        else:
+            indices = np.arange(self.size)[start_position:end_position + 1]
+
+        states, actions, rewards, dones, next_states = self._gather(indices)
+        return states, actions, rewards[:, 0], dones[:, 0], next_states
+
+    def clear_memory(self):
+        self.head       = 0
+        self.position   = 0
+        self.size       = 0
+        self.n_frames   = 0
+        self.extras     = {}
+
+        if self.compress and self.frames is not None:
+            self.frames = [None] * self.frame_capacity
+
+    def clear_idx(self, idx):
+        raise Exception('frame memory does not support removing a single item')
@@ -0,0 +1,154 @@
+import numpy as np
+import torch
+
+from memory.policy.standard import PolicyMemory
+
+class FrameStackPolicyMemory(PolicyMemory):
+    def __init__(self, capacity = 100000, datas = None, num_stack = 4, frame_capacity = None):
+        self.capacity       = capacity
+        self.num_stack      = num_stack
+        self.frame_capacity = frame_capacity if frame_capacity is not None else capacity + capacity // 4 + 2 * num_stack
+
+        self.head           = 0
+        self.position       = 0
+        self.size           = 0
+        self.n_frames       = 0
+        self.extras         = {}
+
+        self.frames         = None
+
+        self.state_ids      = np.zeros(self.capacity, dtype = np.int64)
+        self.next_state_ids = np.zeros(self.capacity, dtype = np.int64)
+        self.episode_ids    = np.zeros(self.capacity, dtype = np.int64)
+        self.actions        = None
+        self.rewards        = np.zeros((self.capacity, 1), dtype = np.float32)
+        self.dones          = np.zeros((self.capacity, 1), dtype = np.float32)
+
+        if datas is not None:
+            states, actions, rewards, dones, next_states = datas
+            if len(dones) > self.capacity:
+                raise Exception('datas cannot be longer than capacity')
+
+            self.save_all(states, actions, rewards, dones, next_states)
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, idx):
+        states, actions, rewards, dones, next_states = self.sample_batch([int(idx)])
+        return states[0], actions[0], rewards[0], dones[0], next_states[0]
+
+    def _physical_indices(self, indices):
+        return (self.head + np.asarray(indices) % self.size) % self.capacity
+
+    def _evict(self):
+        self.head   = (self.head + 1) % self.capacity
+        self.size   -= 1
+
+    def _push_frame(self, frame):
+        if self.frames is None:
+            self.frames = np.zeros((self.frame_capacity, *np.shape(frame)), dtype = np.uint8)
+
+        frame_id = self.n_frames
+
+        # the oldest frame a transition needs is the first frame of its stack, clipped to its episode start
+        while self.size > 0 and max(self.state_ids[self.head] - self.num_stack + 1, self.episode_ids[self.head]) <= frame_id - self.frame_capacity:
+            self._evict()
+
+        self.frames[frame_id % self.frame_capacity] = frame
+        self.n_frames += 1
+
+        return frame_id
+
+    def _is_continued(self, state):
+        if self.size == 0:
+            return False
+
+        last = (self.head + self.size - 1) % self.capacity
+        return self.dones[last, 0] == 0 and np.array_equal(self.frames[self.next_state_ids[last] % self.frame_capacity], state[..., -1])
+
+    def _stack(self, frame_ids, episode_ids):
+        offsets = np.arange(self.num_stack - 1, -1, -1)
+        ids     = np.maximum(frame_ids[:, None] - offsets[None, :], episode_ids[:, None])
+
+        return np.moveaxis(self.frames[ids % self.frame_capacity], 1, -1)
+
+    def _gather(self, indices):
+        indices     = self._physical_indices(indices)
+        episode_ids = self.episode_ids[indices]
+
+        return self._stack(self.state_ids[indices], episode_ids), self.actions[indices], self.rewards[indices], \
+            self.dones[indices], self._stack(self.next_state_ids[indices], episode_ids)
+
+    def sample_batch(self, indices):
+        states, actions, rewards, dones, next_states = self._gather(indices)
+
+        return torch.from_numpy(states).float(), torch.from_numpy(actions), torch.from_numpy(rewards), \
+            torch.from_numpy(dones), torch.from_numpy(next_states).float()
+
+    def save_obs(self, state, action, reward, done, next_state):
+        state       = np.asarray(state, dtype = np.uint8)
+        next_state  = np.asarray(next_state, dtype = np.uint8)
+
+        if self.actions is None:
+            self.actions = np.zeros((self.capacity, *np.shape(action)), dtype = np.float32)
+
+        # inside an episode only the newest frame of next_state is new, the rest of both stacks are already stored
+        if self._is_continued(state):
+            last        = (self.head + self.size - 1) % self.capacity
+            episode_id  = self.episode_ids[last]
+            state_id    = self.next_state_ids[last]
+        else:
+            frame_ids   = [self._push_frame(state[..., i]) for i in range(self.num_stack)]
+            episode_id  = frame_ids[0]
+            state_id    = frame_ids[-1]
+
+        next_state_id = self._push_frame(next_state[..., -1])
+
+        if self.size == self.capacity:
+            self._evict()
+
+        position = (self.head + self.size) % self.capacity
+
+        self.state_ids[position]        = state_id
+        self.next_state_ids[position]   = next_state_id
+        self.episode_ids[position]      = episode_id
+        self.actions[position]          = action
+        self.rewards[position]          = reward
+        self.dones[position]            = done
+
+        self.position   = (position + 1) % self.capacity
+        self.size       += 1
+
+    def save_replace_all(self, states, actions, rewards, dones, next_states):
+        self.clear_memory()
+        self.save_all(states, actions, rewards, dones, next_states)
+
+    def save_all(self, states, actions, rewards, dones, next_states):
+        for state, action, reward, done, next_state in zip(states, actions, rewards, dones, next_states):
+            self.save_obs(state, action, reward, done, next_state)
+
+    def get_all_items(self):
+        return self.get_ranged_items()
+
+    def get_ranged_items(self, start_position = 0, end_position = None):
+        if self.size == 0:
+            return [], [], [], [], []
+
+        if end_position is None or end_position == -1:
+            indices = np.arange(self.size)[start_position:]
+        else:
+            indices = np.arange(self.size)[start_position:end_position + 1]
+
+        states, actions, rewards, dones, next_states = self._gather(indices)
+        return states, actions, rewards[:, 0], dones[:, 0], next_states
+
+    def clear_memory(self):
+        self.head       = 0
+        self.position   = 0
+        self.size       = 0
+        self.n_frames   = 0
+        self.extras     = {}
+
+    def clear_idx(self, idx):
+        raise Exception('frame stack memory does not support removing a single item')
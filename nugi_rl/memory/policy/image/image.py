@@ -6,6 +6,7 @@ class ImagePolicyMemory(PolicyMemory):
     def __init__(self, capacity = 100000, datas = None):
         self.capacity       = capacity
         self.position       = 0
+        self.extras         = {}
 
         if datas is None:
             self.states         = []
@@ -28,4 +29,11 @@ class ImagePolicyMemory(PolicyMemory):
         next_states = self.trans(self.next_states[idx])
 
         return states, torch.tensor(self.actions[idx]), torch.tensor([self.rewards[idx]]), \
-            torch.tensor([self.dones[idx]]), next_states
\ No newline at end of file
+            torch.tensor([self.dones[idx]]), next_states
+
+    def transform(self, image):
+        return self.trans(image)
+
+    def normalize(self, images):
+        # the batched version of self.trans for [batch, height, width, channel] uint8 images coming out of sample_batch
+        return images.permute(0, 3, 1, 2).float().div_(127.5).sub_(1.0)
\ No newline at end of file
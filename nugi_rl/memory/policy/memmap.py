@@ -0,0 +1,244 @@
+import json
+import os
+import numpy as np
+import torch
+
+from memory.policy.standard import PolicyMemory
+
+class MemmapPolicyMemory(PolicyMemory):
+    columns         = ('states', 'actions', 'rewards', 'dones', 'next_states')
+    scalar_columns  = ('rewards', 'dones')
+
+    def __init__(self, folder, capacity = 100000, datas = None, read_only = False, dtype = np.float32, manifest_every = 1000):
+        self.folder         = folder
+        self.read_only      = read_only
+        self.dtype          = dtype
+        self.manifest_every = manifest_every
+
+        self.position       = 0
+        self.size           = 0
+        self.extras         = {}
+
+        self.capacity       = capacity
+        self.specs          = None
+        self.buffers        = None
+
+        if os.path.exists(self._manifest_path()):
+            self._open()
+        elif read_only:
+            raise Exception('no dataset is found in {}'.format(folder))
+        else:
+            os.makedirs(folder, exist_ok = True)
+
+        if datas is not None:
+            self.save_all(*datas)
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, idx):
+        idx = int(idx)
+        if idx < -self.size or idx >= self.size:
+            raise IndexError('index {} is out of range for memory with size {}'.format(idx, self.size))
+
+        return tuple(torch.from_numpy(np.array(buffer[idx % self.size])) for buffer in self.buffers)
+
+    def __getstate__(self):
+        # memmaps would be pickled as full copies, so worker processes reopen the files instead
+        state = self.__dict__.copy()
+        state['buffers'] = None
+
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if self.specs is not None:
+            self._map()
+
+    def _manifest_path(self):
+        return os.path.join(self.folder, 'manifest.json')
+
+    def _column_path(self, name):
+        return os.path.join(self.folder, name + '.bin')
+
+    def _map(self):
+        mode            = 'r' if self.read_only else 'r+'
+        self.buffers    = [np.memmap(self._column_path(name), dtype = spec['dtype'], mode = mode, shape = (self.capacity, *spec['shape']))
+            for name, spec in zip(self.columns, self.specs)]
+
+    def _open(self):
+        with open(self._manifest_path(), 'r') as f:
+            manifest = json.load(f)
+
+        if list(manifest['columns']) != list(self.columns):
+            raise Exception('dataset in {} has columns {}, expected {}'.format(self.folder, list(manifest['columns']), list(self.columns)))
+
+        self.size       = manifest['size']
+        self.capacity   = manifest['capacity']
+        self.position   = self.size
+        self.specs      = [manifest['columns'][name] for name in self.columns]
+
+        # the manifest is only written every manifest_every rows, check the files really hold what it claims before mapping them
+        for name, spec in zip(self.columns, self.specs):
+            row_bytes   = np.dtype(spec['dtype']).itemsize * int(np.prod(spec['shape']))
+            n_rows      = os.path.getsize(self._column_path(name)) // row_bytes
+            if n_rows < self.capacity or self.size > self.capacity:
+                raise Exception('manifest in {} claims {} rows of capacity {} but {} holds {} rows'.format(self.folder, self.size, self.capacity, 
+                    self._column_path(name), n_rows))
+
+        self._map()
+
+    def _create(self, datas):
+        self.specs = []
+        for name, data in zip(self.columns, datas):
+            if name in self.scalar_columns:
+                self.specs.append({ 'dtype': 'float32', 'shape': [1] })
+            elif name == 'actions':
+                self.specs.append({ 'dtype': 'float32', 'shape': list(data.shape[1:]) })
+            else:
+                # float observations follow self.dtype, integer ones such as uint8 images keep their own dtype
+                dtype = self.dtype if data.dtype.kind == 'f' else data.dtype
+                self.specs.append({ 'dtype': np.dtype(dtype).name, 'shape': list(data.shape[1:]) })
+
+        for name, spec in zip(self.columns, self.specs):
+            np.memmap(self._column_path(name), dtype = spec['dtype'], mode = 'w+', shape = (self.capacity, *spec['shape'])).flush()
+
+        self._map()
+
+    def _grow(self, needed):
+        capacity = self.capacity
+        while capacity < needed:
+            capacity *= 2
+
+        self.flush()
+        self.buffers = None
+
+        for name, spec in zip(self.columns, self.specs):
+            row_bytes = np.dtype(spec['dtype']).itemsize * int(np.prod(spec['shape']))
+            with open(self._column_path(name), 'r+b') as f:
+                f.truncate(capacity * row_bytes)
+
+        self.capacity = capacity
+        self._map()
+
+    def _check_writable(self):
+        if self.read_only:
+            raise Exception('memory is opened as read only')
+
+    def flush(self):
+        if self.read_only or self.specs is None:
+            return
+
+        for buffer in self.buffers:
+            buffer.flush()
+
+        self._write_manifest()
+
+    def _write_manifest(self):
+        manifest = { 'version': 1, 'size': self.size, 'capacity': self.capacity, 'columns': dict(zip(self.columns, self.specs)) }
+        with open(self._manifest_path() + '.tmp', 'w') as f:
+            json.dump(manifest, f)
+
+        os.replace(self._manifest_path() + '.tmp', self._manifest_path())
+
+    def sample_batch(self, indices):
+        if self.size == 0:
+            raise Exception('cannot sample from an empty memory')
+
+        indices = np.asarray(indices) % self.size
+
+        # reading the file in ascending order keeps the page cache access mostly sequential
+        order   = np.argsort(indices, kind = 'stable')
+        sorted_indices = indices[order]
+
+        batch = []
+        for name, buffer in zip(self.columns, self.buffers):
+            datas           = np.empty((len(indices), *buffer.shape[1:]), dtype = buffer.dtype)
+            datas[order]    = buffer[sorted_indices]
+
+            datas = torch.from_numpy(datas)
+            if name not in self.scalar_columns and datas.dtype != torch.float32:
+                datas = datas.float()
+
+            batch.append(datas)
+
+        return tuple(batch)
+
+    def save_obs(self, *datas):
+        self._check_writable()
+        datas = [np.asarray(data)[None] for data in datas]
+
+        if self.specs is None:
+            self._create(datas)
+
+        if self.size + 1 > self.capacity:
+            self._grow(self.size + 1)
+
+        for buffer, data in zip(self.buffers, datas):
+            buffer[self.size] = data.reshape(buffer.shape[1:])
+
+        self.size       += 1
+        self.position   = self.size
+
+        # rewriting the manifest per step would cost a file write and a rename per env step, so it only follows every manifest_every rows
+        if self.size % self.manifest_every == 0:
+            self._write_manifest()
+
+    def save_replace_all(self, *datas):
+        self.clear_memory()
+        self.save_all(*datas)
+
+    def save_all(self, *datas):
+        self._check_writable()
+        datas = [np.asarray(data) for data in datas]
+
+        n_datas = len(datas[0])
+        if n_datas == 0:
+            return
+
+        if self.specs is None:
+            self._create(datas)
+
+        if self.size + n_datas > self.capacity:
+            self._grow(self.size + n_datas)
+
+        for buffer, data in zip(self.buffers, datas):
+            buffer[self.size:self.size + n_datas] = data.reshape(n_datas, *buffer.shape[1:])
+
+        self.size       += n_datas
+        self.position   = self.size
+
+        self.flush()
+
+    def get_all_items(self):
+        return self.get_ranged_items()
+
+    def get_ranged_items(self, start_position = 0, end_position = None):
+        if self.size == 0:
+            return tuple([] for _ in self.columns)
+
+        if end_position is None or end_position == -1:
+            indices = slice(start_position, None)
+        else:
+            indices = slice(start_position, end_position + 1)
+
+        start, stop, _  = indices.indices(self.size)
+        indices         = slice(start, max(start, stop))
+
+        return tuple(buffer[indices, 0] if name in self.scalar_columns else buffer[indices] for name, buffer in zip(self.columns, self.buffers))
+
+    def clear_memory(self):
+        self._check_writable()
+
+        self.size       = 0
+        self.position   = 0
+        self.extras     = {}
+
+        self.flush()
+
+    def close(self):
+        self.flush()
+        self.buffers = None
+
+    def clear_idx(self, idx):
+        raise Exception('memmap memory does not support removing a single item')
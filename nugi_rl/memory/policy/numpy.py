@@ -4,76 +4,157 @@ import torch
 from memory.policy.standard import PolicyMemory
 
 class NumpyPolicyMemory(PolicyMemory):
-    def __init__(self, datas = None):
-        if datas is None :
-            self.states         = np.array([], dtype = np.float32)
-            self.actions        = np.array([], dtype = np.float32)
-            self.rewards        = np.array([], dtype = np.float32)
-            self.dones          = np.array([], dtype = np.float32)
-            self.next_states    = np.array([], dtype = np.float32)
-        else:
-            self.states, self.actions, self.rewards, self.dones, self.next_states = datas
+    def __init__(self, capacity = None, datas = None, dtype = np.float32, initial_size = 1024):
+        self.capacity       = capacity
+        self.dtype          = dtype
+        self.initial_size   = initial_size if capacity is None else min(initial_size, capacity)
+
+        self.position       = 0
+        self.size           = 0
+        self.extras         = {}
+
+        self.states         = None
+        self.actions        = None
+        self.rewards        = None
+        self.dones          = None
+        self.next_states    = None
+
+        if datas is not None:
+            states, actions, rewards, dones, next_states = datas
+            self.save_all(states, actions, rewards, dones, next_states)
 
     def __len__(self):
-        return self.dones.size
+        return self.size
 
     def __getitem__(self, idx):
+        idx = self._physical_index(int(idx))
+
         return torch.from_numpy(self.states[idx]), torch.from_numpy(self.actions[idx]), torch.from_numpy(self.rewards[idx]), \
-            torch.from_numpy(self.dones[idx]), torch.from_numpy(self.next_states[idx])     
+            torch.from_numpy(self.dones[idx]), torch.from_numpy(self.next_states[idx])
+
+    def sample_batch(self, indices):
+        indices = self._physical_indices(indices)
+
+        return torch.from_numpy(self.states[indices]).float(), torch.from_numpy(self.actions[indices]), torch.from_numpy(self.rewards[indices]), \
+            torch.from_numpy(self.dones[indices]), torch.from_numpy(self.next_states[indices]).float()
+
+    def _allocate(self, state_shape, action_shape, size):
+        self.states         = np.zeros((size, *state_shape), dtype = self.dtype)
+        self.actions        = np.zeros((size, *action_shape), dtype = np.float32)
+        self.rewards        = np.zeros((size, 1), dtype = np.float32)
+        self.dones          = np.zeros((size, 1), dtype = np.float32)
+        self.next_states    = np.zeros((size, *state_shape), dtype = self.dtype)
+
+    def _reserve(self, state_shape, action_shape, n_datas):
+        if self.states is None:
+            self._allocate(state_shape, action_shape, max(self.initial_size, 1))
+
+        allocated   = len(self.dones)
+        needed      = self.size + n_datas
+        if self.capacity is not None:
+            needed = min(needed, self.capacity)
+
+        if needed <= allocated:
+            return
+
+        new_size = allocated
+        while new_size < needed:
+            new_size *= 2
+
+        if self.capacity is not None:
+            new_size = min(new_size, self.capacity)
+
+        # memory is never wrapped while it is still growing, so the filled rows are always [0, size)
+        old_buffers = (self.states, self.actions, self.rewards, self.dones, self.next_states)
+        self._allocate(state_shape, action_shape, new_size)
+
+        for buffer, old_buffer in zip((self.states, self.actions, self.rewards, self.dones, self.next_states), old_buffers):
+            buffer[:self.size] = old_buffer[:self.size]
+
+        # filling the old allocation exactly wrapped position to 0, new rows must go right after the copied ones
+        self.position = self.size
+
+    def _head(self):
+        return self.position if self.capacity is not None and self.size == self.capacity else 0
+
+    def _physical_index(self, idx):
+        if idx < -self.size or idx >= self.size:
+            raise IndexError('index {} is out of range for memory with size {}'.format(idx, self.size))
+
+        return (self._head() + idx % self.size) % len(self.dones)
+
+    def _physical_indices(self, indices):
+        return (self._head() + np.asarray(indices) % self.size) % len(self.dones)
 
     def save_obs(self, state, action, reward, done, next_state):
-        if len(self) == 0:
-            self.states         = np.array([state], dtype = np.float32)
-            self.actions        = np.array([action], dtype = np.float32)
-            self.rewards        = np.array([[reward]], dtype = np.float32)
-            self.dones          = np.array([[done]], dtype = np.float32)
-            self.next_states    = np.array([next_state], dtype = np.float32)
+        self._reserve(np.shape(state), np.shape(action), 1)
 
-        else:
-            self.states         = np.append(self.states, [state], axis = 0)
-            self.actions        = np.append(self.actions, [action], axis = 0)
-            self.rewards        = np.append(self.rewards, [[reward]], axis = 0)
-            self.dones          = np.append(self.dones, [[done]], axis = 0)
-            self.next_states    = np.append(self.next_states, [next_state], axis = 0)
+        self.states[self.position]      = state
+        self.actions[self.position]     = action
+        self.rewards[self.position]     = reward
+        self.dones[self.position]       = done
+        self.next_states[self.position] = next_state
+
+        self.position   = (self.position + 1) % len(self.dones)
+        self.size       = min(self.size + 1, len(self.dones))
 
     def save_replace_all(self, states, actions, rewards, dones, next_states):
         self.clear_memory()
-
-        self.states         = np.array(states)
-        self.actions        = np.array(actions)
-        self.rewards        = np.array(rewards)
-        self.dones          = np.array(dones)
-        self.next_states    = np.array(next_states)
+        self.save_all(states, actions, rewards, dones, next_states)
 
     def save_all(self, states, actions, rewards, dones, next_states):
-        self.states         = np.concatenate(self.states, np.array(states))
-        self.actions        = np.concatenate(self.actions, np.array(actions))
-        self.rewards        = np.concatenate(self.rewards, np.array(rewards))
-        self.dones          = np.concatenate(self.dones, np.array(dones))
-        self.next_states    = np.concatenate(self.next_states, np.array(next_states))
-
-    def get_all_items(self):         
-        return self.states, self.actions, self.rewards, self.dones, self.next_states
-
-    def get_ranged_items(self, start_position = 0, end_position = None):   
-        if end_position is not None or end_position == -1:
-            states      = self.states[start_position:end_position + 1]
-            actions     = self.actions[start_position:end_position + 1]
-            rewards     = self.rewards[start_position:end_position + 1]
-            dones       = self.dones[start_position:end_position + 1]
-            next_states = self.next_states[start_position:end_position + 1]
+        states          = np.asarray(states, dtype = self.dtype)
+        actions         = np.asarray(actions, dtype = np.float32)
+        rewards         = np.asarray(rewards, dtype = np.float32).reshape(-1, 1)
+        dones           = np.asarray(dones, dtype = np.float32).reshape(-1, 1)
+        next_states     = np.asarray(next_states, dtype = self.dtype)
+
+        n_datas = len(dones)
+        if n_datas == 0:
+            return
+
+        if self.capacity is not None and n_datas > self.capacity:
+            states, actions, rewards, dones, next_states = states[-self.capacity:], actions[-self.capacity:], rewards[-self.capacity:], \
+                dones[-self.capacity:], next_states[-self.capacity:]
+            n_datas = self.capacity
+
+        self._reserve(states.shape[1:], actions.shape[1:], n_datas)
+
+        allocated   = len(self.dones)
+        first       = min(n_datas, allocated - self.position)
+        second      = n_datas - first
+
+        for buffer, datas in zip((self.states, self.actions, self.rewards, self.dones, self.next_states), (states, actions, rewards, dones, next_states)):
+            buffer[self.position:self.position + first] = datas[:first]
+            buffer[:second]                             = datas[first:]
+
+        self.position   = (self.position + n_datas) % allocated
+        self.size       = min(self.size + n_datas, allocated)
+
+    def get_all_items(self):
+        return self.get_ranged_items()
+
+    def get_ranged_items(self, start_position = 0, end_position = None):
+        if self.size == 0:
+            return [], [], [], [], []
+
+        if end_position is None or end_position == -1:
+            indices = slice(start_position, None)
+        else:
+            indices = slice(start_position, end_position + 1)
+
+        if self._head() == 0:
+            start, stop, _ = indices.indices(self.size)
+            indices = slice(start, max(start, stop))
         else:
-            states      = self.states[start_position:]
-            actions     = self.actions[start_position:]
-            rewards     = self.rewards[start_position:]
-            dones       = self.dones[start_position:]
-            next_states = self.next_states[start_position:]
+            indices = self._physical_indices(np.arange(self.size)[indices])
 
-        return states, actions, rewards, dones, next_states
+        return self.states[indices], self.actions[indices], self.rewards[indices, 0], self.dones[indices, 0], self.next_states[indices]
 
     def clear_memory(self):
-        self.states         = np.delete(self.states, np.s_[:])
-        self.actions        = np.delete(self.actions, np.s_[:])
-        self.rewards        = np.delete(self.rewards, np.s_[:])
-        self.dones          = np.delete(self.dones, np.s_[:])
-        self.next_states    = np.delete(self.next_states, np.s_[:])
+        self.position   = 0
+        self.size       = 0
+        self.extras     = {}
+
+    def clear_idx(self, idx):
+        raise Exception('numpy memory does not support removing a single item')
@@ -0,0 +1,61 @@
+import numpy as np
+import torch
+
+from memory.policy.ring import RingPolicyMemory
+from helpers.sum_tree import SumTree
+
+class PrioritizedPolicyMemory(RingPolicyMemory):
+    def __init__(self, capacity = 100000, datas = None, dtype = np.float32, alpha = 0.6, beta = 0.4, beta_increment = 0.0, epsilon = 1e-6):
+        self.alpha          = alpha
+        self.beta           = beta
+        self.beta_increment = beta_increment
+        self.epsilon        = epsilon
+
+        self.tree           = SumTree(capacity)
+        self.max_priority   = 1.0
+
+        super().__init__(capacity, datas, dtype)
+
+    def _new_slots(self, position, n_datas):
+        return (position + np.arange(min(n_datas, self.capacity))) % self.capacity
+
+    def save_obs(self, state, action, reward, done, next_state):
+        position = self.position
+        super().save_obs(state, action, reward, done, next_state)
+
+        self.tree.update([position], self.max_priority ** self.alpha)
+
+    def save_all(self, states, actions, rewards, dones, next_states):
+        position = self.position
+        super().save_all(states, actions, rewards, dones, next_states)
+
+        self.tree.update(self._new_slots(position, len(dones)), self.max_priority ** self.alpha)
+
+    def sample_indices(self, batch_size):
+        # one value per equal segment of the total priority, so a batch covers the whole distribution
+        segment = self.tree.total() / batch_size
+        values  = (np.arange(batch_size) + np.random.uniform(size = batch_size)) * segment
+        slots   = self.tree.find(values)
+
+        indices = np.minimum((slots - self._head()) % self.capacity, self.size - 1)
+        slots   = self._physical_indices(indices)
+
+        # a slot the index clamp moved onto can still hold no priority, floor it at the smallest one update_priorities can give
+        probs   = np.maximum(self.tree.get(slots), self.epsilon ** self.alpha) / self.tree.total()
+        weights = (self.size * probs) ** -self.beta
+        weights = weights / weights.max()
+
+        self.beta = min(1.0, self.beta + self.beta_increment)
+        return torch.from_numpy(indices), torch.from_numpy(weights).float().unsqueeze(-1)
+
+    def update_priorities(self, indices, td_errors):
+        priorities          = np.abs(np.asarray(td_errors, dtype = np.float64).reshape(-1)) + self.epsilon
+        self.max_priority   = max(self.max_priority, priorities.max())
+
+        self.tree.update(self._physical_indices(indices), priorities ** self.alpha)
+
+    def clear_memory(self):
+        super().clear_memory()
+
+        self.tree           = SumTree(self.capacity)
+        self.max_priority   = 1.0
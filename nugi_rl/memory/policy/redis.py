@@ -1,71 +1,191 @@
-from copy import deepcopy
+from uuid import uuid4
+import numpy as np
 import torch
-import json
 
 from memory.policy.standard import PolicyMemory
+from helpers.chunk_codec import encode_chunk, decode_chunk
 
 class RedisPolicyMemory(PolicyMemory):
-    def __init__(self, redis, capacity = 100000):
+    def __init__(self, redis, capacity = 100000, chunk_size = 256, key = 'policy'):
         self.redis          = redis
         self.capacity       = capacity
-        self.position       = 0      
+        self.chunk_size     = chunk_size
+        self.key            = key
+        self.index_key      = key + ':chunks'
 
-    def __len__(self): 
-        return self.redis.llen('dones')
+        self.position       = 0
+        self.extras         = {}
+        self.pending        = ([], [], [], [], [])
+
+        # rows already in redis, kept up to date by _push_chunk and _evict so __len__ never has to read the index
+        _, offsets          = self._chunk_index()
+        self.n_stored       = int(offsets[-1])
+
+    def __len__(self):
+        return self.n_stored + len(self.pending[3])
 
     def __getitem__(self, idx):
-        idx = idx.item()
+        return tuple(datas[0] for datas in self.sample_batch([int(idx)]))
+
+    def _chunk_index(self):
+        chunk_keys  = [chunk_key.decode() if isinstance(chunk_key, bytes) else chunk_key for chunk_key in self.redis.lrange(self.index_key, 0, -1)]
+        offsets     = np.cumsum([0] + [int(chunk_key.rsplit(':', 1)[1]) for chunk_key in chunk_keys])
+
+        return chunk_keys, offsets
+
+    def _push_chunk(self, columns):
+        chunk_key   = '{}:chunk:{}:{}'.format(self.key, uuid4().hex, len(columns[3]))
+
+        pipeline    = self.redis.pipeline(transaction = True)
+        pipeline.set(chunk_key, encode_chunk(columns))
+        pipeline.rpush(self.index_key, chunk_key)
+        pipeline.execute()
+
+        self.n_stored += len(columns[3])
+
+    def _evict(self):
+        chunk_keys, offsets = self._chunk_index()
+
+        n_evicted = 0
+        while offsets[-1] - offsets[n_evicted] > self.capacity:
+            n_evicted += 1
+
+        # the index is read here anyway, so the count also picks up chunks pushed by other writers
+        self.n_stored = int(offsets[-1] - offsets[n_evicted])
+
+        if n_evicted > 0:
+            pipeline = self.redis.pipeline(transaction = True)
+            pipeline.ltrim(self.index_key, n_evicted, -1)
+            pipeline.delete(*chunk_keys[:n_evicted])
+            pipeline.execute()
+
+    def flush(self):
+        if len(self.pending[3]) == 0:
+            return
+
+        self._push_chunk(tuple(np.asarray(datas, dtype = np.float32) for datas in self.pending))
+        for datas in self.pending:
+            del datas[:]
+
+        self._evict()
+
+    def _fetch_chunks(self, select, n_retries = 3):
+        # another writer can evict a chunk between reading the index and fetching it, re-read the index and try again a few times
+        for _ in range(n_retries):
+            chunk_keys, offsets = self._chunk_index()
+            if offsets[-1] == 0:
+                raise Exception('cannot read from an empty memory')
+
+            chunk_ids   = select(offsets)
+            payloads    = self.redis.mget([chunk_keys[chunk_id] for chunk_id in chunk_ids]) if len(chunk_ids) > 0 else []
+
+            if all(payload is not None for payload in payloads):
+                return offsets, chunk_ids, payloads
+
+        raise Exception('chunks kept being evicted while reading, gave up after {} retries'.format(n_retries))
+
+    def sample_batch(self, indices, n_retries = 3):
+        self.flush()
 
-        states         = list(map(lambda e: json.loads(e), self.redis.lrange('states', idx, idx)))
-        actions        = list(map(lambda e: json.loads(e), self.redis.lrange('actions', idx, idx)))
-        rewards        = list(map(lambda e: json.loads(e), self.redis.lrange('rewards', idx, idx)))
-        dones          = list(map(lambda e: json.loads(e), self.redis.lrange('dones', idx, idx)))
-        next_states    = list(map(lambda e: json.loads(e), self.redis.lrange('next_states', idx, idx)))
+        def select(offsets):
+            return np.unique(np.searchsorted(offsets, np.asarray(indices) % offsets[-1], side = 'right') - 1)
 
-        return torch.tensor(states, dtype = torch.float32), torch.tensor(actions, dtype = torch.float32), \
-            torch.tensor(rewards, dtype = torch.float32), torch.tensor(dones, dtype = torch.float32), \
-            torch.tensor(next_states, dtype = torch.float32)
+        offsets, unique_ids, payloads = self._fetch_chunks(select, n_retries)
+
+        indices     = np.asarray(indices) % offsets[-1]
+        chunk_ids   = np.searchsorted(offsets, indices, side = 'right') - 1
+
+        batch = None
+        for chunk_id, payload in zip(unique_ids, payloads):
+            mask    = chunk_ids == chunk_id
+            rows    = indices[mask] - offsets[chunk_id]
+            columns = decode_chunk(payload)
+
+            if batch is None:
+                batch = [np.zeros((len(indices), ) + column.shape[1:], dtype = np.float32) for column in columns]
+
+            for datas, column in zip(batch, columns):
+                datas[mask] = column[rows]
+
+        states, actions, rewards, dones, next_states = [torch.from_numpy(datas) for datas in batch]
+        return states, actions, rewards.unsqueeze(-1), dones.unsqueeze(-1), next_states
 
     def save_obs(self, state, action, reward, done, next_state):
-        if len(self) >= self.capacity:
-            self.redis.ltrim('states', 1, -1)
-            self.redis.ltrim('actions', 1, -1)
-            self.redis.ltrim('rewards', 1, -1)
-            self.redis.ltrim('dones', 1, -1)
-            self.redis.ltrim('next_states', 1, -1)
-
-        self.redis.rpush('states', json.dumps(state))
-        self.redis.rpush('actions', json.dumps(action))
-        self.redis.rpush('rewards', json.dumps(reward))
-        self.redis.rpush('dones', json.dumps(done))
-        self.redis.rpush('next_states', json.dumps(next_state))
+        for datas, data in zip(self.pending, (state, action, reward, done, next_state)):
+            datas.append(data)
+
+        if len(self.pending[3]) >= self.chunk_size:
+            self.flush()
 
     def save_replace_all(self, states, actions, rewards, dones, next_states):
         self.clear_memory()
         self.save_all(states, actions, rewards, dones, next_states)
 
     def save_all(self, states, actions, rewards, dones, next_states):
-        for state, action, reward, done, next_state in zip(states, actions, rewards, dones, next_states):
-            self.save_obs(state, action, reward, done, next_state)
+        for datas, data in zip(self.pending, (states, actions, rewards, dones, next_states)):
+            datas.extend(data)
+
+        while len(self.pending[3]) >= self.chunk_size:
+            columns = tuple(np.asarray(datas[:self.chunk_size], dtype = np.float32) for datas in self.pending)
+            for datas in self.pending:
+                del datas[:self.chunk_size]
+
+            self._push_chunk(columns)
+
+        self._evict()
+
+    def get_all_items(self):
+        return self.get_ranged_items()
 
-    def get_all_items(self):         
-        return self.states, self.actions, self.rewards, self.dones, self.next_states
+    def _row_range(self, offsets, start_position, end_position):
+        if end_position is None or end_position == -1:
+            rows = slice(start_position, None)
+        else:
+            rows = slice(start_position, end_position + 1)
 
-    def get_ranged_items(self, start_position = 0, end_position = -1):   
-        states         = list(map(lambda e: json.loads(e), self.redis.lrange('states', start_position, end_position)))
-        actions        = list(map(lambda e: json.loads(e), self.redis.lrange('actions', start_position, end_position)))
-        rewards        = list(map(lambda e: json.loads(e), self.redis.lrange('rewards', start_position, end_position)))
-        dones          = list(map(lambda e: json.loads(e), self.redis.lrange('dones', start_position, end_position)))
-        next_states    = list(map(lambda e: json.loads(e), self.redis.lrange('next_states', start_position, end_position)))
+        start, stop, _ = rows.indices(int(offsets[-1]))
+        return start, max(start, stop)
 
-        return states, actions, rewards, dones, next_states  
+    def get_ranged_items(self, start_position = 0, end_position = -1):
+        self.flush()
+        if len(self) == 0:
+            return [], [], [], [], []
+
+        # runners read only the latest rollout, so only the chunks covering the requested rows are downloaded
+        def select(offsets):
+            start, stop = self._row_range(offsets, start_position, end_position)
+            if start == stop:
+                return np.zeros(0, dtype = np.int64)
+
+            first   = np.searchsorted(offsets, start, side = 'right') - 1
+            last    = np.searchsorted(offsets, stop - 1, side = 'right') - 1
+
+            return np.arange(first, last + 1)
+
+        offsets, chunk_ids, payloads = self._fetch_chunks(select)
+        if len(chunk_ids) == 0:
+            return [], [], [], [], []
+
+        start, stop = self._row_range(offsets, start_position, end_position)
+        columns     = [np.concatenate(column) for column in zip(*[decode_chunk(payload) for payload in payloads])]
+
+        base = offsets[chunk_ids[0]]
+        return tuple(column[start - base:stop - base] for column in columns)
 
     def clear_memory(self):
-        self.redis.delete('states')
-        self.redis.delete('actions')
-        self.redis.delete('rewards')
-        self.redis.delete('dones')
-        self.redis.delete('next_states')
+        self.extras = {}
+        for datas in self.pending:
+            del datas[:]
+
+        pipeline = self.redis.pipeline(transaction = True)
+        pipeline.lrange(self.index_key, 0, -1)
+        pipeline.delete(self.index_key)
+        chunk_keys, _ = pipeline.execute()
+
+        if len(chunk_keys) > 0:
+            self.redis.delete(*[chunk_key.decode() if isinstance(chunk_key, bytes) else chunk_key for chunk_key in chunk_keys])
+
+        self.n_stored = 0
 
     def clear_idx(self, idx):
-        raise Exception('not yet implemented! need more works for this function')
\ No newline at end of file
+        raise Exception('not yet implemented! need more works for this function')
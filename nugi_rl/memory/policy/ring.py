@@ -0,0 +1,140 @@
+import numpy as np
+import torch
+
+from memory.policy.standard import PolicyMemory
+
+class RingPolicyMemory(PolicyMemory):
+    def __init__(self, capacity = 100000, datas = None, dtype = np.float32):
+        self.capacity       = capacity
+        self.dtype          = dtype
+
+        self.position       = 0
+        self.size           = 0
+        self.extras         = {}
+
+        self.states         = None
+        self.actions        = None
+        self.rewards        = None
+        self.dones          = None
+        self.next_states    = None
+
+        if datas is not None:
+            states, actions, rewards, dones, next_states = datas
+            if len(dones) > self.capacity:
+                raise Exception('datas cannot be longer than capacity')
+
+            self.save_all(states, actions, rewards, dones, next_states)
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, idx):
+        idx = self._physical_index(int(idx))
+
+        # same dtypes as sample_batch, so a DataLoader over the memory and the sampled minibatches look alike
+        return torch.from_numpy(self.states[idx]).float(), torch.from_numpy(self.actions[idx]), torch.from_numpy(self.rewards[idx]), \
+            torch.from_numpy(self.dones[idx]), torch.from_numpy(self.next_states[idx]).float()
+
+    def sample_batch(self, indices):
+        indices = self._physical_indices(indices)
+
+        return torch.from_numpy(self.states[indices]).float(), torch.from_numpy(self.actions[indices]), torch.from_numpy(self.rewards[indices]), \
+            torch.from_numpy(self.dones[indices]), torch.from_numpy(self.next_states[indices]).float()
+
+    def _allocate(self, state, action):
+        state_shape         = np.shape(state)
+        action_shape        = np.shape(action)
+
+        self.states         = np.zeros((self.capacity, *state_shape), dtype = self.dtype)
+        self.actions        = np.zeros((self.capacity, *action_shape), dtype = np.float32)
+        self.rewards        = np.zeros((self.capacity, 1), dtype = np.float32)
+        self.dones          = np.zeros((self.capacity, 1), dtype = np.float32)
+        self.next_states    = np.zeros((self.capacity, *state_shape), dtype = self.dtype)
+
+    def _head(self):
+        return self.position if self.size == self.capacity else 0
+
+    def _physical_index(self, idx):
+        if idx < -self.size or idx >= self.size:
+            raise IndexError('index {} is out of range for memory with size {}'.format(idx, self.size))
+
+        return (self._head() + idx % self.size) % self.capacity
+
+    def _physical_indices(self, indices):
+        if self.size == 0:
+            raise Exception('cannot read from an empty memory')
+
+        indices = np.asarray(indices)
+        if indices.size > 0 and (indices.min() < -self.size or indices.max() >= self.size):
+            raise IndexError('indices must be in [{}, {}) for memory with size {}'.format(-self.size, self.size, self.size))
+
+        return (self._head() + indices % self.size) % self.capacity
+
+    def save_obs(self, state, action, reward, done, next_state):
+        if self.states is None:
+            self._allocate(state, action)
+
+        self.states[self.position]      = state
+        self.actions[self.position]     = action
+        self.rewards[self.position]     = reward
+        self.dones[self.position]       = done
+        self.next_states[self.position] = next_state
+
+        self.position   = (self.position + 1) % self.capacity
+        self.size       = min(self.size + 1, self.capacity)
+
+    def save_replace_all(self, states, actions, rewards, dones, next_states):
+        self.clear_memory()
+        self.save_all(states, actions, rewards, dones, next_states)
+
+    def save_all(self, states, actions, rewards, dones, next_states):
+        states          = np.asarray(states, dtype = self.dtype)
+        actions         = np.asarray(actions, dtype = np.float32)
+        rewards         = np.asarray(rewards, dtype = np.float32).reshape(-1, 1)
+        dones           = np.asarray(dones, dtype = np.float32).reshape(-1, 1)
+        next_states     = np.asarray(next_states, dtype = self.dtype)
+
+        n_datas = len(dones)
+        if n_datas == 0:
+            return
+
+        if self.states is None:
+            self._allocate(states[0], actions[0])
+
+        if n_datas > self.capacity:
+            states, actions, rewards, dones, next_states = states[-self.capacity:], actions[-self.capacity:], rewards[-self.capacity:], \
+                dones[-self.capacity:], next_states[-self.capacity:]
+            n_datas = self.capacity
+
+        first   = min(n_datas, self.capacity - self.position)
+        second  = n_datas - first
+
+        for buffer, datas in zip((self.states, self.actions, self.rewards, self.dones, self.next_states), (states, actions, rewards, dones, next_states)):
+            buffer[self.position:self.position + first] = datas[:first]
+            buffer[:second]                             = datas[first:]
+
+        self.position   = (self.position + n_datas) % self.capacity
+        self.size       = min(self.size + n_datas, self.capacity)
+
+    def get_all_items(self):
+        return self.get_ranged_items()
+
+    def get_ranged_items(self, start_position = 0, end_position = None):
+        if self.size == 0:
+            return [], [], [], [], []
+
+        if end_position is None or end_position == -1:
+            indices = np.arange(self.size)[start_position:]
+        else:
+            indices = np.arange(self.size)[start_position:end_position + 1]
+
+        indices = self._physical_indices(indices)
+        return self.states[indices], self.actions[indices], self.rewards[indices, 0], self.dones[indices, 0], self.next_states[indices]
+
+    def clear_memory(self):
+        self.position   = 0
+        self.size       = 0
+        self.extras     = {}
+
+    def clear_idx(self, idx):
+        raise Exception('ring buffer does not support removing a single item')
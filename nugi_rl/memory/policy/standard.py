@@ -1,4 +1,5 @@
 from copy import deepcopy
+import numpy as np
 import torch
 from torch.utils.data import Dataset
 
@@ -6,6 +7,7 @@ class PolicyMemory(Dataset):
     def __init__(self, capacity = 100000, datas = None):
         self.capacity       = capacity
         self.position       = 0
+        self.extras         = {}
 
         if datas is None:
             self.states         = []
@@ -26,6 +28,53 @@ class PolicyMemory(Dataset):
             torch.tensor([self.rewards[idx]], dtype = torch.float32), torch.tensor([self.dones[idx]], dtype = torch.float32), \
             torch.tensor(self.next_states[idx], dtype = torch.float32)
 
+    def sample_batch(self, indices):
+        indices = np.asarray(indices).tolist()
+
+        states      = torch.tensor(np.array([self.states[idx] for idx in indices]), dtype = torch.float32)
+        actions     = torch.tensor(np.array([self.actions[idx] for idx in indices]), dtype = torch.float32)
+        rewards     = torch.tensor(np.array([self.rewards[idx] for idx in indices]), dtype = torch.float32).unsqueeze(-1)
+        dones       = torch.tensor(np.array([self.dones[idx] for idx in indices]), dtype = torch.float32).unsqueeze(-1)
+        next_states = torch.tensor(np.array([self.next_states[idx] for idx in indices]), dtype = torch.float32)
+
+        return states, actions, rewards, dones, next_states
+
+    def sample_indices(self, batch_size):
+        return torch.randint(len(self), (batch_size, )), None
+
+    def update_priorities(self, indices, td_errors):
+        pass
+
+    def iter_minibatches(self, batch_size, shuffle = False):
+        if shuffle:
+            indices = torch.randperm(len(self))
+        else:
+            indices = torch.arange(len(self))
+
+        for start in range(0, len(self), batch_size):
+            batch_indices = indices[start:start + batch_size]
+
+            if self.extras:
+                yield self.sample_batch(batch_indices) + (self.get_extras(batch_indices), )
+            else:
+                yield self.sample_batch(batch_indices)
+
+    def save_extras(self, **columns):
+        self.extras = columns
+
+    def append_extras(self, **columns):
+        for key, column in columns.items():
+            if key not in self.extras:
+                self.extras[key] = column
+            elif isinstance(column, tuple):
+                self.extras[key] = tuple(torch.cat((old, new)) for old, new in zip(self.extras[key], column))
+            else:
+                self.extras[key] = torch.cat((self.extras[key], column))
+
+    def get_extras(self, indices):
+        # a column can also be a tuple of tensors, e.g. the (mean, std) outputs of a continous policy
+        return { key: tuple(data[indices] for data in column) if isinstance(column, tuple) else column[indices] for key, column in self.extras.items() }
+
     def save_obs(self, state, action, reward, done, next_state):
         if len(self) >= self.capacity:
             del self.states[0]
@@ -68,6 +117,8 @@ class PolicyMemory(Dataset):
         return states, actions, rewards, dones, next_states 
 
     def clear_memory(self):
+        self.extras = {}
+
         del self.states[:]
         del self.actions[:]
         del self.rewards[:]
@@ -1,48 +1,54 @@
+from uuid import uuid4
+
 from memory.policy.standard import PolicyMemory
-import json
+from helpers.chunk_codec import encode_chunk, decode_chunk
 
 class PolicyRedisListMemory(PolicyMemory):
-    def __init__(self, redis, capacity = 100000, datas = None):
+    def __init__(self, redis, capacity = 100000, datas = None, key = 'policy'):
         super().__init__(capacity, datas)
         self.redis      = redis
+        self.key        = key
+        self.index_key  = key + ':chunks'
 
     def save_redis(self, start_position = 0, end_position = None):
-        if end_position is not None or end_position == -1:
-            states      = self.states[start_position:end_position + 1]
-            actions     = self.actions[start_position:end_position + 1]
-            rewards     = self.rewards[start_position:end_position + 1]
-            dones       = self.dones[start_position:end_position + 1]
-            next_states = self.next_states[start_position:end_position + 1]
-        else:
-            states      = self.states[start_position:]
-            actions     = self.actions[start_position:]
-            rewards     = self.rewards[start_position:]
-            dones       = self.dones[start_position:]
-            next_states = self.next_states[start_position:]
-
-        for state, action, reward, done, next_state in zip(states, actions, rewards, dones, next_states):
-            self.redis.rpush('states', json.dumps(state))
-            self.redis.rpush('actions', json.dumps(action))
-            self.redis.rpush('rewards', json.dumps(reward))
-            self.redis.rpush('dones', json.dumps(done))
-            self.redis.rpush('next_states', json.dumps(next_state))
-
-    def load_redis(self, start_position = 0, end_position = -1):
-        states         = list(map(lambda e: json.loads(e), self.redis.lrange('states', start_position, end_position)))
-        actions        = list(map(lambda e: json.loads(e), self.redis.lrange('actions', start_position, end_position)))
-        rewards        = list(map(lambda e: json.loads(e), self.redis.lrange('rewards', start_position, end_position)))
-        dones          = list(map(lambda e: json.loads(e), self.redis.lrange('dones', start_position, end_position)))
-        next_states    = list(map(lambda e: json.loads(e), self.redis.lrange('next_states', start_position, end_position)))
-
-        self.save_all(states, actions, rewards, dones, next_states)
+        states, actions, rewards, dones, next_states = self.get_ranged_items(start_position, end_position)
+        if len(dones) == 0:
+            return
+
+        chunk_key   = '{}:chunk:{}:{}'.format(self.key, uuid4().hex, len(dones))
+        payload     = encode_chunk((states, actions, rewards, dones, next_states))
+
+        pipeline    = self.redis.pipeline(transaction = True)
+        pipeline.set(chunk_key, payload)
+        pipeline.rpush(self.index_key, chunk_key)
+        pipeline.execute()
+
+    def _pop_chunk_keys(self):
+        pipeline = self.redis.pipeline(transaction = True)
+        pipeline.lrange(self.index_key, 0, -1)
+        pipeline.delete(self.index_key)
+        chunk_keys, _ = pipeline.execute()
+
+        return [chunk_key.decode() if isinstance(chunk_key, bytes) else chunk_key for chunk_key in chunk_keys]
+
+    def load_redis(self):
+        chunk_keys = self._pop_chunk_keys()
+        if len(chunk_keys) == 0:
+            return
+
+        pipeline = self.redis.pipeline(transaction = True)
+        pipeline.mget(chunk_keys)
+        pipeline.delete(*chunk_keys)
+        payloads, _ = pipeline.execute()
+
+        for payload in payloads:
+            if payload is not None:
+                self.save_all(*decode_chunk(payload))
 
     def delete_redis(self):
-        self.redis.delete('states')
-        self.redis.delete('actions')
-        self.redis.delete('rewards')
-        self.redis.delete('dones')
-        self.redis.delete('next_states')
+        chunk_keys = self._pop_chunk_keys()
+        if len(chunk_keys) > 0:
+            self.redis.delete(*chunk_keys)
 
     def check_if_exists_redis(self):
-        return bool(self.redis.exists('dones'))
-        
\ No newline at end of file
+        return bool(self.redis.exists(self.index_key))
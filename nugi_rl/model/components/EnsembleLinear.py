@@ -0,0 +1,30 @@
+import math
+
+import torch
+import torch.nn as nn
+
+class EnsembleLinear(nn.Module):
+    def __init__(self, n_members, in_features, out_features):
+        super(EnsembleLinear, self).__init__()
+
+        self.n_members    = n_members
+        self.in_features  = in_features
+        self.out_features = out_features
+
+        self.weight       = nn.Parameter(torch.empty(n_members, in_features, out_features))
+        self.bias         = nn.Parameter(torch.empty(n_members, 1, out_features))
+
+        self.reset_parameters()
+
+    def reset_parameters(self):
+        # same bound nn.Linear ends up with, drawn independently for every member
+        bound = 1 / math.sqrt(self.in_features)
+        nn.init.uniform_(self.weight, -bound, bound)
+        nn.init.uniform_(self.bias, -bound, bound)
+
+    def forward(self, x):
+        # [batch, in] is shared by every member, [n_members, batch, in] already carries one input per member
+        if x.dim() == 2:
+            x = x.unsqueeze(0).expand(self.n_members, -1, -1)
+
+        return torch.baddbmm(self.bias, x, self.weight)
@@ -1,6 +1,7 @@
 import torch
 import torch.nn as nn
 from helpers.pytorch_utils import set_device
+from model.components.EnsembleLinear import EnsembleLinear
 
 class Policy_Model(nn.Module):
     def __init__(self, state_dim, action_dim):
@@ -69,4 +70,28 @@ class Value_Model(nn.Module):
       if detach:
         return self.nn_layer(states).detach()
       else:
-        return self.nn_layer(states)
\ No newline at end of file
+        return self.nn_layer(states)
+
+class Ensemble_Q_Model(nn.Module):
+    def __init__(self, state_dim, action_dim, n_critics = 2, use_gpu = True):
+        super(Ensemble_Q_Model, self).__init__()
+
+        # Critics splits the members into two equal halves for the twin q losses
+        if n_critics < 2 or n_critics % 2 != 0:
+            raise Exception('n_critics must be an even number of at least 2, got {}'.format(n_critics))
+
+        self.nn_layer = nn.Sequential(
+          EnsembleLinear(n_critics, state_dim + action_dim, 256),
+          nn.ReLU(),
+          EnsembleLinear(n_critics, 256, 64),
+          nn.ReLU(),
+          EnsembleLinear(n_critics, 64, 1)
+        )
+        
+    def forward(self, states, actions, detach = False):
+      x   = torch.cat((states, actions), -1)
+
+      if detach:
+        return self.nn_layer(x).detach()
+      else:
+        return self.nn_layer(x)
\ No newline at end of file
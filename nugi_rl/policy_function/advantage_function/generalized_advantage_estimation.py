@@ -1,16 +1,14 @@
 import torch
+from helpers.pytorch_utils import discounted_reverse_scan
 
 class GeneralizedAdvantageEstimation():
-    def __init__(self, gamma = 0.99):
-        self.gamma  = gamma
+    def __init__(self, gamma = 0.99, lamda = 0.95, block_size = 256):
+        self.gamma      = gamma
+        self.lamda      = lamda
+        self.block_size = block_size
 
     def compute_advantages(self, rewards, values, next_values, dones):
-        gae     = 0
-        adv     = []     
+        deltas  = rewards + (1.0 - dones) * self.gamma * next_values - values
+        decays  = (1.0 - dones) * self.gamma * self.lamda
 
-        delta   = rewards + (1.0 - dones) * self.gamma * next_values - values          
-        for step in reversed(range(len(rewards))):  
-            gae = delta[step] + (1.0 - dones[step]) * (1.0 - self.gamma) * gae
-            adv.insert(0, gae)
-            
-        return torch.stack(adv)
\ No newline at end of file
+        return discounted_reverse_scan(deltas, decays, self.block_size)
@@ -1,22 +1,42 @@
 import torch
+from helpers.pytorch_utils import discounted_reverse_scan
 
 class VtraceAdvantageEstimation():
-    def __init__(self, gamma = 0.99):
-        self.gamma  = gamma
+    def __init__(self, gamma = 0.99, lamda = 1.0, rho_clip = 1.0, c_clip = 1.0, block_size = 256):
+        self.gamma      = gamma
+        self.lamda      = lamda
+        self.rho_clip   = rho_clip
+        self.c_clip     = c_clip
+        self.block_size = block_size
 
-    def compute_advantages(self, rewards, values, next_values, dones, worker_logprobs, learner_logprobs):
-        gae     = 0
-        adv     = []
+    def _step_ratios(self, worker_logprobs, learner_logprobs, rewards):
+        # continous policies give one logprob per action dimension, the step ratio is the product over them
+        log_ratios  = learner_logprobs - worker_logprobs
+        if log_ratios.shape != rewards.shape:
+            log_ratios = log_ratios.sum(-1, keepdim = True)
 
-        limit   = torch.FloatTensor([1.0])
-        ratio   = torch.min(limit, (learner_logprobs - worker_logprobs).exp())
+        return log_ratios.reshape(rewards.shape).exp()
 
-        delta   = rewards + (1.0 - dones) * self.gamma * next_values - values
-        delta   = ratio * delta
+    def compute_vtrace(self, rewards, values, next_values, dones, worker_logprobs, learner_logprobs, chunk_ends = None):
+        ratios      = self._step_ratios(worker_logprobs, learner_logprobs, rewards)
+        rhos        = ratios.clamp(max = self.rho_clip)
+        cs          = ratios.clamp(max = self.c_clip) * self.lamda
 
-        for step in reversed(range(len(rewards))):
-            gae   = (1.0 - dones[step]) * (1.0 - self.gamma) * gae
-            gae   = delta[step] + ratio * gae
-            adv.insert(0, gae)
-            
-        return torch.stack(adv)
\ No newline at end of file
+        deltas      = rhos * (rewards + (1.0 - dones) * self.gamma * next_values - values)
+        decays      = (1.0 - dones) * self.gamma * cs
+
+        # rollouts from different runners are stored back to back, the trace must stop at the end of each one and bootstrap from its own next value
+        chunk_ends      = torch.zeros_like(dones) if chunk_ends is None else chunk_ends.clone()
+        chunk_ends[-1:] = 1.0
+
+        decays      = decays * (1.0 - chunk_ends)
+
+        vs          = values + discounted_reverse_scan(deltas, decays, self.block_size)
+        next_vs     = torch.where(chunk_ends.bool(), next_values, torch.cat((vs[1:], next_values[-1:]), 0))
+        advantages  = rhos * (rewards + (1.0 - dones) * self.gamma * next_vs - values)
+
+        return vs, advantages
+
+    def compute_advantages(self, rewards, values, next_values, dones, worker_logprobs, learner_logprobs, chunk_ends = None):
+        _, advantages = self.compute_vtrace(rewards, values, next_values, dones, worker_logprobs, learner_logprobs, chunk_ends)
+        return advantages
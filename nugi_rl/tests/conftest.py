@@ -0,0 +1,5 @@
+import os
+import sys
+
+# the package modules import each other without a package prefix, e.g. `from helpers.x import Y`
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,70 @@
+import pytest
+
+torch   = pytest.importorskip('torch')
+nn      = torch.nn
+
+from agent.standard.ppo import AgentPPO
+from distribution.basic_discrete import BasicDiscrete
+from loss.trpo_ppo.ppo_clip import PPOClip
+from memory.policy.standard import PolicyMemory
+from policy_function.advantage_function.generalized_advantage_estimation import GeneralizedAdvantageEstimation
+
+class Policy(nn.Module):
+    def __init__(self, state_dim, action_dim):
+        super(Policy, self).__init__()
+        self.nn_layer = nn.Sequential(nn.Linear(state_dim, 16), nn.ReLU(), nn.Linear(16, action_dim), nn.Softmax(-1))
+
+    def forward(self, states, detach = False):
+        action_datas = self.nn_layer(states)
+        return action_datas.detach() if detach else action_datas
+
+class Value(nn.Module):
+    def __init__(self, state_dim):
+        super(Value, self).__init__()
+        self.nn_layer = nn.Sequential(nn.Linear(state_dim, 16), nn.ReLU(), nn.Linear(16, 1))
+
+    def forward(self, states, detach = False):
+        values = self.nn_layer(states)
+        return values.detach() if detach else values
+
+def make_agent(num_workers = 0, state_dim = 4, action_dim = 2):
+    device          = torch.device('cpu')
+    policy, value   = Policy(state_dim, action_dim), Value(state_dim)
+    distribution    = BasicDiscrete(use_gpu = False)
+    ppo_loss        = PPOClip(distribution, GeneralizedAdvantageEstimation())
+    optimizer       = torch.optim.Adam(list(policy.parameters()) + list(value.parameters()), lr = 1e-3)
+
+    return AgentPPO(policy, value, distribution, ppo_loss, PolicyMemory(), optimizer, ppo_epochs = 2, batch_size = 8, device = device,
+        num_workers = num_workers)
+
+def make_rollout(n_steps = 32, state_dim = 4):
+    states      = torch.randn(n_steps, state_dim).tolist()
+    actions     = torch.randint(2, (n_steps, )).tolist()
+    rewards     = torch.rand(n_steps).tolist()
+    dones       = [float(step % 10 == 9) for step in range(n_steps)]
+    next_states = torch.randn(n_steps, state_dim).tolist()
+
+    return PolicyMemory(capacity = n_steps + 1, datas = (states, actions, rewards, dones, next_states))
+
+def parameters(module):
+    return [param.detach().clone() for param in module.parameters()]
+
+def test_update_with_loader_workers():
+    agent   = make_agent(num_workers = 2)
+    before  = parameters(agent.policy)
+
+    agent.save_memory(make_rollout())
+    agent.update()
+
+    assert len(agent.ppo_memory) == 0
+    assert any(not torch.equal(old, new) for old, new in zip(before, agent.policy.parameters()))
+
+def test_update_with_worker_logprobs_and_gae():
+    agent   = make_agent()
+    rollout = make_rollout()
+    rollout.save_extras(worker_logprobs = agent.memory_logprobs(rollout))
+
+    agent.save_memory(rollout)
+    agent.update()
+
+    assert len(agent.ppo_memory) == 0
@@ -16,10 +16,8 @@ class CentralLearnerExecutor():
 
         try:
             for i_iteration in range(1, self.n_iteration, 1):
-                if self.agent.memory.check_if_exists_redis():
-                    self.agent.memory.load_redis()
-                    self.agent.memory.delete_redis()
-                
+                self.agent.memory.load_redis()
+
                 self.agent.update()
                 self.runner.run()
 
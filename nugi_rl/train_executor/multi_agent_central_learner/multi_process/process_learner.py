@@ -0,0 +1,170 @@
+import datetime
+import time
+import queue
+import multiprocessing as mp
+
+import numpy as np
+import torch
+
+from helpers.shared_ring import SharedRolloutRing
+from helpers.weight_broadcast import WeightBroadcast
+from memory.policy.standard import PolicyMemory
+
+def run_child(tag, make_runner, ring, filled_slots, broadcast, stop_event, n_steps_done, with_logprobs):
+    # torch would otherwise start one intra-op thread per core in every child
+    torch.set_num_threads(1)
+
+    # under fork the learner's objects are inherited as they are, the child must neither unlink the blocks nor start at the learner's version
+    ring.is_owner, broadcast.is_owner, broadcast.version = False, False, 0
+
+    runner  = make_runner()
+    agent   = runner.agent
+
+    try:
+        while not stop_event.is_set():
+            if broadcast.pull(agent.policy):
+                agent.acting_policy.refresh()
+
+            states, actions, rewards, dones, next_states = runner.run()
+            logprobs = agent.memory_logprobs(agent.memory).numpy() if with_logprobs else None
+            agent.memory.clear_memory()
+
+            slot = ring.acquire(stop_event)
+            if slot is None:
+                break
+
+            ring.write(slot, states, actions, rewards, dones, next_states, broadcast.version, logprobs)
+            filled_slots.put((tag, slot))
+
+            with n_steps_done.get_lock():
+                n_steps_done[tag] += len(dones)
+
+    except KeyboardInterrupt:
+        pass
+    finally:
+        ring.close()
+        broadcast.close()
+
+class ProcessCentralLearnerExecutor():
+    def __init__(self, agent, n_iteration, runner_fns, n_steps, state_shape, action_shape = (), logprob_shape = None, n_slots = 2,
+        save_weights = False, n_saved = 10, n_plot_batch = 10, writer = None, start_method = 'fork'):
+
+        self.agent          = agent
+        self.runner_fns     = runner_fns
+
+        self.n_iteration    = n_iteration
+        self.save_weights   = save_weights
+        self.n_saved        = n_saved
+        self.n_plot_batch   = n_plot_batch
+        self.writer         = writer
+        self.with_logprobs  = logprob_shape is not None
+
+        self.ctx            = mp.get_context(start_method)
+        self.stop_event     = self.ctx.Event()
+        self.filled_slots   = self.ctx.Queue()
+        self.n_steps_done   = self.ctx.Array('q', len(runner_fns))
+
+        self.rings          = [SharedRolloutRing(self.ctx, n_slots, n_steps, state_shape, action_shape, logprob_shape) for _ in runner_fns]
+        self.broadcast      = WeightBroadcast(self.agent.policy)
+
+        self.children       = []
+        self.n_chunks       = np.zeros(len(runner_fns), dtype = np.int64)
+        self.learner_idle   = 0.0
+
+    def _start_children(self):
+        for tag, make_runner in enumerate(self.runner_fns):
+            child = self.ctx.Process(target = run_child, args = (tag, make_runner, self.rings[tag], self.filled_slots, self.broadcast, self.stop_event,
+                self.n_steps_done, self.with_logprobs), daemon = True)
+
+            child.start()
+            self.children.append(child)
+
+    def _next_chunk(self):
+        start = time.time()
+
+        while True:
+            try:
+                tag, slot = self.filled_slots.get(timeout = 1.0)
+                break
+            except queue.Empty:
+                if not any(child.is_alive() for child in self.children):
+                    raise Exception('all child processes have stopped')
+
+        self.learner_idle += time.time() - start
+
+        datas, logprobs, version = self.rings[tag].read(slot)
+        self.rings[tag].release(slot)
+        self.n_chunks[tag] += 1
+
+        return datas, logprobs, version
+
+    def _report(self, i_iteration, start):
+        elapsed         = time.time() - start
+        steps_per_sec   = [n_steps / elapsed for n_steps in self.n_steps_done[:]]
+
+        print('Iteration {} \t learner idle: {:.1f}% \t chunks per child: {} \t steps/sec per child: {}'.format(i_iteration, 100 * self.learner_idle / elapsed,
+            self.n_chunks.tolist(), ['{:.0f}'.format(steps) for steps in steps_per_sec]))
+
+        if self.writer is not None:
+            self.writer.add_scalar('Learner Idle', self.learner_idle / elapsed, i_iteration)
+            for tag, steps in enumerate(steps_per_sec):
+                self.writer.add_scalar('Child {} Steps per Sec'.format(tag), steps, i_iteration)
+
+    def _shutdown(self):
+        self.stop_event.set()
+
+        # hand every queued slot back, so no child stays blocked waiting for a free one
+        while True:
+            try:
+                tag, slot = self.filled_slots.get_nowait()
+                self.rings[tag].release(slot)
+            except queue.Empty:
+                break
+
+        for child in self.children:
+            child.join(timeout = 5.0)
+            if child.is_alive():
+                child.terminate()
+                child.join()
+
+        self.filled_slots.cancel_join_thread()
+        for ring in self.rings:
+            ring.free_slots.cancel_join_thread()
+            ring.close()
+
+        self.broadcast.close()
+
+    def execute(self):
+        start = time.time()
+        print('Running the training!!')
+
+        self._start_children()
+
+        try:
+            for i_iteration in range(1, self.n_iteration, 1):
+                datas, logprobs, _ = self._next_chunk()
+
+                memory = PolicyMemory(capacity = len(datas[3]) + 1, datas = datas)
+                if logprobs is not None:
+                    memory.save_extras(worker_logprobs = torch.from_numpy(logprobs))
+
+                self.agent.save_memory(memory)
+                self.agent.update()
+                self.broadcast.publish(self.agent.policy)
+
+                if i_iteration % self.n_plot_batch == 0:
+                    self._report(i_iteration, start)
+
+                if self.save_weights:
+                    if i_iteration % self.n_saved == 0:
+                        self.agent.save_weights()
+                        print('weights saved')
+
+        except KeyboardInterrupt:
+            print('Stopped by User')
+        finally:
+            self._shutdown()
+
+            finish = time.time()
+            timedelta = finish - start
+            print('Timelength: {}'.format(str( datetime.timedelta(seconds = timedelta) )))
@@ -2,6 +2,8 @@ import datetime
 import time
 import ray
 
+from memory.policy.standard import PolicyMemory
+
 class CentralLearnerExecutor():
     def __init__(self, agent, n_iteration, child_executors, save_weights = False, n_saved = 10):
         self.agent              = agent
@@ -25,12 +27,16 @@ class CentralLearnerExecutor():
         try:
             for i_iteration in range(1, self.n_iteration, 1):
                 ready, not_ready    = ray.wait(episode_ids)
-                memories, tag       = ray.get(ready[0])
+                memories, worker_logprobs, tag  = ray.get(ready[0])
 
                 episode_ids = not_ready
                 episode_ids.append(self.child_executors[tag].execute.remote())
 
-                self.agent.save_memory(memories)
+                memory = PolicyMemory(capacity = len(memories[3]) + 1, datas = memories)
+                if worker_logprobs is not None:
+                    memory.save_extras(worker_logprobs = worker_logprobs)
+
+                self.agent.save_memory(memory)
                 self.agent.update()
 
                 if self.save_weights:
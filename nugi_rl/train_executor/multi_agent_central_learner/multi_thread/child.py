@@ -2,11 +2,13 @@ import ray
 
 @ray.remote(num_gpus=0.25)
 class ChildExecutor():
-    def __init__(self, agent, runner, tag, load_weights = False, save_weights = False):
+    def __init__(self, agent, runner, tag, load_weights = False, save_weights = False, with_logprobs = False):
         self.agent  = agent
         self.runner = runner
         self.tag    = tag
 
+        self.with_logprobs  = with_logprobs
+
         self.save_weights   = save_weights
 
         if load_weights:
@@ -14,8 +16,8 @@ class ChildExecutor():
             print('Weight Loaded')  
 
     def execute(self):
-        memories  = self.runner.run()
-        self.agent.save_memory(memories)
+        memories        = self.runner.run()
+        worker_logprobs = self.agent.memory_logprobs(self.agent.memory) if self.with_logprobs else None
 
         self.agent.update()
 
@@ -23,4 +25,4 @@ class ChildExecutor():
             self.agent.save_weights()
             print('weights saved')
 
-        return memories, self.tag
\ No newline at end of file
+        return memories, worker_logprobs, self.tag
\ No newline at end of file
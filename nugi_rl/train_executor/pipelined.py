@@ -0,0 +1,178 @@
+import time
+import datetime
+import queue
+import threading
+from copy import deepcopy
+
+from memory.policy.standard import PolicyMemory
+
+class PolicySnapshot():
+    def __init__(self, policy):
+        self.lock       = threading.Lock()
+        self.publish(policy, 0)
+
+    def publish(self, policy, version):
+        # a fresh copy per version, so collectors never read a state dict the learner is still writing into
+        weights = { key: value.detach().clone() for key, value in policy.state_dict().items() }
+
+        with self.lock:
+            self.weights    = weights
+            self.version    = version
+
+    def get(self):
+        with self.lock:
+            return self.weights, self.version
+
+class Collector(threading.Thread):
+    def __init__(self, agent, runner, snapshot, chunks, stop_event, tag, with_logprobs = False):
+        super().__init__(daemon = True)
+
+        self.agent          = agent
+        self.runner         = runner
+        self.snapshot       = snapshot
+        self.chunks         = chunks
+        self.stop_event     = stop_event
+        self.tag            = tag
+        self.with_logprobs  = with_logprobs
+
+        self.version        = -1
+        self.idle_time      = 0.0
+        self.n_chunks       = 0
+
+    def _sync_weights(self):
+        weights, version = self.snapshot.get()
+        if version > self.version:
+            self.agent.policy.load_state_dict(weights)
+            self.agent.acting_policy.refresh()
+            self.version = version
+
+    def _put(self, chunk):
+        start = time.time()
+
+        # a full queue is the backpressure, keep checking for the stop event so shutdown never hangs on a blocked put
+        while not self.stop_event.is_set():
+            try:
+                self.chunks.put(chunk, timeout = 0.1)
+                break
+            except queue.Full:
+                continue
+
+        self.idle_time += time.time() - start
+
+    def run(self):
+        while not self.stop_event.is_set():
+            self._sync_weights()
+
+            # ring memories hand out views, copy before clearing so the next rollout cannot overwrite a queued chunk
+            memories        = deepcopy(self.runner.run())
+            worker_logprobs = self.agent.memory_logprobs(self.agent.memory) if self.with_logprobs else None
+            self.agent.memory.clear_memory()
+
+            self._put((memories, worker_logprobs, self.version, self.tag))
+            self.n_chunks += 1
+
+class PipelinedExecutor():
+    def __init__(self, agent, n_iteration, collector_agents, runners, queue_size = 4, max_staleness = 1, with_logprobs = False,
+        save_weights = False, n_saved = 10, load_weights = False, n_plot_batch = 100, writer = None):
+
+        self.agent              = agent
+        self.n_iteration        = n_iteration
+        self.max_staleness      = max_staleness
+
+        self.save_weights       = save_weights
+        self.n_saved            = n_saved
+        self.load_weights       = load_weights
+        self.n_plot_batch       = n_plot_batch
+        self.writer             = writer
+
+        self.chunks             = queue.Queue(maxsize = queue_size)
+        self.stop_event         = threading.Event()
+        self.snapshot           = PolicySnapshot(self.agent.policy)
+
+        self.collectors         = [Collector(collector_agent, runner, self.snapshot, self.chunks, self.stop_event, tag, with_logprobs)
+            for tag, (collector_agent, runner) in enumerate(zip(collector_agents, runners))]
+
+        self.version            = 0
+        self.n_stale            = 0
+        self.learner_idle_time  = 0.0
+        self.queue_depths       = []
+
+    def _next_chunk(self):
+        while True:
+            start = time.time()
+            try:
+                chunk = self.chunks.get(timeout = 1.0)
+            except queue.Empty:
+                self.learner_idle_time += time.time() - start
+                if not any(collector.is_alive() for collector in self.collectors):
+                    raise Exception('all collectors have stopped')
+                continue
+
+            self.learner_idle_time += time.time() - start
+
+            self.queue_depths.append(self.chunks.qsize())
+
+            # chunks collected with weights older than the staleness bound are dropped instead of trained on
+            if self.version - chunk[2] <= self.max_staleness:
+                return chunk
+
+            self.n_stale += 1
+
+    def _report(self, i_iteration, start):
+        elapsed         = time.time() - start
+        queue_depth     = sum(self.queue_depths) / max(len(self.queue_depths), 1)
+        collector_idle  = [collector.idle_time for collector in self.collectors]
+
+        print('Iteration {} \t queue depth: {:.2f} \t learner idle: {:.1f}% \t collector idle: {} \t stale dropped: {}'.format(i_iteration, queue_depth,
+            100 * self.learner_idle_time / elapsed, ['{:.1f}%'.format(100 * idle / elapsed) for idle in collector_idle], self.n_stale))
+
+        if self.writer is not None:
+            self.writer.add_scalar('Queue Depth', queue_depth, i_iteration)
+            self.writer.add_scalar('Learner Idle', self.learner_idle_time / elapsed, i_iteration)
+
+        self.queue_depths = []
+
+    def execute(self):
+        if self.load_weights:
+            self.agent.load_weights()
+            self.snapshot.publish(self.agent.policy, self.version)
+            print('Weight Loaded')
+
+        start = time.time()
+        print('Running the training!!')
+
+        for collector in self.collectors:
+            collector.start()
+
+        try:
+            for i_iteration in range(1, self.n_iteration, 1):
+                memories, worker_logprobs, _, _ = self._next_chunk()
+
+                memory = PolicyMemory(capacity = len(memories[3]) + 1, datas = memories)
+                if worker_logprobs is not None:
+                    memory.save_extras(worker_logprobs = worker_logprobs)
+
+                self.agent.save_memory(memory)
+                self.agent.update()
+
+                self.version += 1
+                self.snapshot.publish(self.agent.policy, self.version)
+
+                if i_iteration % self.n_plot_batch == 0:
+                    self._report(i_iteration, start)
+
+                if self.save_weights:
+                    if i_iteration % self.n_saved == 0:
+                        self.agent.save_weights()
+                        print('weights saved')
+
+        except KeyboardInterrupt:
+            print('Stopped by User')
+        finally:
+            self.stop_event.set()
+            for collector in self.collectors:
+                collector.join()
+
+            finish = time.time()
+            timedelta = finish - start
+            print('\nTimelength: {}'.format(str( datetime.timedelta(seconds = timedelta) )))
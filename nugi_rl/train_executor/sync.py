@@ -5,7 +5,7 @@ import ray
 
 class SyncExecutor():
     def __init__(self, agent, env, n_iteration, runner, reward_threshold, save_weights = False, n_plot_batch = 100, render = True, training_mode = True, n_update = 1024, n_aux_update = 10, 
-        n_saved = 10, max_action = 1.0, load_weights = False):
+        n_saved = 10, max_action = 1.0, load_weights = False, weight_broadcast = None):
 
         self.agent              = agent
         self.env                = env
@@ -19,6 +19,7 @@ class SyncExecutor():
         self.max_action         = max_action
         self.n_aux_update       = n_aux_update
         self.load_weights       = load_weights
+        self.weight_broadcast   = weight_broadcast
 
         self.t_updates          = 0
         self.t_aux_updates      = 0
@@ -33,11 +34,16 @@ class SyncExecutor():
         
         try:            
             for i_iteration in range(self.n_iteration):
-                self.agent.save_temp_weights()
+                # runners copy the flattened policy out of shared memory, without a broadcast they fall back to reading the checkpoint
+                if self.weight_broadcast is not None:
+                    self.weight_broadcast.publish(self.agent.policy)
+                else:
+                    self.agent.save_weights()
+
                 futures  = [runner.run.remote() for runner in self.runner]
-                memories = ray.get(futures)
+                results  = ray.get(futures)
 
-                for memory in memories:
+                for memory, _ in results:
                     self.agent.save_memory(memory)
 
                 self.agent.update()   
@@ -49,6 +55,8 @@ class SyncExecutor():
 
         finally:
             ray.shutdown()
+            if self.weight_broadcast is not None:
+                self.weight_broadcast.close()
             
             finish = time.time()
             timedelta = finish - start